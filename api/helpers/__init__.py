@@ -1,2 +1,2 @@
 from .detection import detect_expert_used, detect_language, detect_emergency
-from .health_checks import check_database_connection, check_ai_model, check_tools_availability
+from .health_checks import check_database_connection, check_ai_model, check_tools_availability, get_database_pool_stats, get_llm_client_stats, get_response_cache_stats, get_component_stats, get_instrumentation_metrics, get_recent_traces, get_request_trace
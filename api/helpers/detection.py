@@ -2,8 +2,15 @@
 Detection helper functions for the Medical Understanding AI API
 """
 import re
+import sys
+import os
 from ..models import ExpertType
 
+# Add src to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+import utils
+
 
 def detect_expert_used(response: str) -> ExpertType:
     """Detect which expert was likely used based on response content"""
@@ -43,19 +50,4 @@ def detect_language(text: str) -> str:
 
 def detect_emergency(text: str) -> bool:
     """Detect if message contains emergency keywords"""
-    text_lower = text.lower()
-    
-    emergency_keywords_english = [
-        "chest pain", "heart attack", "can't breathe", "difficulty breathing",
-        "stroke", "unconscious", "severe bleeding", "allergic reaction",
-        "overdose", "suicide", "emergency", "911", "urgent", "help me"
-    ]
-    
-    emergency_keywords_arabic = [
-        "ألم في الصدر", "ألم الصدر", "نوبة قلبية", "لا أستطيع التنفس", "صعوبة التنفس",
-        "سكتة دماغية", "فاقد الوعي", "نزيف شديد", "حساسية شديدة", "جرعة زائدة",
-        "انتحار", "طوارئ", "عاجل", "إسعاف", "ساعدني"
-    ]
-    
-    return (any(keyword in text_lower for keyword in emergency_keywords_english) or
-            any(keyword in text for keyword in emergency_keywords_arabic))
+    return utils.detect_emergency(text)
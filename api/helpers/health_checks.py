@@ -10,7 +10,8 @@ def check_database_connection() -> str:
     try:
         # Add src to path and check database
         sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
-        from models.connect_database import memory_saver
+        from models.connect_database import get_checkpointer
+        get_checkpointer()
         return "operational"
     except Exception as e:
         return f"error: {str(e)}"
@@ -20,8 +21,9 @@ def check_ai_model() -> str:
     """Check if AI model is loaded and responsive"""
     try:
         sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
-        from nodes.LLM import base_model
-        if base_model:
+        from nodes.LLM import is_base_model_loaded
+        # The model is created on first use; checking must not create it
+        if is_base_model_loaded():
             return "operational"
         else:
             return "not_loaded"
@@ -33,12 +35,95 @@ def check_tools_availability() -> str:
     """Check if all tools are available"""
     try:
         sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
-        from tools import (
-            WebSearchTool, 
-            HumanAssistanceTool, 
-            ConsultArabicDoctorTool, 
-            ConsultArabicAIResearcherTool
-        )
+        from tools import tool_registry
+        errors = tool_registry.stats()["errors"]
+        if errors:
+            return f"error: {', '.join(errors)} unavailable"
         return "operational"
     except Exception as e:
         return f"error: {str(e)}"
+
+
+def get_database_pool_stats() -> dict:
+    """Return checkpointer connection pool statistics, if a pool is in use"""
+    try:
+        sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+        from models.connect_database import get_checkpointer
+        from ..routes import chat
+        memory_saver = get_checkpointer()
+        stats = {}
+        if hasattr(memory_saver, 'pool_stats'):
+            stats["sync"] = memory_saver.pool_stats()
+        if hasattr(memory_saver, 'cache_stats'):
+            stats["cache"] = memory_saver.cache_stats()
+        if hasattr(memory_saver, 'write_stats'):
+            stats["write_behind"] = memory_saver.write_stats()
+        if chat.async_checkpointer is not None:
+            stats["async"] = chat.async_checkpointer.pool_stats()
+        return stats
+    except Exception as e:
+        return {"error": str(e)}
+
+
+def get_llm_client_stats() -> dict:
+    """Return the request counters of the shared LLM clients"""
+    try:
+        sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+        from utils.llm_clients import registry
+        return registry.stats()
+    except Exception as e:
+        return {"error": str(e)}
+
+
+def get_response_cache_stats() -> dict:
+    """Return the hit rate and size of the expert response cache"""
+    try:
+        sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+        from AgentExpert.response_cache import response_cache
+        return response_cache.stats()
+    except Exception as e:
+        return {"error": str(e)}
+
+
+def get_component_stats() -> dict:
+    """Return the enabled/loaded tools and agents, their load times, the domain router and context manager counters"""
+    try:
+        sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+        from tools import tool_registry
+        from AgentExpert import agent_registry
+        from nodes.DomainRouter import domain_router
+        from nodes.ContextManager import context_manager
+        from utils.component_timings import component_timings
+        return {
+            "tools": tool_registry.stats(),
+            "agents": agent_registry.loaded(),
+            "load_seconds": component_timings(),
+            "domain_router": domain_router.stats(),
+            "context_manager": context_manager.stats(),
+        }
+    except Exception as e:
+        return {"error": str(e)}
+
+
+def get_instrumentation_metrics() -> dict:
+    """Return the latency and token histograms and the cache and error counters"""
+    try:
+        sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+        from utils.instrumentation import instrumentation
+        return instrumentation.metrics()
+    except Exception as e:
+        return {"error": str(e)}
+
+
+def get_recent_traces(limit: int = 20) -> list:
+    """Return the summaries of the most recent request traces, newest first"""
+    sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+    from utils.instrumentation import instrumentation
+    return instrumentation.recent_traces(limit)
+
+
+def get_request_trace(trace_id: str):
+    """Return one request trace with all its spans, or None if it is unknown or expired"""
+    sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+    from utils.instrumentation import instrumentation
+    return instrumentation.get_trace(trace_id)
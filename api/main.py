@@ -1,19 +1,35 @@
+import asyncio
 from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
 from datetime import datetime
 
-from .routes import chat, health
+from .routes import chat, health, sessions
 from .models import ErrorResponse, ResponseStatus
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Async database resources must be created inside the serving event loop
+    await chat.open_checkpointer()
+    maintenance_task = sessions.start_maintenance()
+    warm_up_task = asyncio.create_task(chat.warm_up())
+    yield
+    warm_up_task.cancel()
+    if maintenance_task is not None:
+        maintenance_task.cancel()
+    await chat.close_checkpointer()
+
 # Create FastAPI app
 app = FastAPI(
     title="Medical Understanding AI API",
     description="AI-powered medical assistant with expert consultations and multilingual support",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Include routers
 app.include_router(chat.router)
 app.include_router(health.router)
+app.include_router(sessions.router)
 
 # Global exception handler
 @app.exception_handler(HTTPException)
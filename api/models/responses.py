@@ -24,6 +24,8 @@ class ChatResponse(BaseModel):
     language_detected: Optional[str] = None
     is_emergency: Optional[bool] = False
     response_time_ms: Optional[int] = None
+    # Look up the timing breakdown of this request at /health/traces/{trace_id}
+    trace_id: Optional[str] = None
 
 class HealthCheckResponse(BaseModel):
     status: str
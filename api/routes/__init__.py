@@ -1,2 +1,3 @@
 from . import chat
-from . import health
\ No newline at end of file
+from . import health
+from . import sessions
\ No newline at end of file
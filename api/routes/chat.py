@@ -1,5 +1,8 @@
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 import time
+import json
+import asyncio
 from datetime import datetime
 import sys
 import os
@@ -7,7 +10,10 @@ import os
 # Add src to path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
 
-from StateGraph import graph
+from StateGraph import get_graph, get_graph_builder
+from nodes import get_base_model
+from models.async_checkpointer import create_async_checkpointer
+from utils.instrumentation import trace, instrument_checkpointer
 from langchain_core.messages import HumanMessage
 from ..models import ChatResponse, ResponseStatus
 from ..models import ChatRequest
@@ -15,20 +21,59 @@ from ..helpers import detect_expert_used, detect_language, detect_emergency
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 
+# Graph compiled with the async checkpointer; falls back to the sync graph when
+# PostgreSQL is not configured (MemorySaver supports the async interface too)
+async_checkpointer = None
+async_graph = None
+
+
+async def open_checkpointer():
+    """Create the async checkpointer inside the serving event loop."""
+    global async_checkpointer
+    async_checkpointer = await create_async_checkpointer()
+
+
+def get_chat_graph():
+    """Return the graph used by the endpoints, building it on first use."""
+    global async_graph
+    if async_checkpointer is None:
+        return get_graph()
+    if async_graph is None:
+        async_graph = get_graph_builder().compile(checkpointer=instrument_checkpointer(async_checkpointer))
+    return async_graph
+
+
+async def warm_up():
+    """Build the graph (tools, agents, model) in the background so startup does not wait for it."""
+    await asyncio.to_thread(get_chat_graph)
+    await asyncio.to_thread(get_base_model)
+
+
+async def close_checkpointer():
+    """Close the async checkpointer connection pool."""
+    global async_checkpointer, async_graph
+    if async_checkpointer is not None:
+        await async_checkpointer.aclose()
+    async_checkpointer = None
+    async_graph = None
+
 @router.post("/", response_model=ChatResponse)
 async def chat_endpoint(request: ChatRequest):
     """Main chat endpoint for interacting with the AI assistant"""
     start_time = time.time()
     
     try:
-        # Configure session
-        config = {"configurable": {"thread_id": request.session_id}}
-        
-        # Create input message
-        input_message = {"messages": [HumanMessage(content=request.message)]}
-        
-        # Invoke the graph
-        result = graph.invoke(input_message, config)
+        # Every node, tool, expert and checkpointer call of the request is recorded in its trace
+        with trace("chat", session_id=request.session_id) as request_trace:
+            # Configure session
+            config = {"configurable": {"thread_id": request.session_id}}
+            
+            # Create input message
+            input_message = {"messages": [HumanMessage(content=request.message)]}
+            
+            # Invoke the graph without blocking the event loop on the database
+            graph = async_graph or await asyncio.to_thread(get_chat_graph)
+            result = await graph.ainvoke(input_message, config)
         
         # Process response
         if result and "messages" in result:
@@ -49,10 +94,64 @@ async def chat_endpoint(request: ChatRequest):
                 expert_used=expert_used,
                 language_detected=language_detected,
                 is_emergency=is_emergency,
-                response_time_ms=response_time
+                response_time_ms=response_time,
+                trace_id=request_trace.id if request_trace else None
             )
         else:
             raise HTTPException(status_code=500, detail="No response generated")
             
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error processing request: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error processing request: {str(e)}")
+
+
+def sse_event(data: dict) -> str:
+    """Format one Server-Sent Event."""
+    return f"data: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+@router.post("/stream")
+async def chat_stream_endpoint(request: ChatRequest):
+    """Chat endpoint streaming the answer as Server-Sent Events.
+
+    Events:
+        {"type": "emergency_alert", "content": ...}  emergency notice, before the expert answers
+        {"type": "expert_token", "expert": ..., "content": ...}  expert answer as it is generated
+        {"type": "token", "content": ...}  final answer of the assistant as it is generated
+        {"type": "done", ...}  the complete ChatResponse
+        {"type": "error", "detail": ...}
+    """
+    start_time = time.time()
+    config = {"configurable": {"thread_id": request.session_id}}
+    input_message = {"messages": [HumanMessage(content=request.message)]}
+
+    async def events():
+        try:
+            with trace("chat_stream", session_id=request.session_id) as request_trace:
+                graph = async_graph or await asyncio.to_thread(get_chat_graph)
+                async for mode, chunk in graph.astream(input_message, config, stream_mode=["messages", "custom"]):
+                    if mode == "custom":
+                        yield sse_event(chunk)
+                        continue
+                    message, metadata = chunk
+                    # Expert tokens arrive on the custom stream; only the chatbot node's tokens are the answer
+                    if metadata.get("langgraph_node") == "chatbot" and message.text():
+                        yield sse_event({"type": "token", "content": message.text()})
+
+                state = await graph.aget_state(config)
+            ai_response = state.values["messages"][-1].content
+            response = ChatResponse(
+                status=ResponseStatus.SUCCESS,
+                message=ai_response,
+                session_id=request.session_id,
+                timestamp=datetime.now(),
+                expert_used=detect_expert_used(ai_response),
+                language_detected=detect_language(request.message),
+                is_emergency=detect_emergency(request.message),
+                response_time_ms=int((time.time() - start_time) * 1000),
+                trace_id=request_trace.id if request_trace else None
+            )
+            yield sse_event({"type": "done", **response.model_dump(mode="json")})
+        except Exception as e:
+            yield sse_event({"type": "error", "detail": f"Error processing request: {str(e)}"})
+
+    return StreamingResponse(events(), media_type="text/event-stream")
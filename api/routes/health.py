@@ -1,7 +1,7 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException
 from datetime import datetime
 from ..models import HealthCheckResponse
-from ..helpers import check_database_connection, check_ai_model, check_tools_availability
+from ..helpers import check_database_connection, check_ai_model, check_tools_availability, get_database_pool_stats, get_llm_client_stats, get_response_cache_stats, get_component_stats, get_instrumentation_metrics, get_recent_traces, get_request_trace
 
 router = APIRouter(prefix="/health", tags=["health"])
 
@@ -30,4 +30,53 @@ async def health_check():
             timestamp=datetime.now(),
             services={},
             version="1.0.0"
-        )
\ No newline at end of file
+        )
+
+@router.get("/database")
+async def database_pool_stats():
+    """Checkpointer connection pool statistics (wait time, connections in use, ...)"""
+    return {
+        "timestamp": datetime.now(),
+        "pool": get_database_pool_stats()
+    }
+
+@router.get("/llm")
+async def llm_client_stats():
+    """Requests, errors and token usage per shared LLM client, and the expert response cache hit rate"""
+    return {
+        "timestamp": datetime.now(),
+        "llm": get_llm_client_stats(),
+        "response_cache": get_response_cache_stats()
+    }
+
+@router.get("/components")
+async def component_stats():
+    """Enabled and loaded tools and agents, the time each took to load, and fast-path routing counters"""
+    return {
+        "timestamp": datetime.now(),
+        "components": get_component_stats()
+    }
+
+@router.get("/metrics")
+async def instrumentation_metrics():
+    """Latency histograms per node, tool, expert and checkpointer call, tokens per LLM call, cache and error counts"""
+    return {
+        "timestamp": datetime.now(),
+        "metrics": get_instrumentation_metrics()
+    }
+
+@router.get("/traces")
+async def recent_traces(limit: int = 20):
+    """Most recent request traces: duration, tokens, cache results, errors and time per span kind"""
+    return {
+        "timestamp": datetime.now(),
+        "traces": get_recent_traces(limit)
+    }
+
+@router.get("/traces/{trace_id}")
+async def request_trace(trace_id: str):
+    """Every span of one request (the trace_id of its ChatResponse)"""
+    trace = get_request_trace(trace_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="Trace not found")
+    return trace
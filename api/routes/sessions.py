@@ -0,0 +1,48 @@
+from fastapi import APIRouter, HTTPException
+import asyncio
+from datetime import datetime
+import sys
+import os
+
+# Add src to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from models import maintenance
+from models.connect_database import get_checkpointer
+
+router = APIRouter(prefix="/sessions", tags=["sessions"])
+
+
+def start_maintenance():
+    """Start the periodic checkpoint retention task if it is configured"""
+    if not maintenance.DB_URL or maintenance.CHECKPOINT_MAINTENANCE_INTERVAL <= 0:
+        return None
+    if maintenance.sqlite_path(maintenance.DB_URL) is not None:
+        # Retention jobs are PostgreSQL-only
+        maintenance.logger.warning("CHECKPOINT_MAINTENANCE_INTERVAL is ignored with a SQLite DATABASE_URL")
+        return None
+    return asyncio.create_task(maintenance.run_periodically())
+
+
+@router.delete("/{session_id}")
+async def delete_session(session_id: str):
+    """Delete all stored conversation data of a session (e.g. for privacy requests)"""
+    try:
+        memory_saver = get_checkpointer()
+        if hasattr(memory_saver, 'flush'):
+            # Queued checkpoints would otherwise be written after the delete
+            await asyncio.to_thread(memory_saver.flush)
+        if hasattr(memory_saver, 'db_url'):
+            jobs = maintenance.CheckpointMaintenance(memory_saver.db_url)
+            deleted = await asyncio.to_thread(jobs.delete_thread, session_id)
+        else:
+            memory_saver.delete_thread(session_id)
+            deleted = None
+        
+        return {
+            "session_id": session_id,
+            "deleted_rows": deleted,
+            "timestamp": datetime.now()
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error deleting session: {str(e)}")
@@ -16,7 +16,7 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
 
 # Try to import directly if API is not running
 try:
-    from StateGraph import graph
+    from StateGraph import get_graph
     from langchain_core.messages import HumanMessage
     DIRECT_MODE = True
 except ImportError:
@@ -71,7 +71,7 @@ def call_chatbot_direct(message: str) -> dict:
         config = {"configurable": {"thread_id": st.session_state.session_id}}
         input_message = {"messages": [HumanMessage(content=message)]}
         
-        result = graph.invoke(input_message, config)
+        result = get_graph().invoke(input_message, config)
         
         if result and "messages" in result:
             ai_response = result["messages"][-1].content
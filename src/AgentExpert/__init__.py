@@ -3,3 +3,5 @@ from .ai_researcher import AIResearcherAgent
 from .arabic_doctor import ArabicDoctorAgent
 from .arabic_ai_researcher import ArabicAIResearcherAgent
 from .general_expert import GeneralExpertAgent
+from .registry import agent_registry, LazyAgent
+from .response_cache import response_cache
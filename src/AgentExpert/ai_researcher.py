@@ -1,5 +1,9 @@
 import os
-from langchain_google_genai import ChatGoogleGenerativeAI
+from utils.llm_clients import get_llm
+from utils.instrumentation import traced
+from utils.domains import AI_KEYWORDS_ENGLISH
+from .response_cache import response_cache
+from .streaming import generate
 from langchain_core.messages import SystemMessage, HumanMessage
 import datetime
 
@@ -12,11 +16,7 @@ class AIResearcherAgent:
         if not self.gemini_api_key:
             raise ValueError("GEMINI_API_KEY environment variable is required")
         
-        self.llm = ChatGoogleGenerativeAI(
-            model="gemini-2.5-flash",
-            google_api_key=self.gemini_api_key,
-            temperature=0.7  # Higher temperature for creative research insights
-        )
+        self.llm = get_llm(temperature=0.7)  # Higher temperature for creative research insights
         
         self.system_prompt = self._get_researcher_prompt()
         
@@ -61,6 +61,7 @@ You are Dr. Research, an expert AI researcher with deep knowledge in artificial
 Remember: You are here to advance understanding of AI technologies and help users navigate the rapidly evolving field of artificial intelligence research.
 """
 
+    @traced("expert")
     def get_response(self, user_input: str) -> str:
         """
         Get AI researcher's response to user input
@@ -77,8 +78,12 @@ Remember: You are here to advance understanding of AI technologies and help user
                 HumanMessage(content=user_input)
             ]
             
-            response = self.llm.invoke(messages)
-            return response.content
+            # Repeated questions are answered from the response cache; new answers are
+            # streamed to the graph's custom stream as they are generated
+            return response_cache.get_or_compute(
+                type(self).__name__, self.llm.model, self.system_prompt, user_input,
+                lambda: generate(self.llm, messages, type(self).__name__)
+            )
             
         except Exception as e:
             return f"I apologize, but I'm experiencing technical difficulties with my research systems. Please try again later. Error: {str(e)}"
@@ -93,14 +98,5 @@ Remember: You are here to advance understanding of AI technologies and help user
         Returns:
             bool: True if AI/ML related keywords detected
         """
-        ai_keywords = [
-            "artificial intelligence", "ai", "machine learning", "ml", "deep learning",
-            "neural network", "llm", "large language model", "gpt", "transformer",
-            "nlp", "natural language processing", "computer vision", "reinforcement learning",
-            "pytorch", "tensorflow", "hugging face", "openai", "anthropic", "google ai",
-            "algorithm", "model training", "fine-tuning", "prompt engineering",
-            "ai safety", "ai ethics", "agi", "multimodal", "embedding", "attention mechanism"
-        ]
-        
         user_lower = user_input.lower()
-        return any(keyword in user_lower for keyword in ai_keywords)
+        return any(keyword in user_lower for keyword in AI_KEYWORDS_ENGLISH)
@@ -1,5 +1,9 @@
 import os
-from langchain_google_genai import ChatGoogleGenerativeAI
+from utils.llm_clients import get_llm
+from utils.instrumentation import traced
+from utils.domains import AI_KEYWORDS_ENGLISH, AI_KEYWORDS_ARABIC
+from .response_cache import response_cache
+from .streaming import generate
 from langchain_core.messages import SystemMessage, HumanMessage
 import datetime
 import re
@@ -11,11 +15,7 @@ class ArabicAIResearcherAgent:
         if not self.gemini_api_key:
             raise ValueError("GEMINI_API_KEY environment variable is required")
         
-        self.llm = ChatGoogleGenerativeAI(
-            model="gemini-2.5-flash",
-            google_api_key=self.gemini_api_key,
-            temperature=0.7
-        )
+        self.llm = get_llm(temperature=0.7)
     
     def detect_language(self, text: str) -> str:
         """Detect if text is Arabic or English"""
@@ -107,6 +107,7 @@ Remember: You are here to advance understanding of AI technologies and help user
 Please respond in English.
 """
 
+    @traced("expert")
     def get_response(self, user_input: str) -> str:
         """Get AI researcher's response in appropriate language"""
         try:
@@ -118,8 +119,12 @@ Please respond in English.
                 HumanMessage(content=user_input)
             ]
             
-            response = self.llm.invoke(messages)
-            return response.content
+            # Repeated questions are answered from the response cache; new answers are
+            # streamed to the graph's custom stream as they are generated
+            return response_cache.get_or_compute(
+                type(self).__name__, self.llm.model, system_prompt, user_input,
+                lambda: generate(self.llm, messages, type(self).__name__)
+            )
             
         except Exception as e:
             if self.detect_language(user_input) == "arabic":
@@ -129,22 +134,6 @@ Please respond in English.
 
     def is_ai_related(self, user_input: str) -> bool:
         """Check if query is AI/ML related in both languages"""
-        ai_keywords_english = [
-            "artificial intelligence", "ai", "machine learning", "ml", "deep learning",
-            "neural network", "llm", "large language model", "gpt", "transformer",
-            "nlp", "natural language processing", "computer vision", "reinforcement learning",
-            "pytorch", "tensorflow", "hugging face", "openai", "anthropic", "google ai",
-            "algorithm", "model training", "fine-tuning", "prompt engineering",
-            "ai safety", "ai ethics", "agi", "multimodal", "embedding", "attention mechanism"
-        ]
-        
-        ai_keywords_arabic = [
-            "الذكاء الاصطناعي", "تعلم الآلة", "التعلم العميق", "الشبكات العصبية",
-            "نماذج اللغة الكبيرة", "معالجة اللغات الطبيعية", "الرؤية الحاسوبية",
-            "التعلم المعزز", "خوارزمية", "نموذج", "تدريب", "ضبط دقيق",
-            "هندسة التوجيه", "أمان الذكاء الاصطناعي", "أخلاقيات الذكاء الاصطناعي"
-        ]
-        
         user_lower = user_input.lower()
-        return (any(keyword in user_lower for keyword in ai_keywords_english) or
-                any(keyword in user_input for keyword in ai_keywords_arabic))
+        return (any(keyword in user_lower for keyword in AI_KEYWORDS_ENGLISH) or
+                any(keyword in user_input for keyword in AI_KEYWORDS_ARABIC))
@@ -1,5 +1,8 @@
 import os
-from langchain_google_genai import ChatGoogleGenerativeAI
+from utils.llm_clients import get_llm
+from utils.instrumentation import traced
+from .response_cache import response_cache
+from .streaming import generate
 from langchain_core.messages import SystemMessage, HumanMessage
 import datetime
 import re
@@ -11,11 +14,7 @@ class ArabicDoctorAgent:
         if not self.gemini_api_key:
             raise ValueError("GEMINI_API_KEY environment variable is required")
         
-        self.llm = ChatGoogleGenerativeAI(
-            model="gemini-2.5-flash",
-            google_api_key=self.gemini_api_key,
-            temperature=0.3
-        )
+        self.llm = get_llm(temperature=0.3)
     
     def detect_language(self, text: str) -> str:
         """Detect if text is Arabic or English"""
@@ -89,6 +88,7 @@ Remember: You are here to educate, support, and guide users toward appropriate m
 Please respond in English.
 """
 
+    @traced("expert")
     def get_response(self, user_input: str) -> str:
         """Get doctor's response in appropriate language"""
         try:
@@ -100,8 +100,12 @@ Please respond in English.
                 HumanMessage(content=user_input)
             ]
             
-            response = self.llm.invoke(messages)
-            return response.content
+            # Repeated questions are answered from the response cache; new answers are
+            # streamed to the graph's custom stream as they are generated
+            return response_cache.get_or_compute(
+                type(self).__name__, self.llm.model, system_prompt, user_input,
+                lambda: generate(self.llm, messages, type(self).__name__)
+            )
             
         except Exception as e:
             if self.detect_language(user_input) == "arabic":
@@ -1,5 +1,8 @@
 import os
-from langchain_google_genai import ChatGoogleGenerativeAI
+from utils.llm_clients import get_llm
+from utils.instrumentation import traced
+from .response_cache import response_cache
+from .streaming import generate
 from langchain_core.messages import SystemMessage, HumanMessage
 import datetime
 
@@ -12,11 +15,7 @@ class DoctorAgent:
         if not self.gemini_api_key:
             raise ValueError("GEMINI_API_KEY environment variable is required")
         
-        self.llm = ChatGoogleGenerativeAI(
-            model="gemini-2.5-flash",
-            google_api_key=self.gemini_api_key,
-            temperature=0.3  # Lower temperature for more reliable medical advice
-        )
+        self.llm = get_llm(temperature=0.3)  # Lower temperature for more reliable medical advice
         
         self.system_prompt = self._get_doctor_prompt()
         
@@ -52,6 +51,7 @@ If a user describes any of these symptoms, immediately recommend emergency medic
 Remember: You are here to educate, support, and guide users toward appropriate medical care while providing helpful preliminary information.
 """
 
+    @traced("expert")
     def get_response(self, user_input: str) -> str:
         """
         Get doctor's response to user input
@@ -68,8 +68,12 @@ Remember: You are here to educate, support, and guide users toward appropriate m
                 HumanMessage(content=user_input)
             ]
             
-            response = self.llm.invoke(messages)
-            return response.content
+            # Repeated questions are answered from the response cache; new answers are
+            # streamed to the graph's custom stream as they are generated
+            return response_cache.get_or_compute(
+                type(self).__name__, self.llm.model, self.system_prompt, user_input,
+                lambda: generate(self.llm, messages, type(self).__name__)
+            )
             
         except Exception as e:
             return f"I apologize, but I'm experiencing technical difficulties. Please consult with a healthcare professional for your medical concerns. Error: {str(e)}"
@@ -1,5 +1,8 @@
 import os
-from langchain_google_genai import ChatGoogleGenerativeAI
+from utils.llm_clients import get_llm
+from utils.instrumentation import traced
+from .response_cache import response_cache
+from .streaming import generate
 from langchain_core.messages import SystemMessage, HumanMessage
 import datetime
 
@@ -12,11 +15,7 @@ class GeneralExpertAgent:
         if not self.gemini_api_key:
             raise ValueError("GEMINI_API_KEY environment variable is required")
         
-        self.llm = ChatGoogleGenerativeAI(
-            model="gemini-2.5-flash",
-            google_api_key=self.gemini_api_key,
-            temperature=0.7  # Balanced temperature for general knowledge
-        )
+        self.llm = get_llm(temperature=0.7)  # Balanced temperature for general knowledge
         
         self.system_prompt = self._get_general_expert_prompt()
         
@@ -58,6 +57,7 @@ You are a knowledgeable General Expert with broad expertise across multiple fiel
 Remember: You are here to educate, inspire curiosity, and provide reliable general knowledge while encouraging lifelong learning.
 """
 
+    @traced("expert")
     def get_response(self, user_input: str, language_preference: str = "english") -> str:
         """
         Get general expert's response to user input
@@ -80,8 +80,12 @@ Remember: You are here to educate, inspire curiosity, and provide reliable gener
                 HumanMessage(content=user_input)
             ]
             
-            response = self.llm.invoke(messages)
-            return response.content
+            # Repeated questions are answered from the response cache; new answers are
+            # streamed to the graph's custom stream as they are generated
+            return response_cache.get_or_compute(
+                type(self).__name__, self.llm.model, system_prompt, user_input,
+                lambda: generate(self.llm, messages, type(self).__name__)
+            )
             
         except Exception as e:
             if language_preference == "arabic":
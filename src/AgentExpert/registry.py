@@ -0,0 +1,46 @@
+"""
+Expert agents created on first use.
+
+The consult tools used to instantiate their agent at import time, so importing
+the tools package built every agent. Tools now hold a LazyAgent, which asks
+the registry for the shared instance the first time it is used.
+"""
+
+import threading
+from utils.component_timings import timed
+
+
+class AgentRegistry:
+    """One shared instance per agent class, created on first request."""
+
+    def __init__(self):
+        self._agents = {}
+        self._lock = threading.Lock()
+
+    def get(self, agent_class):
+        agent = self._agents.get(agent_class)
+        if agent is None:
+            with self._lock:
+                agent = self._agents.get(agent_class)
+                if agent is None:
+                    with timed(f"agent:{agent_class.__name__}"):
+                        agent = agent_class()
+                    self._agents[agent_class] = agent
+        return agent
+
+    def loaded(self):
+        """Names of the agents created so far."""
+        return [agent_class.__name__ for agent_class in self._agents]
+
+
+agent_registry = AgentRegistry()
+
+
+class LazyAgent:
+    """Stands in for an agent instance and creates it through the registry on first use."""
+
+    def __init__(self, agent_class):
+        self._agent_class = agent_class
+
+    def __getattr__(self, name):
+        return getattr(agent_registry.get(self._agent_class), name)
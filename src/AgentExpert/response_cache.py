@@ -0,0 +1,314 @@
+"""
+Cache of expert responses for repeated questions.
+
+Many questions ("what is diabetes", common symptoms) come back again and
+again, and each used to cost a full model call. Responses are cached under a
+key made of the agent, the model, a hash of the system prompt, the detected
+language and the normalized question, so a prompt change (including the date
+the prompts carry) never serves an answer written for another prompt.
+
+Backends:
+    memory  in-process LRU with a TTL (default)
+    sqlite  a shared SQLite file (WAL mode) that every worker on the host uses
+    none    caching disabled
+
+Questions that miss the exact cache are looked up in a semantic index of
+earlier questions (see semantic_cache.py), so paraphrases are answered from
+cache too.
+
+Questions containing emergency keywords are never cached, and failed calls
+are never stored.
+"""
+
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from utils.language import detect_language, normalize_arabic
+from utils.emergency import detect_emergency
+from utils.instrumentation import record_cache
+from .semantic_cache import SemanticIndex, EXPERT_SEMANTIC_CACHE
+
+# Load environment variables
+EXPERT_CACHE_BACKEND = os.getenv("EXPERT_CACHE_BACKEND", "memory")
+EXPERT_CACHE_SIZE = int(os.getenv("EXPERT_CACHE_SIZE", "1000"))
+EXPERT_CACHE_TTL = float(os.getenv("EXPERT_CACHE_TTL", "86400"))
+EXPERT_CACHE_PATH = os.getenv("EXPERT_CACHE_PATH", "data/expert_cache.db")
+
+BACKENDS = ("memory", "sqlite", "none")
+
+# The SQLite backend trims the table back to its size every this many stores
+SQLITE_EVICT_EVERY = 100
+
+# Hits refresh an entry's LRU position at most this often, so most hits are read-only
+SQLITE_TOUCH_INTERVAL = 60
+
+TRAILING_PUNCTUATION = re.compile(r'[\s.!?؟،,;:]+$')
+WHITESPACE = re.compile(r'\s+')
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_query(query):
+    """Fold case, Arabic letter variants, whitespace and trailing punctuation."""
+    text = normalize_arabic(query).lower().strip()
+    return TRAILING_PUNCTUATION.sub('', WHITESPACE.sub(' ', text))
+
+
+def cache_partition(agent, model, system_prompt, query):
+    """Everything but the question itself that a cached answer must match.
+
+    Returns:
+        str: JSON of the agent, model, system prompt hash and language of the question
+    """
+    prompt_hash = hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()
+    return json.dumps([agent, model, prompt_hash, detect_language(query)])
+
+
+def cache_key(partition, query):
+    """Build the exact cache key of a question within its partition."""
+    parts = json.dumps([partition, normalize_query(query)], ensure_ascii=False)
+    return hashlib.sha256(parts.encode("utf-8")).hexdigest()
+
+
+class MemoryBackend:
+    """Thread-safe in-process LRU with a TTL."""
+
+    def __init__(self, max_size=EXPERT_CACHE_SIZE, ttl=EXPERT_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, response)
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key, response):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def size(self):
+        return len(self._entries)
+
+
+class SqliteBackend:
+    """LRU with a TTL in a SQLite file shared by the workers of a host."""
+
+    def __init__(self, path=EXPERT_CACHE_PATH, max_size=EXPERT_CACHE_SIZE, ttl=EXPERT_CACHE_TTL,
+                 busy_timeout=5.0):
+        self.path = path
+        self.max_size = max_size
+        self.ttl = ttl
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        self._stores = 0
+        self.evictions = 0
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS expert_responses (
+                key TEXT PRIMARY KEY,
+                response TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            ) WITHOUT ROWID
+        ''')
+        conn.execute("CREATE INDEX IF NOT EXISTS expert_responses_accessed_idx ON expert_responses (accessed_at)")
+        conn.commit()
+
+    def _connection(self):
+        """Connection of the calling thread (and process)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, check_same_thread=False)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key):
+        conn = self._connection()
+        now = time.time()
+        row = conn.execute('''
+            SELECT response, expires_at, accessed_at FROM expert_responses WHERE key = ?
+        ''', (key,)).fetchone()
+        if row is None:
+            return None
+        response, expires_at, accessed_at = row
+        if expires_at < now:
+            conn.execute("DELETE FROM expert_responses WHERE key = ?", (key,))
+            conn.commit()
+            return None
+        if now - accessed_at > SQLITE_TOUCH_INTERVAL:
+            conn.execute("UPDATE expert_responses SET accessed_at = ? WHERE key = ?", (now, key))
+            conn.commit()
+        return response
+
+    def put(self, key, response):
+        conn = self._connection()
+        now = time.time()
+        conn.execute('''
+            INSERT OR REPLACE INTO expert_responses (key, response, expires_at, accessed_at)
+            VALUES (?, ?, ?, ?)
+        ''', (key, response, now + self.ttl, now))
+        self._stores += 1
+        if self._stores % SQLITE_EVICT_EVERY == 0:
+            self._evict(conn, now)
+        conn.commit()
+
+    def _evict(self, conn, now):
+        """Drop expired entries, then the least recently used ones beyond max_size."""
+        expired = conn.execute("DELETE FROM expert_responses WHERE expires_at < ?", (now,)).rowcount
+        overflow = conn.execute('''
+            DELETE FROM expert_responses WHERE key IN (
+                SELECT key FROM expert_responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+            )
+        ''', (self.max_size,)).rowcount
+        self.evictions += overflow
+        if expired or overflow:
+            logger.info(f"Expert cache evicted {expired} expired and {overflow} least recently used responses")
+
+    def clear(self):
+        conn = self._connection()
+        conn.execute("DELETE FROM expert_responses")
+        conn.commit()
+
+    def size(self):
+        return self._connection().execute("SELECT COUNT(*) FROM expert_responses").fetchone()[0]
+
+
+class ExpertResponseCache:
+    """Looks up expert responses before calling the model, and records hit rates."""
+
+    def __init__(self, backend=None, name="memory", semantic=None):
+        self.backend = backend
+        self.name = name if backend is not None else "none"
+        self.semantic = semantic
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.errors = 0
+
+    def get_or_compute(self, agent, model, system_prompt, query, compute):
+        """Return the cached response to `query`, or compute and cache it.
+
+        Args:
+            agent: Name of the agent answering
+            model: Model the agent uses
+            system_prompt: Exact system prompt of the call
+            query: User question
+            compute: Callable making the model call; exceptions propagate and nothing is cached
+
+        Returns:
+            str: The response
+        """
+        if self.backend is None or detect_emergency(query):
+            # Emergencies always get a fresh answer
+            self._count("bypassed")
+            record_cache("bypassed")
+            return compute()
+
+        partition = cache_partition(agent, model, system_prompt, query)
+        key = cache_key(partition, query)
+        try:
+            cached = self.backend.get(key)
+        except Exception:
+            logger.warning("Expert cache lookup failed", exc_info=True)
+            self._count("errors")
+            cached = None
+        if cached is not None:
+            self._count("hits")
+            record_cache("hit")
+            return cached
+
+        if self.semantic is not None:
+            cached, _ = self.semantic.lookup(partition, query)
+            if cached is not None:
+                self._count("semantic_hits")
+                record_cache("semantic_hit")
+                return cached
+
+        self._count("misses")
+        record_cache("miss")
+        response = compute()
+        if isinstance(response, str) and response:
+            try:
+                self.backend.put(key, response)
+            except Exception:
+                logger.warning("Expert cache store failed", exc_info=True)
+                self._count("errors")
+            if self.semantic is not None:
+                self.semantic.add(partition, query, response)
+        return response
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def clear(self):
+        if self.backend is not None:
+            self.backend.clear()
+        if self.semantic is not None:
+            self.semantic.clear()
+
+    def stats(self):
+        """Return hit/miss counters and the backend size."""
+        hits = self.hits + self.semantic_hits
+        lookups = hits + self.misses
+        stats = {
+            "backend": self.name,
+            "hits": self.hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else None,
+            "bypassed": self.bypassed,
+            "errors": self.errors,
+        }
+        if self.backend is not None:
+            stats.update(size=self.backend.size(), max_size=self.backend.max_size,
+                         ttl_seconds=self.backend.ttl, evictions=self.backend.evictions)
+        if self.semantic is not None:
+            stats["semantic"] = self.semantic.stats()
+        return stats
+
+
+def create_response_cache(backend=EXPERT_CACHE_BACKEND, semantic=EXPERT_SEMANTIC_CACHE):
+    """Create the expert response cache configured by EXPERT_CACHE_BACKEND and EXPERT_SEMANTIC_CACHE."""
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown expert cache backend: {backend}")
+    index = SemanticIndex(ttl=EXPERT_CACHE_TTL) if semantic else None
+    if backend == "sqlite":
+        return ExpertResponseCache(SqliteBackend(), backend, index)
+    if backend == "memory":
+        return ExpertResponseCache(MemoryBackend(), backend, index)
+    return ExpertResponseCache(None)
+
+
+response_cache = create_response_cache()
@@ -0,0 +1,230 @@
+"""
+Near-duplicate lookup for the expert response cache.
+
+The exact cache only matches questions that normalize to the same text, so
+paraphrases ("I have a headache and fever" / "headache with a fever") each cost
+a model call. Questions are embedded locally with a hashing vectorizer (word
+tokens and character n-grams, which works the same for Arabic and English and
+needs no model or network) and answered from the closest earlier question of
+the same agent, prompt and language when the cosine similarity reaches the
+threshold. Questions that differ in a negation, a number, a dose, a unit or an
+age ("2 tablets" / "20 tablets", "my 2-year-old" / "my 12-year-old") never share
+an answer, however similar they are, and neither do questions naming the same
+things in another order ("ibuprofen before paracetamol" / "paracetamol before
+ibuprofen"), which the order-blind vectors cannot tell apart.
+
+Similarities are logged and kept as a histogram (see SemanticIndex.stats())
+so the threshold can be tuned on real traffic.
+"""
+
+import os
+import re
+import zlib
+import logging
+import threading
+import time
+import numpy as np
+from utils.language import normalize_for_search
+
+# Load environment variables
+EXPERT_SEMANTIC_CACHE = os.getenv("EXPERT_SEMANTIC_CACHE", "true").lower() in ("1", "true", "yes")
+EXPERT_SEMANTIC_THRESHOLD = float(os.getenv("EXPERT_SEMANTIC_THRESHOLD", "0.9"))
+EXPERT_SEMANTIC_SIZE = int(os.getenv("EXPERT_SEMANTIC_SIZE", "1000"))
+
+# Hashed feature space of the vectorizer
+VECTOR_DIMENSIONS = 2048
+CHAR_NGRAMS = (3, 4)
+WORD_WEIGHT = 2.0
+
+# Best similarities of lookups are counted in buckets of this width, from HISTOGRAM_START up
+HISTOGRAM_START = 0.5
+HISTOGRAM_STEP = 0.05
+
+WORD = re.compile(r'\w+')
+
+# Function words that don't change what is being asked
+STOP_WORDS = frozenset({
+    "a", "an", "the", "and", "or", "with", "of", "to", "in", "on", "for", "about", "is", "am", "are",
+    "i", "me", "my", "it", "be", "do", "have", "has", "what", "can", "please",
+    "و", "او", "من", "في", "عن", "على", "مع", "الى", "هل", "ما", "هو", "هي", "انا", "لدي", "عندي",
+})
+
+# A question and its negation look alike but must never share an answer
+NEGATIONS = frozenset({
+    "no", "not", "without", "never", "don", "doesn", "didn", "isn", "aren", "cannot",
+    "لا", "لم", "لن", "ليس", "ليست", "بدون", "غير", "بلا", "مش",
+})
+
+# Numbers, units and ages: questions that differ in any of them must not share an answer either
+QUANTITY_WORDS = frozenset(normalize_for_search(word) for word in (
+    "zero", "one", "two", "three", "four", "five", "six", "seven", "eight", "nine", "ten", "eleven", "twelve",
+    "thirteen", "fourteen", "fifteen", "sixteen", "seventeen", "eighteen", "nineteen", "twenty", "thirty",
+    "forty", "fifty", "sixty", "seventy", "eighty", "ninety", "hundred", "thousand", "half", "once", "twice",
+    "mg", "mcg", "ug", "g", "gram", "grams", "kg", "ml", "l", "iu", "unit", "units", "tablet", "tablets",
+    "pill", "pills", "capsule", "capsules", "dose", "doses", "drop", "drops", "teaspoon", "teaspoons", "tsp",
+    "tablespoon", "tablespoons", "puff", "puffs", "times", "daily",
+    "year", "years", "yr", "yrs", "month", "months", "week", "weeks", "day", "days", "hour", "hours",
+    "newborn", "baby", "babies", "infant", "infants", "toddler", "toddlers", "child", "children", "kid", "kids",
+    "teen", "teenager", "adolescent", "adult", "adults", "elderly",
+    "واحد", "واحدة", "اثنين", "اثنان", "اثنتين", "ثلاث", "ثلاثة", "اربع", "أربع", "أربعة", "خمس", "خمسة",
+    "ست", "ستة", "سبع", "سبعة", "ثمان", "ثمانية", "تسع", "تسعة", "عشر", "عشرة", "عشرين", "مئة", "مية",
+    "نصف", "مرة", "مرتين", "ملغ", "مجم", "ملغم", "غرام", "مل", "حبة", "حبات", "حبتين", "كبسولة", "جرعة",
+    "جرعات", "نقطة", "نقاط", "ملعقة", "سنة", "سنوات", "سنتين", "عام", "اعوام", "شهر", "اشهر", "شهور",
+    "اسبوع", "اسابيع", "يوم", "ايام", "ساعة", "ساعات", "يوميا",
+    "رضيع", "مولود", "طفل", "طفلة", "اطفال", "مراهق", "بالغ", "بالغين", "مسن", "مسنين",
+))
+
+DIGITS_OR_TEXT = re.compile(r'\d+|\D+')
+
+logger = logging.getLogger(__name__)
+
+
+def tokenize(text):
+    """Split a question into normalized words (Arabic forms folded, article removed)."""
+    return WORD.findall(normalize_for_search(text))
+
+
+def negations(words):
+    return frozenset(word for word in words if word in NEGATIONS)
+
+
+def quantities(words):
+    """Numbers, doses, units and ages of a question, in order ("500mg" counts as 500 and mg)."""
+    found = []
+    for word in words:
+        if word in QUANTITY_WORDS:
+            found.append(word)
+        elif any(char.isdigit() for char in word):
+            # int() also reads Arabic-Indic digits, so ٥ and 5 compare equal
+            found.extend(str(int(part)) if part.isdigit() else part for part in DIGITS_OR_TEXT.findall(word))
+    return tuple(found)
+
+
+def content_words(words):
+    return tuple(word for word in words if word not in STOP_WORDS)
+
+
+def same_order(words, other):
+    """Return True if the content words two questions share come in the same order in both."""
+    shared = set(words) & set(other)
+    return [word for word in dict.fromkeys(words) if word in shared] == \
+        [word for word in dict.fromkeys(other) if word in shared]
+
+
+def vectorize(words):
+    """Embed a question as an L2-normalized hashed bag of words and character n-grams."""
+    vector = np.zeros(VECTOR_DIMENSIONS, dtype=np.float32)
+    for word in words:
+        if word in STOP_WORDS:
+            continue
+        # crc32 is stable across processes, unlike hash()
+        vector[zlib.crc32(f"w:{word}".encode("utf-8")) % VECTOR_DIMENSIONS] += WORD_WEIGHT
+        padded = f" {word} "
+        for n in CHAR_NGRAMS:
+            for i in range(len(padded) - n + 1):
+                vector[zlib.crc32(padded[i:i + n].encode("utf-8")) % VECTOR_DIMENSIONS] += 1.0
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class SemanticIndex:
+    """Fixed-size NumPy matrix of question vectors with a TTL and LRU eviction."""
+
+    def __init__(self, max_size=EXPERT_SEMANTIC_SIZE, ttl=86400.0, threshold=EXPERT_SEMANTIC_THRESHOLD):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.threshold = threshold
+        self._vectors = np.zeros((max_size, VECTOR_DIMENSIONS), dtype=np.float32)
+        self._partitions = np.zeros(max_size, dtype=np.int64)  # 0 marks an empty slot
+        self._expires_at = np.zeros(max_size)
+        self._used_at = np.zeros(max_size)
+        self._entries = [None] * max_size  # (question, content words, negations, quantities, response)
+        self._partition_ids = {}
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self._histogram = np.zeros(int(round((1 - HISTOGRAM_START) / HISTOGRAM_STEP)) + 1, dtype=np.int64)
+
+    def _partition_id(self, partition):
+        return self._partition_ids.setdefault(partition, len(self._partition_ids) + 1)
+
+    def lookup(self, partition, query):
+        """Find the response to the most similar earlier question.
+
+        Args:
+            partition: Agent, model, prompt and language the answer must match
+            query: User question
+
+        Returns:
+            tuple: (response or None, best similarity)
+        """
+        words = tokenize(query)
+        vector = vectorize(words)
+        now = time.monotonic()
+        with self._lock:
+            partition_id = self._partition_ids.get(partition)
+            if partition_id is None:
+                return None, 0.0
+            candidates = np.flatnonzero((self._partitions == partition_id) & (self._expires_at > now))
+            if candidates.size == 0:
+                return None, 0.0
+            similarities = self._vectors[candidates] @ vector
+            best = int(np.argmax(similarities))
+            slot, similarity = candidates[best], float(similarities[best])
+            question, question_words, question_negations, question_quantities, response = self._entries[slot]
+            self._record(similarity)
+            if (similarity < self.threshold or question_negations != negations(words)
+                    or question_quantities != quantities(words)
+                    or not same_order(question_words, content_words(words))):
+                if similarity >= self.threshold - 2 * HISTOGRAM_STEP:
+                    logger.info(f"Semantic cache near miss (similarity {similarity:.3f}, threshold {self.threshold})")
+                    logger.debug(f"Near miss: {query!r} ~ {question!r}")
+                return None, similarity
+            self._used_at[slot] = now
+        logger.info(f"Semantic cache hit (similarity {similarity:.3f}, threshold {self.threshold})")
+        logger.debug(f"Hit: {query!r} ~ {question!r}")
+        return response, similarity
+
+    def add(self, partition, query, response):
+        """Index a computed response, evicting an expired or the least recently used entry when full."""
+        words = tokenize(query)
+        vector = vectorize(words)
+        now = time.monotonic()
+        with self._lock:
+            slot = int(np.argmin(self._expires_at))
+            if self._expires_at[slot] > now:
+                slot = int(np.argmin(self._used_at))
+                self.evictions += 1
+            self._vectors[slot] = vector
+            self._partitions[slot] = self._partition_id(partition)
+            self._expires_at[slot] = now + self.ttl
+            self._used_at[slot] = now
+            self._entries[slot] = (query, content_words(words), negations(words), quantities(words), response)
+
+    def _record(self, similarity):
+        if similarity >= HISTOGRAM_START:
+            self._histogram[int((similarity - HISTOGRAM_START) / HISTOGRAM_STEP)] += 1
+
+    def clear(self):
+        with self._lock:
+            self._partitions[:] = 0
+            self._expires_at[:] = 0
+            self._used_at[:] = 0
+            self._entries = [None] * self.max_size
+            self._partition_ids.clear()
+
+    def size(self):
+        return int(np.count_nonzero(self._expires_at > time.monotonic()))
+
+    def stats(self):
+        """Return the size and threshold, and how many lookups had their best match in each similarity bucket."""
+        buckets = {
+            f"{HISTOGRAM_START + i * HISTOGRAM_STEP:.2f}": int(count)
+            for i, count in enumerate(self._histogram) if count
+        }
+        return {
+            "threshold": self.threshold,
+            "size": self.size(),
+            "max_size": self.max_size,
+            "evictions": self.evictions,
+            "similarity_histogram": buckets,
+        }
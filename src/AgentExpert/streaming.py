@@ -0,0 +1,54 @@
+"""
+Token streaming of expert answers.
+
+When an expert is consulted from inside a graph run, its answer is generated
+with llm.stream() and every chunk is sent to the graph's custom stream, so a
+caller streaming with stream_mode="custom" sees the expert's answer as it is
+written instead of after the chatbot node has re-synthesized it. Outside a
+graph run the model is invoked as before.
+
+Custom stream chunks look like:
+    {"type": "expert_token", "expert": "DoctorAgent", "content": "..."}
+    {"type": "emergency_alert", "content": "..."}
+"""
+
+from langgraph.config import get_stream_writer
+
+
+def current_stream_writer():
+    """Return the custom stream writer of the running graph, or None outside a graph run."""
+    try:
+        return get_stream_writer()
+    except (RuntimeError, KeyError):
+        return None
+
+
+def generate(llm, messages, expert):
+    """Generate an expert answer, streaming its tokens to the graph when there is one.
+
+    Args:
+        llm: Chat model of the expert
+        messages: Prompt messages
+        expert: Name of the expert, sent with every chunk
+
+    Returns:
+        str: The complete answer
+    """
+    writer = current_stream_writer()
+    if writer is None:
+        return llm.invoke(messages).content
+
+    parts = []
+    for chunk in llm.stream(messages):
+        text = chunk.text()
+        if text:
+            parts.append(text)
+            writer({"type": "expert_token", "expert": expert, "content": text})
+    return "".join(parts)
+
+
+def stream_alert(text):
+    """Send an emergency alert to the graph's custom stream ahead of the expert's answer."""
+    writer = current_stream_writer()
+    if writer is not None:
+        writer({"type": "emergency_alert", "content": text})
@@ -4,25 +4,19 @@ load_dotenv()
 
 # Load Libraries
 from typing import Annotated
-from typing_extensions import TypedDict
+from typing_extensions import TypedDict, NotRequired
 from langgraph.graph import StateGraph, START, END
 from langgraph.graph.message import add_messages
 from langchain_core.messages import SystemMessage, AIMessage
+from langchain_core.runnables import RunnableLambda
 import datetime
 
 # Load from Files
-from nodes import base_model, BasicToolNode
-from models import memory_saver
-from tools import (
-    WebSearchTool, 
-    HumanAssistanceTool, 
-    ConsultDoctorTool, 
-    ConsultAIResearcherTool,
-    MultilingualSupportTool,
-    ConsultArabicDoctorTool,
-    ConsultArabicAIResearcherTool,
-    ConsultGeneralExpertTool
-)
+import threading
+from nodes import get_base_model, BasicToolNode, tool_call_sends, language_router, language_guidance, domain_router, route_domain, context_manager
+from tools import tool_registry
+from utils.component_timings import timed
+from utils.instrumentation import traced, record_error, instrument_checkpointer
 
 # For developers - log files
 # =======================================================
@@ -44,6 +38,11 @@ logger = logging.getLogger(__name__)
 # State class
 class State(TypedDict):
     messages: Annotated[list, add_messages]
+    # Language of the session ("ar" or "en"), set by the language router before each turn
+    language: NotRequired[str]
+    # Rolling summary of the older turns and the number of messages it covers, kept by the context manager
+    summary: NotRequired[str]
+    summarized_count: NotRequired[int]
 
 # System message configuration
 today = datetime.datetime.now().date().strftime("%d-%b-%Y")
@@ -53,18 +52,13 @@ You are a helpful and efficient AI assistant with multilingual capabilities (Ara
 ### Response Guidelines
 - **Be Brief:** Keep your answers short and to the point.
 - **Be Factual:** Prioritize accuracy and verifiable information in all responses.
-- **Language Detection:** Automatically detect if the user is communicating in Arabic or English and respond accordingly.
+- **Language:** The user's language is detected before each turn and given at the end of these instructions; respond in it.
 - **Cultural Sensitivity:** Be respectful of cultural contexts when responding in Arabic.
 
 ---
 ## IMPORTANT: Tool Usage Protocol
 
-**STEP 1: ALWAYS use MultilingualSupportTool FIRST** for every user input to:
-- Detect the user's language (Arabic or English)
-- Get proper response guidance for that language
-- Ensure consistent language throughout the conversation
-
-**STEP 2: Choose the appropriate expert tool based on the question type:**
+**Choose the appropriate expert tool based on the question type:**
 
 ### Medical & Health Questions → ConsultArabicDoctorTool
 Use this tool for ALL medical and health-related questions in ANY language:
@@ -108,12 +102,6 @@ Use this as a last resort when:
 ---
 ## Available Tools
 
-### MultilingualSupportTool
-**ALWAYS USE THIS FIRST** - Detects user language and provides response guidance:
-1. **Language Detection:** Automatically detects Arabic or English input
-2. **Response Guidance:** Provides instructions for culturally appropriate responses
-3. **Consistency:** Ensures all subsequent responses match the user's language
-
 ### ConsultArabicDoctorTool  
 Provides medical expertise in user's preferred language:
 - Handles medical terminology in both Arabic and English
@@ -162,34 +150,42 @@ If a required tool fails to execute for any reason (e.g., missing API key, netwo
 """
 
 # Initialize the chatbot
+@traced("node", "chatbot")
 def chatbot(state: State):
     """Main chatbot node that processes messages using the LLM."""
     try:
         messages = state["messages"]
+        # The language guidance comes from the language router instead of a tool call
+        guidance = language_guidance(state.get("language"))
         
-        # Add system message ONLY if the message list is completely empty
-        # This preserves conversation history while ensuring system message exists
-        if not messages:
-            system_msg = SystemMessage(content=system_message)
-            messages = [system_msg]
-        elif not isinstance(messages[0], SystemMessage):
-            # If there are messages but no system message at the start, add it
-            system_msg = SystemMessage(content=system_message)
-            messages = [system_msg] + messages
+        # Threads started before the prompt moved out of the history keep their own system message
+        prompt = messages[0].content if messages and isinstance(messages[0], SystemMessage) else system_message
+        # Recent turns verbatim, older ones through the rolling summary, within the token budget
+        summary, history = context_manager.build(state)
+        if summary:
+            guidance += f"\n## Conversation summary so far\n{summary}\n"
+        messages = [SystemMessage(content=prompt + guidance)] + history
         
-        response = base_model.invoke(messages)
+        response = get_base_model().invoke(messages)
         return {"messages": [response]}
     except Exception as e:
         logger.exception("An error occurred during LLM model invocation")
+        record_error(e)
         
         # Return a user-friendly error message as proper LangChain message
         error_response = AIMessage(content="I apologize, but I encountered an error.")
         return {"messages": [error_response]}
 
+@traced("node", "summarize")
+def summarize(state: State):
+    """Extend the conversation summary after the final answer; stored in the checkpoint with it."""
+    return context_manager.summarize_state(state)
+
 def route_tools(state: State):
     """
     Use in the conditional_edge to route to the ToolNode if the last message
-    has tool calls. Otherwise, route to the end.
+    has tool calls, one task per call. Otherwise, route to the summarize node
+    when the older turns are due for a summary, or to the end.
     """
     if isinstance(state, list):
         ai_message = state[-1]
@@ -198,37 +194,78 @@ def route_tools(state: State):
     else:
         raise ValueError(f"No messages found in input state to tool_edge: {state}")
     if hasattr(ai_message, "tool_calls") and len(ai_message.tool_calls) > 0:
-        return "tools"
+        return tool_call_sends(ai_message)
+    if isinstance(state, dict) and context_manager.summary_due(state):
+        return "summarize"
     return END
 
-# Create tool node using tools from LLM model
-tool_node = BasicToolNode(
-    tools=[
-        WebSearchTool,
-        HumanAssistanceTool,
-        ConsultDoctorTool,
-        ConsultAIResearcherTool,
-        MultilingualSupportTool,
-        ConsultArabicDoctorTool,
-        ConsultArabicAIResearcherTool,
-        ConsultGeneralExpertTool
-    ])
-
-# Build the graph
-graph_builder = StateGraph(State)
-graph_builder.add_node("chatbot", chatbot)
-graph_builder.add_node("tools", tool_node)
-graph_builder.add_edge(START, "chatbot")
-graph_builder.add_conditional_edges(
-    "chatbot",
-    route_tools,
-    # The following dictionary lets you tell the graph to 
-    # interpret the condition's outputs as a specific node
-    # It defaults to the identity function, but if you
-    # want to use a node named something else apart from "tools",
-    # You can update the value of the dictionary to something else
-    # e.g., "tools": "my_tools"
-    {"tools": "tools", END: END},
-)
-graph_builder.add_edge("tools", "chatbot")
-graph = graph_builder.compile(checkpointer=memory_saver)
\ No newline at end of file
+def build_graph_builder():
+    """Create the graph builder with the enabled tools (imports the tools and their agents)."""
+    # Create tool node using tools from LLM model
+    tool_node = BasicToolNode(tools=tool_registry.enabled_tools())
+
+    # Build the graph
+    graph_builder = StateGraph(State)
+    graph_builder.add_node("language_router", language_router)
+    graph_builder.add_node("domain_router", domain_router)
+    graph_builder.add_node("chatbot", chatbot)
+    graph_builder.add_node("summarize", summarize)
+    # Sync runs use the node's thread pool, async runs (the API) its asyncio version
+    graph_builder.add_node("tools", RunnableLambda(tool_node, afunc=tool_node.acall, name="tools"))
+    graph_builder.add_edge(START, "language_router")
+    graph_builder.add_edge("language_router", "domain_router")
+    # Clearly medical or AI questions go straight to the expert tool, skipping one model call
+    graph_builder.add_conditional_edges("domain_router", route_domain, {"tools": "tools", "chatbot": "chatbot"})
+    graph_builder.add_conditional_edges(
+        "chatbot",
+        route_tools,
+        # The following dictionary lets you tell the graph to 
+        # interpret the condition's outputs as a specific node
+        # It defaults to the identity function, but if you
+        # want to use a node named something else apart from "tools",
+        # You can update the value of the dictionary to something else
+        # e.g., "tools": "my_tools"
+        {"tools": "tools", "summarize": "summarize", END: END},
+    )
+    graph_builder.add_edge("tools", "chatbot")
+    graph_builder.add_edge("summarize", END)
+    return graph_builder
+
+
+# The graph is built on first use rather than at import, so importing this module stays cheap
+_graph_builder = None
+_graph = None
+_lock = threading.Lock()
+
+
+def get_graph_builder():
+    global _graph_builder
+    with _lock:
+        if _graph_builder is None:
+            with timed("graph_builder"):
+                _graph_builder = build_graph_builder()
+        return _graph_builder
+
+
+def get_graph():
+    """Return the graph compiled with the default checkpointer, building it on first use."""
+    global _graph
+    if _graph is None:
+        builder = get_graph_builder()
+        from models import get_checkpointer
+        checkpointer = get_checkpointer()
+        with _lock:
+            if _graph is None:
+                with timed("graph"):
+                    # Checkpointer reads and writes show up in the request traces
+                    _graph = builder.compile(checkpointer=instrument_checkpointer(checkpointer))
+    return _graph
+
+
+def __getattr__(name):
+    # `from StateGraph import graph` keeps working and builds the graph on first access
+    if name == "graph":
+        return get_graph()
+    if name == "graph_builder":
+        return get_graph_builder()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
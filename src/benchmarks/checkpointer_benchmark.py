@@ -0,0 +1,348 @@
+"""
+Checkpointer Benchmark
+Drives put / get_tuple / list of the checkpointers with synthetic conversations
+and reports per-operation p50/p99 latency, rows and bytes written per turn and
+turn throughput, for every combination of conversation length, number of
+threads and concurrency.
+
+PostgreSQL runs happen in a throwaway schema that is dropped afterwards, so the
+benchmark can point at any local Postgres (never at production). One "turn"
+reads the latest checkpoint of a thread, writes the next checkpoint with two
+more messages and lists the thread's ten newest checkpoints, like a chat turn
+followed by a history view.
+
+Usage:
+    python checkpointer_benchmark.py [--backends postgres postgres-log sqlite memory]
+                                     [--messages 1 20 100 500] [--threads 1 100 1000 10000]
+                                     [--concurrency 1 8] [--turns 200] [--json] [--output FILE]
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import shutil
+import sqlite3
+import argparse
+import platform
+import tempfile
+import subprocess
+from datetime import datetime, timezone
+from contextlib import closing, redirect_stdout
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the src directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import psycopg
+from psycopg.conninfo import make_conninfo
+from langchain_core.messages import HumanMessage, AIMessage
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.checkpoint.base.id import uuid6
+
+# Importing the models creates the app's checkpointer, which reports on stdout; keep stdout for --json
+with redirect_stdout(sys.stderr):
+    from models.connect_database import SimplePostgresCheckpointer
+    from models.sqlite_checkpointer import SqliteCheckpointer
+
+# Load environment variables from .env file if it exists
+try:
+    from dotenv import load_dotenv
+    load_dotenv()
+except ImportError:
+    pass  # dotenv not available, continue without it
+
+BENCHMARK_DATABASE_URL = os.getenv("BENCHMARK_DATABASE_URL", os.getenv("DATABASE_URL"))
+
+BACKENDS = ("postgres", "postgres-log", "sqlite", "memory")
+
+
+def conversation(message_count):
+    """Synthetic chat messages, alternating patient questions and assistant answers."""
+    messages = []
+    for i in range(message_count):
+        if i % 2 == 0:
+            messages.append(HumanMessage(content=f"I have had a headache and mild fever for {i} days. What should I do?",
+                                         id=str(uuid.uuid4())))
+        else:
+            messages.append(AIMessage(content="Based on the expert's assessment, you should rest and stay hydrated. " * 4,
+                                      id=str(uuid.uuid4())))
+    return messages
+
+
+def checkpoint_for(messages, step):
+    """Build a checkpoint shaped like the chatbot's."""
+    return {
+        "v": 4,
+        "id": str(uuid6()),
+        "ts": datetime.now(timezone.utc).isoformat(),
+        "channel_values": {"messages": messages},
+        "channel_versions": {"__start__": step + 1, "messages": step + 1, "chatbot": step},
+        "versions_seen": {"chatbot": {"messages": step}},
+    }
+
+
+def percentile(samples, q):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 3)
+
+
+class PostgresTarget:
+    """SimplePostgresCheckpointer in a throwaway schema."""
+
+    tables = ("checkpoints", "checkpoint_messages", "checkpoint_writes")
+
+    def __init__(self, db_url, storage_mode):
+        self.db_url = db_url
+        self.schema = f"checkpoint_bench_{uuid.uuid4().hex[:12]}"
+        with psycopg.connect(db_url, autocommit=True) as conn:
+            conn.execute(f"CREATE SCHEMA {self.schema}")
+        self.conninfo = make_conninfo(db_url, options=f"-c search_path={self.schema}")
+        self.checkpointer = SimplePostgresCheckpointer(self.conninfo, max_size=32, storage_mode=storage_mode,
+                                                       cache_size=0)
+
+    def usage(self):
+        """Return (rows, bytes) stored in the benchmark schema."""
+        with psycopg.connect(self.conninfo, autocommit=True) as conn:
+            rows = sum(conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] for table in self.tables)
+            size = sum(conn.execute("SELECT pg_total_relation_size(%s)", (table,)).fetchone()[0]
+                       for table in self.tables)
+        return rows, size
+
+    def wal_position(self):
+        with psycopg.connect(self.conninfo, autocommit=True) as conn:
+            return conn.execute("SELECT pg_current_wal_lsn()").fetchone()[0]
+
+    def wal_bytes(self, since):
+        with psycopg.connect(self.conninfo, autocommit=True) as conn:
+            return int(conn.execute("SELECT pg_wal_lsn_diff(pg_current_wal_lsn(), %s)", (since,)).fetchone()[0])
+
+    def close(self):
+        self.checkpointer.close()
+        with psycopg.connect(self.db_url, autocommit=True) as conn:
+            conn.execute(f"DROP SCHEMA {self.schema} CASCADE")
+
+
+class SqliteTarget:
+    """SqliteCheckpointer in a temporary directory."""
+
+    def __init__(self):
+        self.directory = tempfile.mkdtemp(prefix="checkpoint_bench_")
+        self.path = os.path.join(self.directory, "checkpoints.db")
+        self.checkpointer = SqliteCheckpointer(self.path)
+
+    def usage(self):
+        with closing(sqlite3.connect(self.path)) as conn:
+            rows = sum(conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                       for table in ("checkpoints", "checkpoint_writes"))
+        size = sum(os.path.getsize(self.path + suffix) for suffix in ("", "-wal") if os.path.exists(self.path + suffix))
+        return rows, size
+
+    def wal_position(self):
+        return None
+
+    def wal_bytes(self, since):
+        return None
+
+    def close(self):
+        self.checkpointer.close()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+class MemoryTarget:
+    """LangGraph's in-memory saver, as the lower bound."""
+
+    def __init__(self):
+        self.checkpointer = MemorySaver()
+
+    def usage(self):
+        saver = self.checkpointer
+        rows = len(saver.blobs) + sum(len(checkpoints) for namespaces in saver.storage.values()
+                                      for checkpoints in namespaces.values())
+        size = sum(len(blob) for _, blob in saver.blobs.values())
+        size += sum(len(saved[0][1]) + len(saved[1][1]) for namespaces in saver.storage.values()
+                    for checkpoints in namespaces.values() for saved in checkpoints.values())
+        return rows, size
+
+    def wal_position(self):
+        return None
+
+    def wal_bytes(self, since):
+        return None
+
+    def close(self):
+        pass
+
+
+def make_target(backend, db_url):
+    if backend in ("postgres", "postgres-log"):
+        if not db_url:
+            raise ValueError("Set BENCHMARK_DATABASE_URL (or --db-url) to a local throwaway PostgreSQL")
+        return PostgresTarget(db_url, "message_log" if backend == "postgres-log" else "full")
+    if backend == "sqlite":
+        return SqliteTarget()
+    return MemoryTarget()
+
+
+def thread_config(thread_id, checkpoint_id=None):
+    configurable = {"thread_id": thread_id, "checkpoint_ns": ""}
+    if checkpoint_id:
+        configurable["checkpoint_id"] = checkpoint_id
+    return {"configurable": configurable}
+
+
+def put(checkpointer, config, messages, step):
+    checkpoint = checkpoint_for(messages, step)
+    return checkpointer.put(config, checkpoint, {"source": "loop", "step": step},
+                            {"messages": checkpoint["channel_versions"]["messages"]})
+
+
+def populate(checkpointer, thread_ids, message_count):
+    """Give every thread one checkpoint holding a conversation of `message_count` messages.
+
+    Returns:
+        dict: thread_id -> (messages, step, latest config)
+    """
+    state = {}
+    for thread_id in thread_ids:
+        messages = conversation(message_count)
+        state[thread_id] = (messages, 1, put(checkpointer, thread_config(thread_id), messages, 1))
+    return state
+
+
+def run_scenario(backend, db_url, message_count, thread_count, concurrency, turns):
+    target = make_target(backend, db_url)
+    try:
+        checkpointer = target.checkpointer
+        thread_ids = [f"bench-{i}" for i in range(thread_count)]
+        state = populate(checkpointer, thread_ids, message_count)
+
+        rows_before, bytes_before = target.usage()
+        wal_start = target.wal_position()
+        timings = {"put": [], "get_tuple": [], "list": []}
+
+        def turn(thread_id):
+            messages, step, config = state[thread_id]
+
+            start = time.perf_counter()
+            checkpointer.get_tuple(thread_config(thread_id))
+            timings["get_tuple"].append((time.perf_counter() - start) * 1000)
+
+            messages = messages + conversation(2)
+            start = time.perf_counter()
+            config = put(checkpointer, thread_config(thread_id, config["configurable"]["checkpoint_id"]),
+                         messages, step + 1)
+            timings["put"].append((time.perf_counter() - start) * 1000)
+            state[thread_id] = (messages, step + 1, config)
+
+            start = time.perf_counter()
+            list(checkpointer.list(thread_config(thread_id), limit=10))
+            timings["list"].append((time.perf_counter() - start) * 1000)
+
+        # Turns of one thread must not overlap, so each worker owns a slice of the threads
+        workers = min(concurrency, thread_count)
+
+        def worker(index):
+            own_threads = thread_ids[index::workers]
+            for i in range(len(range(index, turns, workers))):
+                turn(own_threads[i % len(own_threads)])
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(worker, range(workers)))
+        elapsed = time.perf_counter() - started
+
+        rows_after, bytes_after = target.usage()
+        wal_bytes = target.wal_bytes(wal_start) if wal_start is not None else None
+
+        result = {
+            "backend": backend,
+            "messages": message_count,
+            "threads": thread_count,
+            "concurrency": workers,
+            "turns": turns,
+            "turns_per_s": round(turns / elapsed, 1),
+            "rows_per_turn": round((rows_after - rows_before) / turns, 2),
+            "bytes_per_turn": round((bytes_after - bytes_before) / turns),
+            "wal_bytes_per_turn": round(wal_bytes / turns) if wal_bytes is not None else None,
+        }
+        for operation, samples in timings.items():
+            result[f"{operation}_p50_ms"] = percentile(samples, 0.50)
+            result[f"{operation}_p99_ms"] = percentile(samples, 0.99)
+        return result
+    finally:
+        target.close()
+
+
+def run_benchmark(backends, message_counts, thread_counts, concurrencies, turns, db_url):
+    results = []
+    for backend in backends:
+        for message_count in message_counts:
+            for thread_count in thread_counts:
+                # Concurrency is capped at the thread count, so skip the combinations that would repeat
+                for concurrency in sorted({min(concurrency, thread_count) for concurrency in concurrencies}):
+                    results.append(run_scenario(backend, db_url, message_count, thread_count, concurrency, turns))
+    return results
+
+
+def environment():
+    """Describe the run, so results of different commits can be told apart."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Checkpointer benchmark")
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument("--messages", type=int, nargs="+", default=[1, 20, 100, 500])
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 100, 1000])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8])
+    parser.add_argument("--turns", type=int, default=200, help="Measured turns per scenario")
+    parser.add_argument("--db-url", default=BENCHMARK_DATABASE_URL, help="Local PostgreSQL used for a throwaway schema")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable JSON")
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    backends = args.backends
+    if not args.db_url:
+        backends = [backend for backend in backends if not backend.startswith("postgres")]
+        print("⚠️ No PostgreSQL URL configured, skipping the postgres backends", file=sys.stderr)
+
+    results = run_benchmark(backends, args.messages, args.threads, args.concurrency, args.turns, args.db_url)
+    report = {"environment": environment(), "results": results}
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print("🗄️ Checkpointer Benchmark")
+    print("-" * 124)
+    print(f"{'backend':<14}{'msgs':>6}{'threads':>9}{'conc':>6}{'turns/s':>10}"
+          f"{'put p50/p99 ms':>18}{'get p50/p99 ms':>18}{'list p50/p99 ms':>18}{'rows/turn':>11}{'bytes/turn':>12}")
+    for row in results:
+        print(f"{row['backend']:<14}{row['messages']:>6}{row['threads']:>9}{row['concurrency']:>6}"
+              f"{row['turns_per_s']:>10}"
+              f"{row['put_p50_ms']:>9}/{row['put_p99_ms']:<8}"
+              f"{row['get_tuple_p50_ms']:>9}/{row['get_tuple_p99_ms']:<8}"
+              f"{row['list_p50_ms']:>9}/{row['list_p99_ms']:<8}"
+              f"{row['rows_per_turn']:>11}{row['bytes_per_turn']:>12}")
+
+
+if __name__ == "__main__":
+    main()
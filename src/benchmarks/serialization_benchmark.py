@@ -0,0 +1,118 @@
+"""
+Checkpoint Serialization Benchmark
+Compares encode/decode time and stored bytes per checkpoint for the checkpoint
+serializer formats, using synthetic conversations of growing length.
+
+Usage:
+    python serialization_benchmark.py [--messages 2 20 200] [--repeat 200] [--json]
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import argparse
+import statistics
+
+# Add the src directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.messages import HumanMessage, AIMessage, ToolMessage
+from models.serializers import CheckpointSerializer, json_dumps
+
+SERIALIZERS = [
+    CheckpointSerializer(format="json"),
+    CheckpointSerializer(format="msgpack"),
+    CheckpointSerializer(format="msgpack", compression="zstd"),
+]
+
+
+def synthetic_checkpoint(message_count):
+    """Build a checkpoint shaped like the chatbot's, with `message_count` messages."""
+    messages = []
+    for i in range(message_count):
+        if i % 3 == 0:
+            messages.append(HumanMessage(content=f"I have had a headache and mild fever for {i} days. What should I do?",
+                                         id=str(uuid.uuid4())))
+        elif i % 3 == 1:
+            messages.append(ToolMessage(content=json.dumps("Doctor's assessment: rest, fluids and paracetamol. " * 8),
+                                        name="ConsultArabicDoctorTool", tool_call_id=str(uuid.uuid4()),
+                                        id=str(uuid.uuid4())))
+        else:
+            messages.append(AIMessage(content="Based on the expert's assessment, you should rest and stay hydrated. " * 4,
+                                      id=str(uuid.uuid4())))
+    return {
+        "v": 4,
+        "id": str(uuid.uuid4()),
+        "ts": "2025-08-25T10:30:00+00:00",
+        "channel_values": {"messages": messages},
+        "channel_versions": {"__start__": 2, "messages": message_count + 1, "chatbot": message_count},
+        "versions_seen": {"chatbot": {"messages": message_count}, "tools": {"chatbot": message_count}},
+    }
+
+
+def encoded_size(serializer, checkpoint):
+    json_value, _, blob = serializer.encode(checkpoint)
+    if json_value is not None:
+        return len(json_dumps(json_value).encode())
+    return len(blob)
+
+
+def time_call(fn, repeat):
+    """Return the median wall time of `fn` in microseconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1e6)
+    return statistics.median(samples)
+
+
+def run_benchmark(message_counts, repeat):
+    results = []
+    for count in message_counts:
+        checkpoint = synthetic_checkpoint(count)
+        for serializer in SERIALIZERS:
+            if serializer.format == "json":
+                # JSONB text is produced and parsed by json on both sides of the driver
+                text = json_dumps(checkpoint)
+                encode = lambda: json_dumps(checkpoint)
+                decode = lambda: json.loads(text)
+            else:
+                _, checkpoint_type, blob = serializer.encode(checkpoint)
+                encode = lambda: serializer.encode(checkpoint)
+                decode = lambda: serializer.decode(checkpoint_type, blob, None)
+            results.append({
+                "serializer": serializer.name,
+                "messages": count,
+                "bytes": encoded_size(serializer, checkpoint),
+                "encode_us": round(time_call(encode, repeat), 1),
+                "decode_us": round(time_call(decode, repeat), 1),
+            })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Checkpoint serialization benchmark")
+    parser.add_argument("--messages", type=int, nargs="+", default=[2, 20, 200])
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--json", action="store_true", help="Print machine-readable JSON")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.messages, args.repeat)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print("📦 Checkpoint Serialization Benchmark")
+    print("-" * 72)
+    print(f"{'serializer':<14}{'messages':>10}{'bytes':>12}{'encode µs':>14}{'decode µs':>14}")
+    for row in results:
+        print(f"{row['serializer']:<14}{row['messages']:>10}{row['bytes']:>12}"
+              f"{row['encode_us']:>14}{row['decode_us']:>14}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1 +1,8 @@
-from .connect_database import memory_saver
\ No newline at end of file
+from .connect_database import get_checkpointer
+
+
+def __getattr__(name):
+    # `from models import memory_saver` creates the checkpointer on first access
+    if name == "memory_saver":
+        return get_checkpointer()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
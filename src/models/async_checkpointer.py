@@ -0,0 +1,247 @@
+"""
+Async PostgreSQL checkpointer for the FastAPI path.
+
+Uses psycopg 3 async connections from an AsyncConnectionPool, so
+``graph.ainvoke`` / ``graph.astream`` never block the event loop on the
+database. The synchronous SimplePostgresCheckpointer stays in use for the CLI.
+"""
+
+import os
+import asyncio
+from psycopg.types.json import Jsonb
+from psycopg_pool import AsyncConnectionPool
+from langgraph.checkpoint.base import CheckpointTuple
+
+try:
+    from .checkpoint_sql import (UPSERT_CHECKPOINT, SELECT_LATEST_CHECKPOINT, SELECT_CHECKPOINT_BY_ID,
+                                 SELECT_CHECKPOINT_WRITES, select_checkpoints, checkpoint_id_for, checkpoint_config,
+                                 checkpoint_write_rows, group_pending_writes)
+    from .serializers import CheckpointSerializer, json_dumps, load_json
+    from .message_log import MESSAGE_LOG_REF, aappend_messages, aresolve_checkpoint, can_log_messages
+    from .migrations import run_migrations
+    from .message_search import CHECKPOINT_SEARCH_INDEX, aindex_messages, messages_to_index
+    from .thread_summary import UPSERT_THREAD, thread_params
+    from .sqlite_checkpointer import SQLITE_URL_PREFIX
+    from .checkpoint_cache import CACHE_CHANNEL, NOTIFY_CHECKPOINT_WRITE, CHECKPOINT_CACHE_SIZE, invalidation_payload
+    from .connect_database import (DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE, DB_POOL_MAX_IDLE, DB_POOL_TIMEOUT,
+                                   CHECKPOINT_STORAGE_MODE, STORAGE_MODES)
+except ImportError:
+    from checkpoint_sql import (UPSERT_CHECKPOINT, SELECT_LATEST_CHECKPOINT, SELECT_CHECKPOINT_BY_ID,
+                                SELECT_CHECKPOINT_WRITES, select_checkpoints, checkpoint_id_for, checkpoint_config,
+                                checkpoint_write_rows, group_pending_writes)
+    from serializers import CheckpointSerializer, json_dumps, load_json
+    from message_log import MESSAGE_LOG_REF, aappend_messages, aresolve_checkpoint, can_log_messages
+    from migrations import run_migrations
+    from message_search import CHECKPOINT_SEARCH_INDEX, aindex_messages, messages_to_index
+    from thread_summary import UPSERT_THREAD, thread_params
+    from sqlite_checkpointer import SQLITE_URL_PREFIX
+    from checkpoint_cache import CACHE_CHANNEL, NOTIFY_CHECKPOINT_WRITE, CHECKPOINT_CACHE_SIZE, invalidation_payload
+    from connect_database import (DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE, DB_POOL_MAX_IDLE, DB_POOL_TIMEOUT,
+                                  CHECKPOINT_STORAGE_MODE, STORAGE_MODES)
+
+# Load environment variables
+DB_URL = os.getenv("DATABASE_URL")
+
+
+class AsyncSimplePostgresCheckpointer:
+    """Async PostgreSQL checkpointer sharing the schema of SimplePostgresCheckpointer."""
+
+    def __init__(self, db_url, min_size=DB_POOL_MIN_SIZE, max_size=DB_POOL_MAX_SIZE,
+                 max_idle=DB_POOL_MAX_IDLE, timeout=DB_POOL_TIMEOUT,
+                 storage_mode=CHECKPOINT_STORAGE_MODE, serializer=None):
+        if storage_mode not in STORAGE_MODES:
+            raise ValueError(f"Unknown checkpoint storage mode: {storage_mode}")
+        self.db_url = db_url
+        self.storage_mode = storage_mode
+        self.serializer = serializer or CheckpointSerializer()
+        self.pool = AsyncConnectionPool(
+            db_url,
+            min_size=min_size,
+            max_size=max_size,
+            max_idle=max_idle,
+            timeout=timeout,
+            name="async_checkpointer",
+            open=False,
+        )
+        self.loop = None
+
+    async def setup(self):
+        """Open the pool and migrate the schema. Must run inside the serving event loop."""
+        self.loop = asyncio.get_running_loop()
+        await asyncio.to_thread(run_migrations, self.db_url)
+        await self.pool.open(wait=True, timeout=self.pool.timeout)
+
+    async def aclose(self):
+        """Close the connection pool."""
+        await self.pool.close()
+
+    def pool_stats(self):
+        """Return connection pool statistics for sizing the pool."""
+        stats = self.pool.get_stats()
+        stats["connections_in_use"] = stats.get("pool_size", 0) - stats.get("pool_available", 0)
+        return stats
+
+    def get_next_version(self, current, channel):
+        return (current or 0) + 1
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        thread_id = config['configurable']['thread_id']
+        checkpoint_id = checkpoint_id_for(checkpoint)
+        parent_checkpoint_id = config['configurable'].get('checkpoint_id')
+
+        async with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            messages = (checkpoint.get('channel_values') or {}).get('messages')
+            messages_from, new_messages = None, None
+            if self.storage_mode == "message_log":
+                checkpoint, messages_from, new_messages = await self._checkpoint_with_message_ref(
+                    cursor, thread_id, checkpoint)
+            if CHECKPOINT_SEARCH_INDEX:
+                await aindex_messages(cursor, thread_id, '', messages_to_index(messages, new_messages))
+            await cursor.execute(UPSERT_THREAD, thread_params(thread_id, '', checkpoint_id, messages))
+            json_value, checkpoint_type, blob = self.serializer.encode(checkpoint)
+            await cursor.execute(UPSERT_CHECKPOINT, (
+                thread_id, '', checkpoint_id, parent_checkpoint_id,
+                Jsonb(json_value, dumps=json_dumps) if json_value is not None else None,
+                checkpoint_type, blob, Jsonb(metadata, dumps=json_dumps), messages_from
+            ))
+            if CHECKPOINT_CACHE_SIZE > 0:
+                # Evict the thread from the sync checkpointers' caches (see checkpoint_cache.py)
+                await cursor.execute(NOTIFY_CHECKPOINT_WRITE, (CACHE_CHANNEL, invalidation_payload(thread_id)))
+
+        return checkpoint_config(thread_id, checkpoint_id)
+
+    async def _checkpoint_with_message_ref(self, cursor, thread_id, checkpoint):
+        """Move the messages into the append-only log and keep only a reference in the checkpoint.
+        
+        Returns:
+            tuple: (checkpoint to store, first log sequence number it references or None,
+                    newly logged messages or None)
+        """
+        channel_values = checkpoint.get('channel_values') or {}
+        messages = channel_values.get('messages')
+        if not can_log_messages(messages):
+            return checkpoint, None, None
+
+        ref, new_messages = await aappend_messages(cursor, thread_id, '', messages)
+        checkpoint = {**checkpoint, 'channel_values': {**channel_values, 'messages': ref}}
+        return checkpoint, ref[MESSAGE_LOG_REF]["from"], new_messages
+
+    async def aget_tuple(self, config):
+        """Retrieve a checkpoint for a thread, the latest one unless the config names a checkpoint_id."""
+        thread_id = config['configurable']['thread_id']
+        checkpoint_id = config['configurable'].get('checkpoint_id')
+
+        async with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            if checkpoint_id:
+                await cursor.execute(SELECT_CHECKPOINT_BY_ID, (thread_id, '', checkpoint_id))
+            else:
+                await cursor.execute(SELECT_LATEST_CHECKPOINT, (thread_id, ''))
+
+            result = await cursor.fetchone()
+            if result:
+                pending = await self._pending_writes(cursor, thread_id, [result[0]])
+                return await self._row_to_tuple(cursor, thread_id, result, pending)
+            return None
+
+    async def alist(self, config, **kwargs):
+        """List checkpoints for a thread, newest first."""
+        thread_id = config['configurable']['thread_id']
+        before = kwargs.get('before')
+        before_id = before['configurable'].get('checkpoint_id') if before else None
+
+        async with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            await cursor.execute(*select_checkpoints(thread_id, '', before_id, kwargs.get('limit')))
+            rows = await cursor.fetchall()
+
+            pending = await self._pending_writes(cursor, thread_id, [row[0] for row in rows])
+            for row in rows:
+                yield await self._row_to_tuple(cursor, thread_id, row, pending)
+
+    async def _pending_writes(self, cursor, thread_id, checkpoint_ids):
+        """Load the stored writes of the given checkpoints.
+
+        Returns:
+            dict: {checkpoint_id: [(task_id, channel, value), ...]}
+        """
+        await cursor.execute(SELECT_CHECKPOINT_WRITES, (thread_id, '', checkpoint_ids))
+        return group_pending_writes(await cursor.fetchall(), self.serializer)
+
+    async def _row_to_tuple(self, cursor, thread_id, row, pending):
+        """Build a CheckpointTuple from a checkpoints row."""
+        checkpoint_id, parent_checkpoint_id, checkpoint_type, checkpoint_blob, checkpoint_data, metadata = row
+        checkpoint = self.serializer.decode(checkpoint_type, checkpoint_blob, checkpoint_data)
+
+        # Rebuild the messages from the append-only log if the row references it
+        checkpoint = await aresolve_checkpoint(cursor, thread_id, '', checkpoint)
+
+        return CheckpointTuple(
+            config=checkpoint_config(thread_id, checkpoint_id),
+            checkpoint=checkpoint,
+            metadata=load_json(metadata),
+            parent_config=checkpoint_config(thread_id, parent_checkpoint_id),
+            pending_writes=pending.get(checkpoint_id, [])
+        )
+
+    async def aput_writes(self, config, writes, task_id, task_path=""):
+        """Store the writes of a finished task, so resuming the step does not run it again."""
+        thread_id = config['configurable']['thread_id']
+        query, rows = checkpoint_write_rows(config, writes, task_id, task_path, self.serializer)
+
+        async with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            await cursor.executemany(query, rows)
+            if CHECKPOINT_CACHE_SIZE > 0:
+                await cursor.execute(NOTIFY_CHECKPOINT_WRITE, (CACHE_CHANNEL, invalidation_payload(thread_id)))
+
+    # Sync interface, for callers such as graph.get_state() running outside the event loop
+
+    def _run_sync(self, coro):
+        if self.loop is None:
+            raise RuntimeError("AsyncSimplePostgresCheckpointer.setup() has not been awaited")
+        try:
+            if asyncio.get_running_loop() is self.loop:
+                coro.close()
+                raise asyncio.InvalidStateError(
+                    "Synchronous calls to AsyncSimplePostgresCheckpointer are only allowed from a "
+                    "different thread. From the main thread, use the async interface."
+                )
+        except RuntimeError:
+            pass
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        return self._run_sync(self.aput(config, checkpoint, metadata, new_versions))
+
+    def get_tuple(self, config):
+        return self._run_sync(self.aget_tuple(config))
+
+    def list(self, config, **kwargs):
+        async def collect():
+            return [item async for item in self.alist(config, **kwargs)]
+        return self._run_sync(collect())
+
+    def put_writes(self, config, writes, task_id, task_path=""):
+        return self._run_sync(self.aput_writes(config, writes, task_id, task_path))
+
+
+async def create_async_checkpointer():
+    """Create an async PostgreSQL checkpointer, or return None if DATABASE_URL is not usable."""
+    if not DB_URL:
+        print("Warning: DATABASE_URL not set, async checkpointer not created")
+        return None
+    if DB_URL.startswith(SQLITE_URL_PREFIX):
+        # The SQLite checkpointer implements the async interface itself
+        return None
+
+    checkpointer = AsyncSimplePostgresCheckpointer(DB_URL)
+    try:
+        await checkpointer.setup()
+        print("✓ Async PostgreSQL checkpointer created successfully!")
+        return checkpointer
+    except Exception as e:
+        print(f"Error creating async PostgreSQL checkpointer: {e}")
+        await checkpointer.aclose()
+        return None
@@ -0,0 +1,188 @@
+"""
+In-process cache of the latest checkpoint of each thread.
+
+Every turn of an active session starts by reading the latest checkpoint of the
+thread, which the same process usually wrote a moment earlier. The cache keeps
+those CheckpointTuples in a size- and TTL-bounded LRU, keyed by thread_id.
+
+With several workers (e.g. uvicorn --workers N) a thread can be written by a
+different process. Every checkpoint write therefore sends a Postgres
+NOTIFY on CACHE_CHANNEL inside the writing transaction, and each process runs a
+listener thread that evicts the thread from its own cache when another worker
+wrote it. If the listener loses its connection it clears the whole cache, since
+notifications may have been missed; the TTL bounds staleness in any case.
+"""
+
+import os
+import time
+import uuid
+import logging
+import threading
+from collections import OrderedDict
+import psycopg
+
+try:
+    from .checkpoint_sql import merge_pending_writes
+except ImportError:
+    from checkpoint_sql import merge_pending_writes
+
+# Load environment variables
+CHECKPOINT_CACHE_SIZE = int(os.getenv("CHECKPOINT_CACHE_SIZE", "1000"))
+CHECKPOINT_CACHE_TTL = float(os.getenv("CHECKPOINT_CACHE_TTL", "300"))
+
+CACHE_CHANNEL = "checkpoint_cache"
+NOTIFY_CHECKPOINT_WRITE = "SELECT pg_notify(%s, %s)"
+
+logger = logging.getLogger(__name__)
+
+_worker = (None, None)
+
+
+def worker_id():
+    """Id of this process in invalidation messages, so it can skip its own.
+
+    Derived per PID, so pre-forked workers never share the id of their parent.
+    """
+    global _worker
+    if _worker[0] != os.getpid():
+        _worker = (os.getpid(), uuid.uuid4().hex)
+    return _worker[1]
+
+
+def invalidation_payload(thread_id, sender=None):
+    """Build the NOTIFY payload announcing a write to `thread_id`."""
+    return f"{sender or worker_id()}:{thread_id}"
+
+
+class CheckpointCache:
+    """Thread-safe LRU of the latest CheckpointTuple per thread, with a TTL."""
+
+    def __init__(self, max_size=CHECKPOINT_CACHE_SIZE, ttl=CHECKPOINT_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()  # thread_id -> (expires_at, CheckpointTuple)
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, thread_id):
+        """Return the cached tuple of a thread, or None."""
+        with self._lock:
+            entry = self._entries.get(thread_id)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[thread_id]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(thread_id)
+            self.hits += 1
+            return entry[1]
+
+    def generation(self):
+        """Counter bumped by every invalidation; see fill()."""
+        return self._generation
+
+    def put(self, thread_id, saved):
+        """Store the tuple just written for a thread."""
+        with self._lock:
+            self._store(thread_id, saved)
+
+    def fill(self, thread_id, saved, generation):
+        """Store a tuple read from the database, unless the cache was invalidated during the read."""
+        with self._lock:
+            if generation != self._generation or thread_id in self._entries:
+                return
+            self._store(thread_id, saved)
+
+    def _store(self, thread_id, saved):
+        self._entries[thread_id] = (time.monotonic() + self.ttl, saved)
+        self._entries.move_to_end(thread_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def add_writes(self, thread_id, checkpoint_id, writes, task_id):
+        """Add a task's writes to the cached tuple, if it is the checkpoint they belong to."""
+        with self._lock:
+            entry = self._entries.get(thread_id)
+            if entry is None or entry[1].config['configurable']['checkpoint_id'] != checkpoint_id:
+                return
+            saved = entry[1]
+            pending_writes = merge_pending_writes(saved.pending_writes, writes, task_id)
+            self._entries[thread_id] = (entry[0], saved._replace(pending_writes=pending_writes))
+
+    def invalidate(self, thread_id):
+        with self._lock:
+            self._generation += 1
+            if self._entries.pop(thread_id, None) is not None:
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+
+    def stats(self):
+        """Return hit/miss counters and the current size."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+class CacheInvalidationListener:
+    """LISTENs on CACHE_CHANNEL and evicts threads written by other workers."""
+
+    def __init__(self, db_url, cache, reconnect_delay=1.0):
+        self.db_url = db_url
+        self.cache = cache
+        self.reconnect_delay = reconnect_delay
+        self._thread = None
+        self._pid = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def ensure_running(self):
+        """Start the listener in this process if it is not running (also after a fork)."""
+        if self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._listen, name="checkpoint-cache-listener", daemon=True)
+            self._pid = os.getpid()
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._pid == os.getpid() and self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def _listen(self):
+        while not self._stop.is_set():
+            try:
+                with psycopg.connect(self.db_url, autocommit=True) as conn:
+                    conn.execute(f"LISTEN {CACHE_CHANNEL}")
+                    # Writes made while nobody was listening were not seen
+                    self.cache.clear()
+                    while not self._stop.is_set():
+                        for notify in conn.notifies(timeout=1.0):
+                            sender, _, thread_id = notify.payload.partition(":")
+                            if sender != worker_id():
+                                self.cache.invalidate(thread_id)
+            except Exception:
+                logger.warning("Checkpoint cache listener disconnected, clearing the cache", exc_info=True)
+                self.cache.clear()
+                self._stop.wait(self.reconnect_delay)
@@ -0,0 +1,165 @@
+"""
+SQL statements and row helpers shared by the sync and async PostgreSQL checkpointers.
+"""
+
+from langgraph.checkpoint.base import WRITES_IDX_MAP
+from langgraph.checkpoint.base.id import uuid6
+
+CREATE_CHECKPOINTS_TABLE = '''
+    CREATE TABLE IF NOT EXISTS checkpoints (
+        thread_id TEXT NOT NULL,
+        checkpoint_ns TEXT NOT NULL DEFAULT '',
+        checkpoint_id TEXT NOT NULL,
+        checkpoint JSONB NOT NULL,
+        metadata JSONB,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+    )
+'''
+
+UPSERT_CHECKPOINT = '''
+    INSERT INTO checkpoints (thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id,
+                             checkpoint, checkpoint_type, checkpoint_blob, metadata, messages_from)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+    ON CONFLICT (thread_id, checkpoint_ns, checkpoint_id) 
+    DO UPDATE SET checkpoint = EXCLUDED.checkpoint, checkpoint_type = EXCLUDED.checkpoint_type,
+                  checkpoint_blob = EXCLUDED.checkpoint_blob, metadata = EXCLUDED.metadata,
+                  messages_from = EXCLUDED.messages_from
+'''
+
+def upsert_checkpoints(row_count):
+    """Build a multi-row version of UPSERT_CHECKPOINT for `row_count` rows.
+
+    Rows are passed as one flat parameter list, row after row.
+    """
+    values = ", ".join(["(%s, %s, %s, %s, %s, %s, %s, %s, %s)"] * row_count)
+    return UPSERT_CHECKPOINT.replace("VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)", f"VALUES {values}")
+
+# Checkpoint ids are time-ordered, so the latest checkpoint is a backward
+# index scan on (thread_id, checkpoint_ns, checkpoint_id) that stops after one row
+SELECT_LATEST_CHECKPOINT = '''
+    SELECT checkpoint_id, parent_checkpoint_id, checkpoint_type, checkpoint_blob, checkpoint, metadata FROM checkpoints 
+    WHERE thread_id = %s AND checkpoint_ns = %s
+    ORDER BY checkpoint_id DESC LIMIT 1
+'''
+
+SELECT_CHECKPOINT_BY_ID = '''
+    SELECT checkpoint_id, parent_checkpoint_id, checkpoint_type, checkpoint_blob, checkpoint, metadata FROM checkpoints 
+    WHERE thread_id = %s AND checkpoint_ns = %s AND checkpoint_id = %s
+'''
+
+
+# Writes of the tasks of a step, stored as they complete so a resumed run
+# (after an interrupt or a crash) reuses them instead of re-running the tasks
+CREATE_CHECKPOINT_WRITES_TABLE = '''
+    CREATE TABLE IF NOT EXISTS checkpoint_writes (
+        thread_id TEXT NOT NULL,
+        checkpoint_ns TEXT NOT NULL DEFAULT '',
+        checkpoint_id TEXT NOT NULL,
+        task_id TEXT NOT NULL,
+        idx INTEGER NOT NULL,
+        channel TEXT NOT NULL,
+        type TEXT,
+        blob BYTEA,
+        task_path TEXT NOT NULL DEFAULT '',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+    )
+'''
+
+INSERT_CHECKPOINT_WRITES = '''
+    INSERT INTO checkpoint_writes (thread_id, checkpoint_ns, checkpoint_id, task_id, idx, channel, type, blob, task_path)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+    ON CONFLICT (thread_id, checkpoint_ns, checkpoint_id, task_id, idx) DO NOTHING
+'''
+
+# Special channels (errors, interrupts, resume values) keep only their latest value
+UPSERT_CHECKPOINT_WRITES = INSERT_CHECKPOINT_WRITES.replace(
+    "DO NOTHING", "DO UPDATE SET channel = EXCLUDED.channel, type = EXCLUDED.type, blob = EXCLUDED.blob"
+)
+
+SELECT_CHECKPOINT_WRITES = '''
+    SELECT checkpoint_id, task_id, channel, type, blob FROM checkpoint_writes
+    WHERE thread_id = %s AND checkpoint_ns = %s AND checkpoint_id = ANY(%s)
+    ORDER BY checkpoint_id, task_id, idx
+'''
+
+
+def checkpoint_write_rows(config, writes, task_id, task_path, serializer):
+    """Build the rows storing the writes of one task.
+
+    Returns:
+        tuple: (SQL string, list of row parameters)
+    """
+    thread_id = config['configurable']['thread_id']
+    checkpoint_id = config['configurable']['checkpoint_id']
+    query = UPSERT_CHECKPOINT_WRITES if all(channel in WRITES_IDX_MAP for channel, _ in writes) \
+        else INSERT_CHECKPOINT_WRITES
+    rows = [
+        (thread_id, '', checkpoint_id, task_id, WRITES_IDX_MAP.get(channel, idx), channel,
+         *serializer.encode_value(value), task_path)
+        for idx, (channel, value) in enumerate(writes)
+    ]
+    return query, rows
+
+
+def group_pending_writes(rows, serializer):
+    """Group SELECT_CHECKPOINT_WRITES rows into {checkpoint_id: [(task_id, channel, value), ...]}."""
+    pending = {}
+    for checkpoint_id, task_id, channel, value_type, blob in rows:
+        pending.setdefault(checkpoint_id, []).append((task_id, channel, serializer.decode_value(value_type, blob)))
+    return pending
+
+
+def merge_pending_writes(pending, writes, task_id):
+    """Apply a put_writes call to an in-memory pending_writes list, like the database does.
+
+    Returns:
+        list: The new pending writes
+    """
+    merged = list(pending or [])
+    stored = sum(1 for tid, channel, _ in merged if tid == task_id and channel not in WRITES_IDX_MAP)
+    for idx, (channel, value) in enumerate(writes):
+        if channel in WRITES_IDX_MAP:
+            merged = [w for w in merged if not (w[0] == task_id and w[1] == channel)]
+        elif idx < stored:
+            continue
+        merged.append((task_id, channel, value))
+    return merged
+
+
+def select_checkpoints(thread_id, checkpoint_ns='', before=None, limit=None):
+    """Build the query listing a thread's checkpoints, newest first.
+
+    Returns:
+        tuple: (SQL string, parameters)
+    """
+    query = '''
+        SELECT checkpoint_id, parent_checkpoint_id, checkpoint_type, checkpoint_blob, checkpoint, metadata FROM checkpoints 
+        WHERE thread_id = %s AND checkpoint_ns = %s
+    '''
+    params = [thread_id, checkpoint_ns]
+    if before is not None:
+        query += " AND checkpoint_id < %s"
+        params.append(before)
+    query += " ORDER BY checkpoint_id DESC"
+    if limit is not None:
+        query += " LIMIT %s"
+        params.append(limit)
+    return query, params
+
+
+def checkpoint_id_for(checkpoint):
+    """Return the id of a checkpoint.
+
+    LangGraph assigns every checkpoint a time-ordered uuid6 id, so the same state
+    written by two workers gets the same row and ids sort by creation time.
+    """
+    return checkpoint.get("id") or str(uuid6())
+
+
+def checkpoint_config(thread_id, checkpoint_id):
+    """Build the RunnableConfig pointing at a stored checkpoint."""
+    if checkpoint_id is None:
+        return None
+    return {"configurable": {"thread_id": thread_id, "checkpoint_ns": '', "checkpoint_id": checkpoint_id}}
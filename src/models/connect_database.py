@@ -1,160 +1,367 @@
 import os
-import json
-import psycopg2
+import threading
+from psycopg.types.json import Jsonb
+from psycopg_pool import ConnectionPool
 from langgraph.checkpoint.memory import MemorySaver
 from langgraph.checkpoint.base import CheckpointTuple
 from langchain_core.messages import BaseMessage, AIMessage, HumanMessage, SystemMessage
 
+try:
+    from .checkpoint_sql import (UPSERT_CHECKPOINT, SELECT_LATEST_CHECKPOINT, SELECT_CHECKPOINT_BY_ID,
+                                 SELECT_CHECKPOINT_WRITES, upsert_checkpoints, select_checkpoints,
+                                 checkpoint_id_for, checkpoint_config, checkpoint_write_rows, group_pending_writes)
+    from .serializers import CheckpointSerializer, json_dumps, load_json
+    from .message_log import MESSAGE_LOG_REF, append_messages, can_log_messages, resolve_checkpoint
+    from .migrations import run_migrations
+    from .write_behind import WriteBehindCheckpointer
+    from .message_search import CHECKPOINT_SEARCH_INDEX, index_messages, messages_to_index
+    from .thread_summary import UPSERT_THREAD, thread_params
+    from .sqlite_checkpointer import SqliteCheckpointer, sqlite_path
+    from .checkpoint_cache import (CheckpointCache, CacheInvalidationListener, CACHE_CHANNEL,
+                                   NOTIFY_CHECKPOINT_WRITE, CHECKPOINT_CACHE_SIZE, CHECKPOINT_CACHE_TTL,
+                                   invalidation_payload)
+except ImportError:
+    from checkpoint_sql import (UPSERT_CHECKPOINT, SELECT_LATEST_CHECKPOINT, SELECT_CHECKPOINT_BY_ID,
+                                SELECT_CHECKPOINT_WRITES, upsert_checkpoints, select_checkpoints,
+                                checkpoint_id_for, checkpoint_config, checkpoint_write_rows, group_pending_writes)
+    from serializers import CheckpointSerializer, json_dumps, load_json
+    from message_log import MESSAGE_LOG_REF, append_messages, can_log_messages, resolve_checkpoint
+    from migrations import run_migrations
+    from write_behind import WriteBehindCheckpointer
+    from message_search import CHECKPOINT_SEARCH_INDEX, index_messages, messages_to_index
+    from thread_summary import UPSERT_THREAD, thread_params
+    from sqlite_checkpointer import SqliteCheckpointer, sqlite_path
+    from checkpoint_cache import (CheckpointCache, CacheInvalidationListener, CACHE_CHANNEL,
+                                  NOTIFY_CHECKPOINT_WRITE, CHECKPOINT_CACHE_SIZE, CHECKPOINT_CACHE_TTL,
+                                  invalidation_payload)
+
 # Load environment variables
 DB_URL = os.getenv("DATABASE_URL")
 
+# Connection pool settings (sizes are per worker process)
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+DB_POOL_MAX_IDLE = float(os.getenv("DB_POOL_MAX_IDLE", "300"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+
+# "full" stores the whole state in every checkpoint row, "message_log" appends
+# messages to a per-thread log and keeps only references in the checkpoint
+CHECKPOINT_STORAGE_MODE = os.getenv("CHECKPOINT_STORAGE_MODE", "full")
+STORAGE_MODES = ("full", "message_log")
+
+# "sync" writes every checkpoint before returning, "write_behind" queues it for
+# a background writer (see write_behind.py)
+CHECKPOINT_WRITE_MODE = os.getenv("CHECKPOINT_WRITE_MODE", "sync")
+WRITE_MODES = ("sync", "write_behind")
+
+
 class SimplePostgresCheckpointer:
     """PostgreSQL checkpointer for conversation storage with proper history retrieval."""
     
-    def __init__(self, db_url):
+    def __init__(self, db_url, min_size=DB_POOL_MIN_SIZE, max_size=DB_POOL_MAX_SIZE,
+                 max_idle=DB_POOL_MAX_IDLE, timeout=DB_POOL_TIMEOUT,
+                 storage_mode=CHECKPOINT_STORAGE_MODE, serializer=None,
+                 cache_size=CHECKPOINT_CACHE_SIZE, cache_ttl=CHECKPOINT_CACHE_TTL):
+        if storage_mode not in STORAGE_MODES:
+            raise ValueError(f"Unknown checkpoint storage mode: {storage_mode}")
         self.db_url = db_url
-        self._ensure_table_exists()
-    
-    def _ensure_table_exists(self):
-        """Ensure the checkpoints table exists."""
-        conn = psycopg2.connect(self.db_url)
+        self.storage_mode = storage_mode
+        self.serializer = serializer or CheckpointSerializer()
+        # Latest checkpoint per thread (0 disables the cache)
+        self.cache = CheckpointCache(cache_size, cache_ttl) if cache_size > 0 else None
+        self._cache_listener = CacheInvalidationListener(db_url, self.cache) if self.cache else None
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_idle = max_idle
+        self.timeout = timeout
+        self._pool = None
+        self._pool_pid = None
+        self._pool_lock = threading.Lock()
         try:
-            cursor = conn.cursor()
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS checkpoints (
-                    thread_id TEXT NOT NULL,
-                    checkpoint_ns TEXT NOT NULL DEFAULT '',
-                    checkpoint_id TEXT NOT NULL,
-                    checkpoint JSONB NOT NULL,
-                    metadata JSONB,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
-                )
-            ''')
-            conn.commit()
-        finally:
-            conn.close()
+            run_migrations(self.db_url)
+            self.pool.wait(timeout=self.timeout)
+        except Exception:
+            self.close()
+            raise
+    
+    @property
+    def pool(self):
+        """Connection pool for the current process.
+        
+        The pool is created lazily and re-created after a fork, so workers
+        started by a pre-forking server never share sockets with their parent.
+        """
+        if self._pool is None or self._pool_pid != os.getpid():
+            # Threads making their first request together must not each open a pool
+            with self._pool_lock:
+                if self._pool is None or self._pool_pid != os.getpid():
+                    self._pool = ConnectionPool(
+                        self.db_url,
+                        min_size=self.min_size,
+                        max_size=self.max_size,
+                        max_idle=self.max_idle,
+                        timeout=self.timeout,
+                        name="checkpointer",
+                        open=True,
+                    )
+                    self._pool_pid = os.getpid()
+        return self._pool
+    
+    def pool_stats(self):
+        """Return connection pool statistics for sizing the pool."""
+        if self._pool is None or self._pool_pid != os.getpid():
+            return {}
+        stats = self._pool.get_stats()
+        stats["connections_in_use"] = stats.get("pool_size", 0) - stats.get("pool_available", 0)
+        return stats
+    
+    def cache_stats(self):
+        """Return hit/miss counters of the latest-checkpoint cache."""
+        return self.cache.stats() if self.cache else {}
+    
+    def close(self):
+        """Close the connection pool owned by this process."""
+        if self._cache_listener is not None:
+            self._cache_listener.stop()
+        with self._pool_lock:
+            if self._pool is not None and self._pool_pid == os.getpid():
+                self._pool.close()
+            self._pool = None
+            self._pool_pid = None
     
     def get_next_version(self, current, channel):
         return (current or 0) + 1
     
     def put(self, config, checkpoint, metadata, new_versions):
-        thread_id = config['configurable']['thread_id']
-        checkpoint_id = str(hash(str(checkpoint)))
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            row, next_config = self._checkpoint_row(cursor, config, checkpoint, metadata)
+            cursor.execute(UPSERT_CHECKPOINT, row)
+            self._notify_write(cursor, [row[0]])
         
-        conn = psycopg2.connect(self.db_url)
-        try:
+        self._cache_put(config, next_config, checkpoint, metadata)
+        return next_config
+    
+    def put_many(self, items):
+        """Store several checkpoints in one transaction with a single multi-row INSERT.
+        
+        Args:
+            items: (config, checkpoint, metadata) tuples, oldest first
+        
+        Returns:
+            list: The config of every stored checkpoint, in input order
+        """
+        if not items:
+            return []
+        
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
-            cursor.execute('''
-                INSERT INTO checkpoints (thread_id, checkpoint_ns, checkpoint_id, checkpoint, metadata)
-                VALUES (%s, %s, %s, %s, %s)
-                ON CONFLICT (thread_id, checkpoint_ns, checkpoint_id) 
-                DO UPDATE SET checkpoint = EXCLUDED.checkpoint, metadata = EXCLUDED.metadata
-            ''', (thread_id, '', checkpoint_id, json.dumps(checkpoint, default=str), json.dumps(metadata)))
-            conn.commit()
-        finally:
-            conn.close()
-        
-        return {"configurable": {"thread_id": thread_id, "checkpoint_id": checkpoint_id}}
+            rows = {}
+            configs = []
+            for config, checkpoint, metadata in items:
+                row, next_config = self._checkpoint_row(cursor, config, checkpoint, metadata)
+                # ON CONFLICT can't touch the same row twice in one statement, so keep the last write
+                rows[row[:3]] = row
+                configs.append(next_config)
+            rows = list(rows.values())
+            cursor.execute(upsert_checkpoints(len(rows)), [value for row in rows for value in row])
+            self._notify_write(cursor, {row[0] for row in rows})
+        
+        if self.cache is not None:
+            # Writes of these checkpoints may already be stored, so let the next read load them
+            for config, _, _ in items:
+                self.cache.invalidate(config['configurable']['thread_id'])
+        return configs
+    
+    def _notify_write(self, cursor, thread_ids):
+        """Tell the other workers' caches about the write; delivered when the transaction commits."""
+        if self.cache is None:
+            return
+        for thread_id in thread_ids:
+            cursor.execute(NOTIFY_CHECKPOINT_WRITE, (CACHE_CHANNEL, invalidation_payload(thread_id)))
+    
+    def _cache_put(self, config, next_config, checkpoint, metadata):
+        if self.cache is None:
+            return
+        self._cache_listener.ensure_running()
+        self.cache.put(next_config['configurable']['thread_id'], CheckpointTuple(
+            config=next_config,
+            checkpoint=checkpoint,
+            metadata=metadata,
+            parent_config=checkpoint_config(config['configurable']['thread_id'],
+                                            config['configurable'].get('checkpoint_id')),
+            pending_writes=[]
+        ))
+    
+    def _checkpoint_row(self, cursor, config, checkpoint, metadata):
+        """Encode a checkpoint into the parameters of UPSERT_CHECKPOINT.
+        
+        Returns:
+            tuple: (row parameters, config of the stored checkpoint)
+        """
+        thread_id = config['configurable']['thread_id']
+        checkpoint_id = checkpoint_id_for(checkpoint)
+        parent_checkpoint_id = config['configurable'].get('checkpoint_id')
+        
+        messages = (checkpoint.get('channel_values') or {}).get('messages')
+        messages_from, new_messages = None, None
+        if self.storage_mode == "message_log":
+            checkpoint, messages_from, new_messages = self._checkpoint_with_message_ref(cursor, thread_id, checkpoint)
+        if CHECKPOINT_SEARCH_INDEX:
+            index_messages(cursor, thread_id, '', messages_to_index(messages, new_messages))
+        cursor.execute(UPSERT_THREAD, thread_params(thread_id, '', checkpoint_id, messages))
+        json_value, checkpoint_type, blob = self.serializer.encode(checkpoint)
+        row = (
+            thread_id, '', checkpoint_id, parent_checkpoint_id,
+            Jsonb(json_value, dumps=json_dumps) if json_value is not None else None,
+            checkpoint_type, blob, Jsonb(metadata, dumps=json_dumps), messages_from
+        )
+        return row, checkpoint_config(thread_id, checkpoint_id)
+    
+    def _checkpoint_with_message_ref(self, cursor, thread_id, checkpoint):
+        """Move the messages into the append-only log and keep only a reference in the checkpoint.
+        
+        Returns:
+            tuple: (checkpoint to store, first log sequence number it references or None,
+                    newly logged messages or None)
+        """
+        channel_values = checkpoint.get('channel_values') or {}
+        messages = channel_values.get('messages')
+        if not can_log_messages(messages):
+            return checkpoint, None, None
+        
+        ref, new_messages = append_messages(cursor, thread_id, '', messages)
+        checkpoint = {**checkpoint, 'channel_values': {**channel_values, 'messages': ref}}
+        return checkpoint, ref[MESSAGE_LOG_REF]["from"], new_messages
     
     def get_tuple(self, config):
-        """Retrieve the latest checkpoint for a thread."""
+        """Retrieve a checkpoint for a thread, the latest one unless the config names a checkpoint_id."""
         thread_id = config['configurable']['thread_id']
+        checkpoint_id = config['configurable'].get('checkpoint_id')
         
-        conn = psycopg2.connect(self.db_url)
-        try:
+        generation = None
+        if self.cache is not None:
+            self._cache_listener.ensure_running()
+            generation = self.cache.generation()
+            cached = self.cache.get(thread_id)
+            if cached and (not checkpoint_id or cached.config['configurable']['checkpoint_id'] == checkpoint_id):
+                return cached
+        
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
-            cursor.execute('''
-                SELECT checkpoint_id, checkpoint, metadata FROM checkpoints 
-                WHERE thread_id = %s AND checkpoint_ns = %s
-                ORDER BY created_at DESC LIMIT 1
-            ''', (thread_id, ''))
+            if checkpoint_id:
+                cursor.execute(SELECT_CHECKPOINT_BY_ID, (thread_id, '', checkpoint_id))
+            else:
+                cursor.execute(SELECT_LATEST_CHECKPOINT, (thread_id, ''))
             
             result = cursor.fetchone()
-            if result:
-                checkpoint_id, checkpoint_data, metadata = result
-                
-                # Handle both JSON string and dict cases
-                if isinstance(checkpoint_data, str):
-                    checkpoint = json.loads(checkpoint_data)
-                else:
-                    checkpoint = checkpoint_data  # Already a dict from JSONB
-                
-                # Handle metadata similarly
-                if isinstance(metadata, str):
-                    metadata_dict = json.loads(metadata) if metadata else {}
-                else:
-                    metadata_dict = metadata if metadata else {}
-                
-                # Return a proper CheckpointTuple
-                return CheckpointTuple(
-                    config={"configurable": {"thread_id": thread_id, "checkpoint_id": checkpoint_id}},
-                    checkpoint=checkpoint,
-                    metadata=metadata_dict,
-                    parent_config=None,
-                    pending_writes=None
-                )
-            return None
-        finally:
-            conn.close()
+            if not result:
+                return None
+            pending = self._pending_writes(cursor, thread_id, [result[0]])
+            saved = self._row_to_tuple(cursor, thread_id, result, pending)
+        
+        if self.cache is not None and not checkpoint_id:
+            self.cache.fill(thread_id, saved, generation)
+        return saved
     
     def list(self, config, **kwargs):
-        """List checkpoints for a thread."""
+        """List checkpoints for a thread, newest first."""
         thread_id = config['configurable']['thread_id']
+        before = kwargs.get('before')
+        before_id = before['configurable'].get('checkpoint_id') if before else None
         
-        conn = psycopg2.connect(self.db_url)
-        try:
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
-            cursor.execute('''
-                SELECT checkpoint_id, checkpoint, metadata FROM checkpoints 
-                WHERE thread_id = %s AND checkpoint_ns = %s
-                ORDER BY created_at DESC
-            ''', (thread_id, ''))
+            cursor.execute(*select_checkpoints(thread_id, '', before_id, kwargs.get('limit')))
+            rows = cursor.fetchall()
             
-            results = []
-            for row in cursor.fetchall():
-                checkpoint_id, checkpoint_data, metadata = row
-                
-                # Handle both JSON string and dict cases
-                if isinstance(checkpoint_data, str):
-                    checkpoint = json.loads(checkpoint_data)
-                else:
-                    checkpoint = checkpoint_data  # Already a dict from JSONB
-                
-                # Handle metadata similarly
-                if isinstance(metadata, str):
-                    metadata_dict = json.loads(metadata) if metadata else {}
-                else:
-                    metadata_dict = metadata if metadata else {}
-                
-                # Return proper CheckpointTuple objects
-                results.append(CheckpointTuple(
-                    config={"configurable": {"thread_id": thread_id, "checkpoint_id": checkpoint_id}},
-                    checkpoint=checkpoint,
-                    metadata=metadata_dict,
-                    parent_config=None,
-                    pending_writes=None
-                ))
-            return results
-        finally:
-            conn.close()
-    
-    def put_writes(self, config, writes, task_id):
-        pass  # Simplified - not needed for basic storage
+            pending = self._pending_writes(cursor, thread_id, [row[0] for row in rows])
+            return [self._row_to_tuple(cursor, thread_id, row, pending) for row in rows]
+    
+    def _pending_writes(self, cursor, thread_id, checkpoint_ids):
+        """Load the stored writes of the given checkpoints.
+        
+        Returns:
+            dict: {checkpoint_id: [(task_id, channel, value), ...]}
+        """
+        cursor.execute(SELECT_CHECKPOINT_WRITES, (thread_id, '', checkpoint_ids))
+        return group_pending_writes(cursor.fetchall(), self.serializer)
+    
+    def _row_to_tuple(self, cursor, thread_id, row, pending):
+        """Build a CheckpointTuple from a checkpoints row."""
+        checkpoint_id, parent_checkpoint_id, checkpoint_type, checkpoint_blob, checkpoint_data, metadata = row
+        checkpoint = self.serializer.decode(checkpoint_type, checkpoint_blob, checkpoint_data)
+        
+        # Rebuild the messages from the append-only log if the row references it
+        checkpoint = resolve_checkpoint(cursor, thread_id, '', checkpoint)
+        
+        # Return a proper CheckpointTuple
+        return CheckpointTuple(
+            config=checkpoint_config(thread_id, checkpoint_id),
+            checkpoint=checkpoint,
+            metadata=load_json(metadata),
+            parent_config=checkpoint_config(thread_id, parent_checkpoint_id),
+            pending_writes=pending.get(checkpoint_id, [])
+        )
+    
+    def put_writes(self, config, writes, task_id, task_path=""):
+        """Store the writes of a finished task, so resuming the step does not run it again."""
+        thread_id = config['configurable']['thread_id']
+        query, rows = checkpoint_write_rows(config, writes, task_id, task_path, self.serializer)
+        
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.executemany(query, rows)
+            self._notify_write(cursor, [thread_id])
+        
+        if self.cache is not None:
+            self.cache.add_writes(thread_id, config['configurable']['checkpoint_id'], writes, task_id)
 
-def create_checkpointer():
+def create_checkpointer(write_mode=CHECKPOINT_WRITE_MODE):
     """Create and return a properly configured checkpointer."""
+    if write_mode not in WRITE_MODES:
+        raise ValueError(f"Unknown checkpoint write mode: {write_mode}")
     if not DB_URL:
         print("Warning: DATABASE_URL not set, using MemorySaver instead")
         return MemorySaver()
     
+    if sqlite_path(DB_URL) is not None:
+        try:
+            checkpointer = SqliteCheckpointer(sqlite_path(DB_URL))
+            print("✓ SQLite checkpointer created successfully!")
+            return checkpointer
+        except Exception as e:
+            print(f"Error creating SQLite checkpointer: {e}")
+            print("Using MemorySaver as fallback...")
+            return MemorySaver()
+    
     try:
-        print("✓ PostgreSQL checkpointer created successfully!")
-        return SimplePostgresCheckpointer(DB_URL)
+        checkpointer = SimplePostgresCheckpointer(DB_URL)
+        if write_mode == "write_behind":
+            checkpointer = WriteBehindCheckpointer(checkpointer)
+        print(f"✓ PostgreSQL checkpointer created successfully! ({write_mode} writes)")
+        return checkpointer
     except Exception as e:
         print(f"Error creating PostgreSQL checkpointer: {e}")
         print("Using MemorySaver as fallback...")
         return MemorySaver()
 
-# Create the checkpointer
-memory_saver = create_checkpointer()
\ No newline at end of file
+_checkpointer = None
+_checkpointer_lock = threading.Lock()
+
+
+def get_checkpointer():
+    """Return the default checkpointer, creating it (and its connection pool) on first use."""
+    global _checkpointer
+    if _checkpointer is None:
+        with _checkpointer_lock:
+            if _checkpointer is None:
+                _checkpointer = create_checkpointer()
+    return _checkpointer
+
+
+def __getattr__(name):
+    # `from models.connect_database import memory_saver` keeps working and creates the checkpointer on first access
+    if name == "memory_saver":
+        return get_checkpointer()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
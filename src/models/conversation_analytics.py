@@ -0,0 +1,329 @@
+"""
+Conversation Analytics Report
+Aggregate statistics over stored conversations: tool usage, turns per session,
+language mix, emergency rate, message lengths and daily volume.
+
+Messages are loaded as flattened rows (see export_conversations.py) into an
+Arrow table; the per-message flags (Arabic script, emergency keywords, length)
+are computed with Arrow compute kernels and every aggregate with pandas/numpy
+group-bys, so no Python code runs per message. Report on an export file for
+large histories; reading straight from the database decodes every thread.
+
+Usage:
+    python conversation_analytics.py --input conversations.parquet
+    python conversation_analytics.py --input conversations.parquet --since 2025-06-01 --until 2025-06-08
+    python conversation_analytics.py --since 2025-06-01 --json
+"""
+
+import os
+import re
+import sys
+import json
+import argparse
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.json as pa_json
+import pyarrow.parquet as pq
+
+# Add the src directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.language import ARABIC_PATTERN
+from utils.emergency import EMERGENCY_KEYWORDS_ENGLISH, EMERGENCY_KEYWORDS_ARABIC
+
+try:
+    from .export_conversations import ConversationExporter, EXPORT_COLUMNS, EXPORT_CHUNK_SIZE, _parquet_schema
+except ImportError:
+    from export_conversations import ConversationExporter, EXPORT_COLUMNS, EXPORT_CHUNK_SIZE, _parquet_schema
+
+# Tools that count as a medical consultation
+MEDICAL_TOOLS = ("ConsultDoctorTool", "ConsultArabicDoctorTool")
+
+TURN_BUCKETS = [0, 1, 2, 5, 10, 20, np.inf]
+TURN_LABELS = ["1", "2", "3-5", "6-10", "11-20", "21+"]
+LENGTH_QUANTILES = [0.5, 0.9, 0.99]
+
+# Arrow uses RE2, which writes code points as \x{...} instead of \u....
+ARABIC_REGEX = re.sub(r'\\u([0-9A-Fa-f]{4})', r'\\x{\1}', ARABIC_PATTERN.pattern)
+EMERGENCY_REGEX = "|".join(re.sub(r'([.^$*+?()\[\]{}|\\])', r'\\\1', keyword)
+                           for keyword in EMERGENCY_KEYWORDS_ENGLISH + EMERGENCY_KEYWORDS_ARABIC)
+
+
+def load_messages(path, since=None, until=None):
+    """Load an export file (Parquet or JSON Lines) into an analytics frame.
+
+    Returns:
+        pandas.DataFrame: See message_frame()
+    """
+    if path.endswith(".parquet"):
+        table = pq.read_table(path, columns=list(EXPORT_COLUMNS))
+    else:
+        table = pa_json.read_json(path, parse_options=pa_json.ParseOptions(explicit_schema=_parquet_schema()))
+    return message_frame(table, since, until)
+
+
+def load_messages_from_database(since=None, until=None, db_url=None):
+    """Load the messages of the threads active in [since, until) straight from the database.
+
+    Returns:
+        pandas.DataFrame: See message_frame()
+    """
+    schema = _parquet_schema()
+    batches, chunk = [], []
+    for _, rows in ConversationExporter(db_url).iter_rows(since, until):
+        chunk.extend(rows)
+        if len(chunk) >= EXPORT_CHUNK_SIZE:
+            batches.append(pa.RecordBatch.from_pylist(chunk, schema=schema))
+            chunk = []
+    if chunk:
+        batches.append(pa.RecordBatch.from_pylist(chunk, schema=schema))
+    return message_frame(pa.Table.from_batches(batches, schema=schema), since, until)
+
+
+def message_frame(table, since=None, until=None):
+    """Derive the per-message analytics columns from flattened export rows.
+
+    Args:
+        table: Arrow table with the EXPORT_COLUMNS columns
+        since, until: Keep only messages stored in [since, until)
+
+    Returns:
+        pandas.DataFrame: thread_id, message_index, role and tool_name (categoricals), timestamp,
+        length, arabic and emergency columns; the message text itself is dropped
+    """
+    if since is not None or until is not None:
+        timestamps = table.column("timestamp")
+        mask = pc.is_valid(timestamps)
+        if since is not None:
+            mask = pc.and_(mask, pc.greater_equal(timestamps, pa.scalar(since, pa.timestamp("us"))))
+        if until is not None:
+            mask = pc.and_(mask, pc.less(timestamps, pa.scalar(until, pa.timestamp("us"))))
+        table = table.filter(mask)
+
+    content = pc.fill_null(table.column("content"), "")
+    frame = pd.DataFrame({
+        "thread_id": table.column("thread_id").dictionary_encode().to_pandas(),
+        "message_index": table.column("message_index").to_numpy(zero_copy_only=False),
+        "role": table.column("role").dictionary_encode().to_pandas(),
+        "tool_name": table.column("tool_name").dictionary_encode().to_pandas(),
+        "timestamp": table.column("timestamp").to_pandas(),
+        "length": pc.utf8_length(content).to_numpy(zero_copy_only=False),
+        "arabic": pc.match_substring_regex(content, ARABIC_REGEX).to_numpy(zero_copy_only=False),
+        "emergency": pc.match_substring_regex(content, EMERGENCY_REGEX, ignore_case=True)
+                       .to_numpy(zero_copy_only=False),
+    })
+    return frame
+
+
+def session_languages(frame):
+    """Language of each session: Arabic when most of the user's messages are in Arabic.
+
+    Returns:
+        pandas.Series: thread_id -> "ar" / "en", for the sessions with at least one user message
+    """
+    human = frame.loc[frame["role"] == "human"]
+    arabic_share = human.groupby("thread_id", observed=True)["arabic"].mean()
+    return pd.Series(np.where(arabic_share.to_numpy() >= 0.5, "ar", "en"), index=arabic_share.index,
+                     name="language")
+
+
+def tool_usage(frame, languages):
+    """Tool calls per tool and session language.
+
+    Returns:
+        pandas.DataFrame: One row per tool, one column per language plus "total"
+    """
+    tools = frame.loc[(frame["role"] == "tool") & frame["tool_name"].notna(), ["thread_id", "tool_name"]]
+    usage = pd.crosstab(tools["tool_name"].astype(str),
+                        tools["thread_id"].map(languages).astype(object).fillna("unknown"),
+                        rownames=["tool"], colnames=["language"])
+    usage["total"] = usage.sum(axis=1)
+    return usage.sort_values("total", ascending=False)
+
+
+def turns_per_session(frame):
+    """Distribution of user turns per session.
+
+    Returns:
+        dict: Summary statistics and a histogram over TURN_LABELS
+    """
+    human = frame["role"].to_numpy() == "human"
+    codes = frame["thread_id"].cat.codes.to_numpy()
+    turns = np.bincount(codes[human], minlength=len(frame["thread_id"].cat.categories))
+    turns = turns[turns > 0]
+    if not len(turns):
+        return {"sessions": 0}
+    histogram = pd.cut(turns, TURN_BUCKETS, labels=TURN_LABELS).value_counts().reindex(TURN_LABELS)
+    return {
+        "sessions": int(len(turns)),
+        "mean": round(float(turns.mean()), 2),
+        "p50": float(np.percentile(turns, 50)),
+        "p90": float(np.percentile(turns, 90)),
+        "max": int(turns.max()),
+        "histogram": {label: int(count) for label, count in histogram.items()},
+    }
+
+
+def language_mix(frame, languages):
+    """Share of user messages and of sessions per language.
+
+    Returns:
+        dict: Counts and shares for messages and sessions
+    """
+    human = frame.loc[frame["role"] == "human", "arabic"].to_numpy()
+    arabic_messages = int(human.sum())
+    arabic_sessions = int((languages.to_numpy() == "ar").sum())
+    return {
+        "messages": {"ar": arabic_messages, "en": int(len(human) - arabic_messages),
+                     "ar_share": round(arabic_messages / len(human), 4) if len(human) else None},
+        "sessions": {"ar": arabic_sessions, "en": int(len(languages) - arabic_sessions),
+                     "ar_share": round(arabic_sessions / len(languages), 4) if len(languages) else None},
+    }
+
+
+def emergency_rate(frame):
+    """How often user messages, and sessions, contain emergency keywords.
+
+    Returns:
+        dict: Flagged counts and rates, overall and per message language
+    """
+    human = frame.loc[frame["role"] == "human", ["thread_id", "arabic", "emergency"]]
+    flagged_sessions = human.groupby("thread_id", observed=True)["emergency"].any()
+    by_language = human.groupby(np.where(human["arabic"], "ar", "en"))["emergency"].agg(["sum", "mean"])
+    return {
+        "flagged_messages": int(human["emergency"].sum()),
+        "message_rate": round(float(human["emergency"].mean()), 4) if len(human) else None,
+        "flagged_sessions": int(flagged_sessions.sum()),
+        "session_rate": round(float(flagged_sessions.mean()), 4) if len(flagged_sessions) else None,
+        "by_language": {language: {"flagged": int(row["sum"]), "rate": round(float(row["mean"]), 4)}
+                        for language, row in by_language.iterrows()},
+    }
+
+
+def message_lengths(frame):
+    """Message length (characters) distribution per role.
+
+    Returns:
+        pandas.DataFrame: count, mean, p50, p90, p99 and max per role
+    """
+    grouped = frame.groupby("role", observed=True)["length"]
+    lengths = grouped.quantile(LENGTH_QUANTILES).unstack()
+    lengths.columns = [f"p{int(q * 100)}" for q in LENGTH_QUANTILES]
+    lengths.insert(0, "mean", grouped.mean().round(1))
+    lengths.insert(0, "count", grouped.size())
+    lengths["max"] = grouped.max()
+    return lengths
+
+
+def daily_volume(frame):
+    """Messages, user turns, active sessions and medical consults per day.
+
+    Returns:
+        pandas.DataFrame: One row per day with a stored timestamp
+    """
+    dated = frame.loc[frame["timestamp"].notna()]
+    day = dated["timestamp"].dt.floor("D")
+    volume = pd.DataFrame({
+        "messages": dated.groupby(day).size(),
+        "user_messages": (dated["role"] == "human").groupby(day).sum(),
+        "sessions": dated.groupby(day)["thread_id"].nunique(),
+        "medical_consults": dated["tool_name"].isin(MEDICAL_TOOLS).groupby(day).sum(),
+    })
+    volume.index = volume.index.date
+    volume.index.name = "day"
+    return volume
+
+
+def build_report(frame):
+    """Compute every metric of the report.
+
+    Returns:
+        dict: Metric name -> dict or DataFrame
+    """
+    languages = session_languages(frame)
+    usage = tool_usage(frame, languages)
+    medical = usage.loc[usage.index.isin(MEDICAL_TOOLS)]
+    return {
+        "messages": int(len(frame)),
+        "sessions": int(frame["thread_id"].nunique()),
+        "medical_consults": {column: int(medical[column].sum()) for column in usage.columns},
+        "tool_usage": usage,
+        "turns_per_session": turns_per_session(frame),
+        "language_mix": language_mix(frame, languages),
+        "emergency_rate": emergency_rate(frame),
+        "message_lengths": message_lengths(frame),
+        "daily_volume": daily_volume(frame),
+    }
+
+
+def report_to_json(report):
+    """Convert a report to JSON-serializable values."""
+    def convert(value):
+        if isinstance(value, pd.DataFrame):
+            return {str(index): {column: (item.item() if hasattr(item, "item") else item)
+                                 for column, item in row.items()}
+                    for index, row in value.iterrows()}
+        return value
+    return {name: convert(value) for name, value in report.items()}
+
+
+def print_report(report):
+    """Print a report in a readable format."""
+    print("📊 Conversation Analytics")
+    print("=" * 80)
+    print(f"Messages: {report['messages']}   Sessions: {report['sessions']}")
+    consults = report["medical_consults"]
+    print(f"Medical consults: {consults.get('total', 0)} "
+          f"(ar: {consults.get('ar', 0)}, en: {consults.get('en', 0)})")
+
+    sections = [
+        ("🛠️ Tool usage", "tool_usage"),
+        ("💬 Turns per session", "turns_per_session"),
+        ("🌐 Language mix", "language_mix"),
+        ("🚨 Emergency rate", "emergency_rate"),
+        ("📏 Message lengths", "message_lengths"),
+        ("📅 Daily volume", "daily_volume"),
+    ]
+    for title, name in sections:
+        print(f"\n{title}")
+        print("-" * 80)
+        value = report[name]
+        if isinstance(value, pd.DataFrame):
+            print(value.to_string() if len(value) else "No data.")
+        else:
+            print(json.dumps(value, indent=2, ensure_ascii=False))
+
+
+def parse_time(value):
+    return datetime.fromisoformat(value)
+
+
+def main():
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Conversation analytics report")
+    parser.add_argument("--input", help="Export file (.parquet or .jsonl); reads the database if omitted")
+    parser.add_argument("--since", type=parse_time, help="Only messages stored since this ISO time")
+    parser.add_argument("--until", type=parse_time, help="Only messages stored before this ISO time")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    try:
+        if args.input:
+            frame = load_messages(args.input, args.since, args.until)
+        else:
+            frame = load_messages_from_database(args.since, args.until)
+        report = build_report(frame)
+        if args.json:
+            print(json.dumps(report_to_json(report), indent=2, ensure_ascii=False, default=str))
+        else:
+            print_report(report)
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+"""
+Conversation Export for PostgreSQL Database
+Streams stored conversations out of the database for clinical QA review and
+model evaluation, one row per message, as JSON Lines or Parquet.
+
+Threads are read through a server-side (named) cursor and written in chunks, so
+memory use stays constant however many conversations are exported. An
+incremental export only picks up threads that were active since the previous
+one; a thread that changed is exported again in full, so consumers should keep
+the latest rows per (thread_id, message_index).
+
+Usage:
+    python export_conversations.py conversations.jsonl
+    python export_conversations.py conversations.parquet --format parquet --since 2025-01-01
+    python export_conversations.py new_conversations.jsonl --incremental
+"""
+
+import os
+import sys
+import json
+import argparse
+import psycopg2
+from datetime import datetime, timedelta
+from langchain_core.messages import BaseMessage, AIMessage, ToolMessage
+
+try:
+    from .inspect_conversations import ConversationInspector
+    from .message_log import resolve_checkpoint
+    from .message_search import message_text
+    from .serializers import CheckpointSerializer
+except ImportError:
+    from inspect_conversations import ConversationInspector
+    from message_log import resolve_checkpoint
+    from message_search import message_text
+    from serializers import CheckpointSerializer
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+EXPORT_FORMATS = ("jsonl", "parquet")
+EXPORT_CHUNK_SIZE = 5000
+EXPORT_STATE_FILE = "conversation_export_state.json"
+
+# Threads fetched from the server per round trip
+EXPORT_FETCH_SIZE = 100
+
+# Incremental exports stop this long before now, so threads whose write is still
+# committing are not skipped by the next export
+EXPORT_SETTLE_SECONDS = 60
+
+# Latest checkpoint of every thread active in the requested range, oldest activity first
+SELECT_EXPORT_THREADS = '''
+    SELECT t.thread_id, t.last_activity, c.checkpoint_type, c.checkpoint_blob, c.checkpoint
+    FROM threads t
+    JOIN LATERAL (
+        SELECT checkpoint_type, checkpoint_blob, checkpoint FROM checkpoints
+        WHERE thread_id = t.thread_id AND checkpoint_ns = t.checkpoint_ns
+        ORDER BY checkpoint_id DESC LIMIT 1
+    ) c ON TRUE
+    WHERE t.checkpoint_ns = ''
+      AND t.last_activity >= %s AND t.last_activity < %s
+      AND (t.last_activity, t.thread_id) > (%s, %s)
+    ORDER BY t.last_activity, t.thread_id
+'''
+
+# When each message was first stored, taken from the search index
+SELECT_MESSAGE_TIMES = '''
+    SELECT message_id, created_at FROM message_search
+    WHERE thread_id = %s AND checkpoint_ns = ''
+'''
+
+EXPORT_COLUMNS = ("thread_id", "message_index", "message_id", "role", "content", "timestamp", "tool_name")
+
+
+def _parquet_schema():
+    return pa.schema([
+        ("thread_id", pa.string()),
+        ("message_index", pa.int32()),
+        ("message_id", pa.string()),
+        ("role", pa.string()),
+        ("content", pa.string()),
+        ("timestamp", pa.timestamp("us")),
+        ("tool_name", pa.string()),
+    ])
+
+
+def message_rows(thread_id, messages, message_times):
+    """Flatten the messages of a thread into export rows.
+
+    Args:
+        thread_id: Thread the messages belong to
+        messages: LangChain messages, or dicts/strings from checkpoints stored as plain JSON
+        message_times: message_id -> time the message was first stored
+
+    Returns:
+        list: One dict per message with the EXPORT_COLUMNS keys
+    """
+    rows = []
+    for index, message in enumerate(messages):
+        if isinstance(message, dict):
+            role = message.get('type', 'unknown')
+            message_id = message.get('id')
+            content = message.get('content', '')
+            content = content if isinstance(content, str) else json.dumps(content, ensure_ascii=False)
+            tool_name = message.get('name') if role == 'tool' else None
+        elif isinstance(message, BaseMessage):
+            role = message.type
+            message_id = message.id
+            content = message_text(message)
+            tool_name = None
+            if isinstance(message, ToolMessage):
+                tool_name = message.name
+            elif isinstance(message, AIMessage) and message.tool_calls:
+                tool_name = ",".join(call["name"] for call in message.tool_calls)
+        else:
+            # Messages stringified by the original JSON checkpoint format
+            role, message_id, content, tool_name = 'unknown', None, str(message), None
+        rows.append({
+            "thread_id": thread_id,
+            "message_index": index,
+            "message_id": message_id,
+            "role": role,
+            "content": content,
+            "timestamp": message_times.get(message_id),
+            "tool_name": tool_name,
+        })
+    return rows
+
+
+class JsonlWriter:
+    """Writes export rows as JSON Lines."""
+
+    def __init__(self, path):
+        self._file = open(path, "w", encoding="utf-8")
+
+    def write(self, rows):
+        for row in rows:
+            timestamp = row["timestamp"]
+            row = {**row, "timestamp": timestamp.isoformat() if timestamp else None}
+            self._file.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+    def close(self):
+        self._file.close()
+
+
+class ParquetWriter:
+    """Writes export rows as Parquet, one row group per chunk."""
+
+    def __init__(self, path):
+        if pa is None:
+            raise ImportError("Parquet export needs pyarrow: pip install pyarrow")
+        self._schema = _parquet_schema()
+        self._writer = pq.ParquetWriter(path, self._schema, compression="zstd")
+
+    def write(self, rows):
+        columns = {name: [row[name] for row in rows] for name in EXPORT_COLUMNS}
+        self._writer.write_table(pa.Table.from_pydict(columns, schema=self._schema))
+
+    def close(self):
+        self._writer.close()
+
+
+WRITERS = {"jsonl": JsonlWriter, "parquet": ParquetWriter}
+
+
+def load_export_state(path):
+    """Read the position reached by the previous incremental export.
+
+    Returns:
+        tuple: (last_activity, thread_id) of the last exported thread, or None
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        state = json.load(f)
+    return datetime.fromisoformat(state["last_activity"]), state["thread_id"]
+
+
+def save_export_state(path, position):
+    """Record the last exported thread; written atomically so a crash keeps the old state."""
+    last_activity, thread_id = position
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"last_activity": last_activity.isoformat(), "thread_id": thread_id,
+                   "exported_at": datetime.now().isoformat()}, f)
+    os.replace(tmp_path, path)
+
+
+class ConversationExporter(ConversationInspector):
+    """Streams conversations out of the database in constant memory."""
+
+    def __init__(self, db_url=None, chunk_size=EXPORT_CHUNK_SIZE):
+        super().__init__(db_url)
+        self.chunk_size = chunk_size
+
+    def iter_rows(self, since=None, until=None, after=None):
+        """Yield export rows for every thread active in [since, until), thread by thread.
+
+        Args:
+            since: Only threads active at or after this time
+            until: Only threads whose latest activity is before this time
+            after: (last_activity, thread_id) position to resume after
+
+        Yields:
+            tuple: (thread position, rows of that thread)
+        """
+        serializer = CheckpointSerializer()
+        after = after or (datetime.min, "")
+        conn = psycopg2.connect(self.db_url)
+        try:
+            # Named cursor: rows are fetched from the server EXPORT_FETCH_SIZE threads at a time
+            threads = conn.cursor(name="conversation_export")
+            threads.itersize = EXPORT_FETCH_SIZE
+            threads.execute(SELECT_EXPORT_THREADS, (since or datetime.min, until or datetime.max, *after))
+            lookup = conn.cursor()
+            for thread_id, last_activity, checkpoint_type, checkpoint_blob, checkpoint_data in threads:
+                checkpoint = serializer.decode(checkpoint_type, checkpoint_blob, checkpoint_data)
+                checkpoint = resolve_checkpoint(lookup, thread_id, '', checkpoint)
+                messages = (checkpoint.get('channel_values') or {}).get('messages')
+                if not isinstance(messages, list):
+                    messages = checkpoint.get('messages') or []
+                lookup.execute(SELECT_MESSAGE_TIMES, (thread_id,))
+                message_times = dict(lookup.fetchall())
+                yield (last_activity, thread_id), message_rows(thread_id, messages, message_times)
+        finally:
+            conn.close()
+
+    def export(self, path, format="jsonl", since=None, until=None, state_file=None):
+        """Export conversations to a file.
+
+        With `state_file`, only threads active since the previous export are written and
+        the file is updated once the export has completed.
+
+        Returns:
+            dict: Numbers of exported threads and messages
+        """
+        if format not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format: {format}")
+        after = None
+        if state_file:
+            after = load_export_state(state_file)
+            settled = datetime.now() - timedelta(seconds=EXPORT_SETTLE_SECONDS)
+            until = min(until, settled) if until else settled
+
+        tmp_path = f"{path}.partial"
+        writer = WRITERS[format](tmp_path)
+        exported = {"threads": 0, "messages": 0}
+        position = None
+        chunk = []
+        try:
+            for position, rows in self.iter_rows(since, until, after):
+                chunk.extend(rows)
+                exported["threads"] += 1
+                exported["messages"] += len(rows)
+                if len(chunk) >= self.chunk_size:
+                    writer.write(chunk)
+                    chunk = []
+            if chunk:
+                writer.write(chunk)
+        except BaseException:
+            writer.close()
+            os.remove(tmp_path)
+            raise
+        writer.close()
+        os.replace(tmp_path, path)
+
+        if state_file and position is not None:
+            save_export_state(state_file, position)
+        return exported
+
+
+def parse_time(value):
+    return datetime.fromisoformat(value)
+
+
+def main():
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Export conversations as JSON Lines or Parquet")
+    parser.add_argument("output", help="File to write")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default=None,
+                        help="Output format (default: from the file extension)")
+    parser.add_argument("--since", type=parse_time, help="Only threads active since this ISO time")
+    parser.add_argument("--until", type=parse_time, help="Only threads last active before this ISO time")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only threads active since the previous incremental export")
+    parser.add_argument("--state-file", default=EXPORT_STATE_FILE,
+                        help="Where incremental exports record their position")
+    parser.add_argument("--chunk-size", type=int, default=EXPORT_CHUNK_SIZE, help="Messages per write")
+    args = parser.parse_args()
+
+    format = args.format or ("parquet" if args.output.endswith(".parquet") else "jsonl")
+    try:
+        exporter = ConversationExporter(chunk_size=args.chunk_size)
+        exported = exporter.export(args.output, format, args.since, args.until,
+                                   args.state_file if args.incremental else None)
+        print(f"📤 Exported {exported['messages']} messages from {exported['threads']} threads to {args.output}")
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,17 @@ import psycopg2
 from datetime import datetime
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
 
+try:
+    from .message_log import resolve_checkpoint
+    from .serializers import CheckpointSerializer
+    from .message_search import SEARCH_THREADS, build_search_query
+    from .thread_summary import select_threads
+except ImportError:
+    from message_log import resolve_checkpoint
+    from serializers import CheckpointSerializer
+    from message_search import SEARCH_THREADS, build_search_query
+    from thread_summary import select_threads
+
 # Load environment variables from .env file if it exists
 try:
     from dotenv import load_dotenv
@@ -28,7 +39,8 @@ class ConversationInspector:
         # If still no DB_URL, try to import from the connect_database module
         if not self.db_url:
             try:
-                from connect_database import memory_saver
+                from connect_database import get_checkpointer
+                memory_saver = get_checkpointer()
                 if hasattr(memory_saver, 'db_url'):
                     self.db_url = memory_saver.db_url
                     print("✓ Using database connection from connect_database module")
@@ -49,18 +61,20 @@ class ConversationInspector:
         if not self.db_url:
             raise ValueError("DATABASE_URL not found. Please set it in your environment variables or .env file.")
     
-    def list_all_threads(self):
-        """List all conversation thread IDs in the database."""
+    def list_all_threads(self, limit=20, after=None):
+        """List conversation threads, most recently active first, one page at a time.
+        
+        Args:
+            limit: Number of threads per page
+            after: Page cursor returned by the previous call, or None for the first page
+        
+        Returns:
+            tuple: (thread IDs of this page, cursor of the next page or None)
+        """
         conn = psycopg2.connect(self.db_url)
         try:
             cursor = conn.cursor()
-            cursor.execute('''
-                SELECT DISTINCT thread_id, COUNT(*) as checkpoint_count, 
-                       MIN(created_at) as first_message, MAX(created_at) as last_message
-                FROM checkpoints 
-                GROUP BY thread_id 
-                ORDER BY last_message DESC
-            ''')
+            cursor.execute(*select_threads(after, limit))
             
             threads = cursor.fetchall()
             print("📋 Available Conversation Threads:")
@@ -68,16 +82,23 @@ class ConversationInspector:
             
             if not threads:
                 print("No conversations found in the database.")
-                return []
+                return [], None
             
-            for thread_id, count, first, last in threads:
+            for thread_id, first, last, count, message_count, language, last_expert in threads:
                 print(f"Thread ID: {thread_id}")
                 print(f"  Checkpoints: {count}")
+                if message_count is not None:
+                    print(f"  Messages: {message_count}")
+                if language:
+                    print(f"  Language: {language}")
+                if last_expert:
+                    print(f"  Last expert: {last_expert}")
                 print(f"  First message: {first}")
                 print(f"  Last message: {last}")
                 print("-" * 80)
             
-            return [thread[0] for thread in threads]
+            next_page = (threads[-1][2], threads[-1][0]) if len(threads) == limit else None
+            return [thread[0] for thread in threads], next_page
         finally:
             conn.close()
     
@@ -87,20 +108,20 @@ class ConversationInspector:
         try:
             cursor = conn.cursor()
             cursor.execute('''
-                SELECT checkpoint, created_at FROM checkpoints 
+                SELECT checkpoint_type, checkpoint_blob, checkpoint, created_at FROM checkpoints 
                 WHERE thread_id = %s AND checkpoint_ns = ''
-                ORDER BY created_at DESC LIMIT 1
+                ORDER BY checkpoint_id DESC LIMIT 1
             ''', (thread_id,))
             
             result = cursor.fetchone()
             if result:
-                checkpoint_data, created_at = result
+                checkpoint_type, checkpoint_blob, checkpoint_data, created_at = result
                 
-                # Handle both JSON string and dict cases
-                if isinstance(checkpoint_data, str):
-                    checkpoint = json.loads(checkpoint_data)
-                else:
-                    checkpoint = checkpoint_data  # Already a dict from JSONB
+                # Handles JSON rows as well as binary (msgpack/zstd) rows
+                checkpoint = CheckpointSerializer().decode(checkpoint_type, checkpoint_blob, checkpoint_data)
+                
+                # Rebuild messages stored in the append-only message log
+                checkpoint = resolve_checkpoint(cursor, thread_id, '', checkpoint)
                 
                 return checkpoint, created_at
             return None, None
@@ -186,20 +207,27 @@ class ConversationInspector:
             print(f"   {content}")
         print()
     
-    def search_conversations(self, keyword):
-        """Search for conversations containing a specific keyword."""
+    def search_conversations(self, keyword, limit=20, offset=0):
+        """Search the message index for conversations containing a keyword, best matches first.
+        
+        Arabic spelling variants (alef/yaa/taa marbuta forms, diacritics) match each other.
+        Use `offset` to page through the results `limit` threads at a time.
+        
+        Returns:
+            list: Matching thread IDs
+        """
+        query = build_search_query(keyword)
+        if query is None:
+            print("❌ Please enter at least one word to search for.")
+            return []
+        
         conn = psycopg2.connect(self.db_url)
         try:
             cursor = conn.cursor()
-            cursor.execute('''
-                SELECT DISTINCT thread_id, checkpoint, created_at 
-                FROM checkpoints 
-                WHERE checkpoint::text ILIKE %s
-                ORDER BY created_at DESC
-            ''', (f'%{keyword}%',))
+            cursor.execute(SEARCH_THREADS, (query, limit, offset))
             
             results = cursor.fetchall()
-            print(f"🔍 Search results for '{keyword}':")
+            print(f"🔍 Search results for '{keyword}' ({offset + 1}-{offset + len(results)}):")
             print("-" * 60)
             
             if not results:
@@ -207,8 +235,12 @@ class ConversationInspector:
                 return []
             
             found_threads = []
-            for thread_id, checkpoint_data, created_at in results:
-                print(f"Thread: {thread_id} (Last updated: {created_at})")
+            for thread_id, rank, hits, last_match, content in results:
+                snippet = " ".join(content.split())
+                if len(snippet) > 120:
+                    snippet = snippet[:120] + "..."
+                print(f"Thread: {thread_id} (matches: {hits}, rank: {rank:.3f}, last match: {last_match})")
+                print(f"   {snippet}")
                 found_threads.append(thread_id)
             
             return found_threads
@@ -234,7 +266,9 @@ def main():
             choice = input("\nEnter your choice (1-4): ").strip()
             
             if choice == "1":
-                inspector.list_all_threads()
+                _, next_page = inspector.list_all_threads()
+                while next_page and input("\nShow more threads? (y/n): ").strip().lower() == 'y':
+                    _, next_page = inspector.list_all_threads(after=next_page)
             
             elif choice == "2":
                 thread_id = input("Enter thread ID to view: ").strip()
@@ -244,7 +278,11 @@ def main():
             elif choice == "3":
                 keyword = input("Enter keyword to search for: ").strip()
                 if keyword:
+                    offset = 0
                     found_threads = inspector.search_conversations(keyword)
+                    while len(found_threads) == 20 and input("\nShow more results? (y/n): ").strip().lower() == 'y':
+                        offset += 20
+                        found_threads = inspector.search_conversations(keyword, offset=offset)
                     if found_threads:
                         view_choice = input("\nView a specific conversation? (y/n): ").strip().lower()
                         if view_choice == 'y':
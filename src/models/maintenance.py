@@ -0,0 +1,419 @@
+"""
+Checkpoint Maintenance for PostgreSQL Database
+Keeps the checkpoint tables bounded: prunes old checkpoints per thread, purges
+threads past a TTL, deletes single threads on request (e.g. privacy requests)
+and compacts the append-only message log.
+
+Retention deletes run in small batches, each in its own short transaction with
+a lock timeout, so the jobs can run next to live traffic. A thread is deleted
+(on request or by the TTL purge) in one transaction across all tables, so a
+failure never leaves part of a conversation behind.
+
+Usage:
+    python maintenance.py prune --keep-last 20
+    python maintenance.py purge --ttl-days 90
+    python maintenance.py delete-thread <thread_id>
+    python maintenance.py run --keep-last 20 --ttl-days 90
+    python maintenance.py reencode --compression zstd
+    python maintenance.py index-search
+    python maintenance.py index-threads
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+import logging
+from datetime import datetime, timedelta
+import psycopg
+
+try:
+    from .message_log import LOCK_THREAD_LOG, resolve_checkpoint
+    from .message_search import index_messages
+    from .thread_summary import (SUBTRACT_THREAD_CHECKPOINTS, UPDATE_THREAD_MESSAGES,
+                                 SELECT_EXPIRED_THREADS, summarize_messages)
+    from .serializers import CheckpointSerializer, load_json
+    from .checkpoint_cache import CACHE_CHANNEL, NOTIFY_CHECKPOINT_WRITE, invalidation_payload
+    from .sqlite_checkpointer import sqlite_path
+except ImportError:
+    from message_log import LOCK_THREAD_LOG, resolve_checkpoint
+    from message_search import index_messages
+    from thread_summary import (SUBTRACT_THREAD_CHECKPOINTS, UPDATE_THREAD_MESSAGES,
+                                SELECT_EXPIRED_THREADS, summarize_messages)
+    from serializers import CheckpointSerializer, load_json
+    from checkpoint_cache import CACHE_CHANNEL, NOTIFY_CHECKPOINT_WRITE, invalidation_payload
+    from sqlite_checkpointer import sqlite_path
+
+# Load environment variables from .env file if it exists
+try:
+    from dotenv import load_dotenv
+    load_dotenv()
+except ImportError:
+    pass  # dotenv not available, continue without it
+
+# Load environment variables
+DB_URL = os.getenv("DATABASE_URL")
+
+# Retention settings (0 disables the corresponding job)
+CHECKPOINT_KEEP_LAST = int(os.getenv("CHECKPOINT_KEEP_LAST", "0"))
+CHECKPOINT_TTL_DAYS = float(os.getenv("CHECKPOINT_TTL_DAYS", "0"))
+CHECKPOINT_MAINTENANCE_INTERVAL = float(os.getenv("CHECKPOINT_MAINTENANCE_INTERVAL", "0"))
+CHECKPOINT_MAINTENANCE_BATCH_SIZE = int(os.getenv("CHECKPOINT_MAINTENANCE_BATCH_SIZE", "500"))
+
+# Every table holding rows of a thread
+THREAD_TABLES = ("checkpoints", "checkpoint_writes", "checkpoint_messages", "message_search", "threads")
+
+# Session-level advisory lock key so only one worker runs maintenance at a time
+MAINTENANCE_LOCK_KEY = 7305_1842
+
+logger = logging.getLogger(__name__)
+
+
+class CheckpointMaintenance:
+    """Batched retention, purge and compaction jobs for the checkpoint tables."""
+
+    def __init__(self, db_url=None, batch_size=CHECKPOINT_MAINTENANCE_BATCH_SIZE,
+                 threads_per_batch=100, pause=0.05, lock_timeout="2s"):
+        self.db_url = db_url or DB_URL
+        if not self.db_url:
+            raise ValueError("DATABASE_URL not found. Please set it in your environment variables or .env file.")
+        if sqlite_path(self.db_url) is not None:
+            raise ValueError("The maintenance jobs need PostgreSQL; SQLite threads are deleted with "
+                             "SqliteCheckpointer.delete_thread()")
+        self.batch_size = batch_size
+        self.threads_per_batch = threads_per_batch
+        self.pause = pause
+        self.lock_timeout = lock_timeout
+
+    def _connect(self):
+        conn = psycopg.connect(self.db_url, autocommit=True)
+        # Give way to live traffic instead of queueing behind its locks
+        conn.execute(f"SET lock_timeout = '{self.lock_timeout}'")
+        return conn
+
+    def _thread_pages(self, conn):
+        """Walk the thread ids in pages using keyset pagination on the summary table's primary key."""
+        last_thread_id = ""
+        while True:
+            rows = conn.execute('''
+                SELECT DISTINCT thread_id FROM threads
+                WHERE thread_id > %s
+                ORDER BY thread_id
+                LIMIT %s
+            ''', (last_thread_id, self.threads_per_batch)).fetchall()
+            if not rows:
+                return
+            page = [row[0] for row in rows]
+            yield page
+            last_thread_id = page[-1]
+
+    def prune_checkpoints(self, keep_last):
+        """Keep only the newest `keep_last` checkpoints of every thread.
+
+        Returns:
+            int: Number of deleted checkpoints
+        """
+        if keep_last < 1:
+            raise ValueError("keep_last must be at least 1 so the latest state is never removed")
+
+        deleted = 0
+        with self._connect() as conn:
+            for page in self._thread_pages(conn):
+                affected = set()
+                while True:
+                    with conn.transaction():
+                        rows = conn.execute('''
+                            DELETE FROM checkpoints WHERE ctid IN (
+                                SELECT ctid FROM (
+                                    SELECT ctid, row_number() OVER (
+                                        PARTITION BY thread_id, checkpoint_ns ORDER BY checkpoint_id DESC
+                                    ) AS rn
+                                    FROM checkpoints WHERE thread_id = ANY(%s)
+                                ) ranked
+                                WHERE rn > %s
+                                LIMIT %s
+                            )
+                            RETURNING thread_id, checkpoint_ns, checkpoint_id
+                        ''', (page, keep_last, self.batch_size)).fetchall()
+                        if rows:
+                            # Pending writes of the pruned checkpoints can never be resumed
+                            conn.execute('''
+                                DELETE FROM checkpoint_writes
+                                WHERE (thread_id, checkpoint_ns, checkpoint_id) IN (
+                                    SELECT * FROM unnest(%s::text[], %s::text[], %s::text[])
+                                )
+                            ''', [list(column) for column in zip(*rows)])
+                            conn.execute(SUBTRACT_THREAD_CHECKPOINTS,
+                                         ([row[0] for row in rows], [row[1] for row in rows]))
+                    deleted += len(rows)
+                    affected.update((thread_id, checkpoint_ns) for thread_id, checkpoint_ns, _ in rows)
+                    time.sleep(self.pause)
+                    if len(rows) < self.batch_size:
+                        break
+
+                for thread_id, checkpoint_ns in affected:
+                    self._compact_message_log(conn, thread_id, checkpoint_ns)
+        return deleted
+
+    def purge_expired_threads(self, ttl_days):
+        """Delete every thread whose latest checkpoint is older than `ttl_days`.
+
+        Returns:
+            int: Number of purged threads
+        """
+        cutoff = datetime.now() - timedelta(days=ttl_days)
+        purged = 0
+        with self._connect() as conn:
+            while True:
+                # Deleted threads leave the summary table, so every page starts from the oldest again
+                expired = conn.execute(SELECT_EXPIRED_THREADS, (cutoff, self.threads_per_batch)).fetchall()
+                for (thread_id,) in expired:
+                    self._delete_thread(conn, thread_id)
+                    purged += 1
+                    time.sleep(self.pause)
+                if len(expired) < self.threads_per_batch:
+                    return purged
+
+    def delete_thread(self, thread_id):
+        """Delete all stored data of one thread.
+
+        Returns:
+            int: Number of deleted rows across the checkpoint tables
+        """
+        with self._connect() as conn:
+            return self._delete_thread(conn, thread_id)
+
+    def _delete_thread(self, conn, thread_id):
+        """Delete all rows of one thread in a single transaction: either all of them go or none."""
+        with conn.transaction():
+            namespaces = conn.execute("SELECT DISTINCT checkpoint_ns FROM checkpoint_messages WHERE thread_id = %s",
+                                      (thread_id,)).fetchall()
+            # Same lock as the message log writers, so no segment is extended while it is removed
+            for (checkpoint_ns,) in namespaces:
+                conn.execute(LOCK_THREAD_LOG, (f"{thread_id}:{checkpoint_ns}",))
+            deleted = sum(conn.execute(f"DELETE FROM {table} WHERE thread_id = %s", (thread_id,)).rowcount
+                          for table in THREAD_TABLES)
+            # Drop the thread from the checkpointers' latest-checkpoint caches (sent on commit)
+            conn.execute(NOTIFY_CHECKPOINT_WRITE, (CACHE_CHANNEL, invalidation_payload(thread_id, "maintenance")))
+        return deleted
+
+    def _compact_message_log(self, conn, thread_id, checkpoint_ns):
+        """Delete message log rows that no remaining checkpoint of the thread references."""
+        deleted = 0
+        while True:
+            with conn.transaction():
+                # Same lock as the writers, so a segment being extended is never removed
+                conn.execute(LOCK_THREAD_LOG, (f"{thread_id}:{checkpoint_ns}",))
+                count = conn.execute('''
+                    DELETE FROM checkpoint_messages WHERE ctid IN (
+                        SELECT ctid FROM checkpoint_messages
+                        WHERE thread_id = %s AND checkpoint_ns = %s
+                          AND seq < COALESCE((
+                              SELECT MIN(messages_from)
+                              FROM checkpoints WHERE thread_id = %s AND checkpoint_ns = %s
+                          ), 'Infinity'::numeric)
+                        LIMIT %s
+                    )
+                ''', (thread_id, checkpoint_ns, thread_id, checkpoint_ns, self.batch_size)).rowcount
+            deleted += count
+            if count < self.batch_size:
+                return deleted
+            time.sleep(self.pause)
+
+    def reencode_checkpoints(self, serializer=None):
+        """Rewrite checkpoints stored as JSONB into the binary checkpoint format.
+        
+        Returns:
+            int: Number of re-encoded checkpoints
+        """
+        serializer = serializer or CheckpointSerializer(format="msgpack")
+        if serializer.format == "json":
+            raise ValueError("Re-encoding needs a binary serializer format")
+        
+        reencoded = 0
+        # Keyset pagination on the primary key: each batch continues where the previous one
+        # stopped instead of scanning the table again for the rows still to convert
+        last_key = ("", "", "")
+        with self._connect() as conn:
+            while True:
+                with conn.transaction():
+                    rows = conn.execute('''
+                        SELECT thread_id, checkpoint_ns, checkpoint_id, checkpoint FROM checkpoints
+                        WHERE (thread_id, checkpoint_ns, checkpoint_id) > (%s, %s, %s)
+                          AND checkpoint_type IS NULL AND checkpoint IS NOT NULL
+                        ORDER BY thread_id, checkpoint_ns, checkpoint_id
+                        LIMIT %s
+                        FOR UPDATE SKIP LOCKED
+                    ''', (*last_key, self.batch_size)).fetchall()
+                    updates = []
+                    for thread_id, checkpoint_ns, checkpoint_id, checkpoint in rows:
+                        _, checkpoint_type, blob = serializer.encode(load_json(checkpoint))
+                        updates.append((checkpoint_type, blob, thread_id, checkpoint_ns, checkpoint_id))
+                    conn.cursor().executemany('''
+                        UPDATE checkpoints SET checkpoint = NULL, checkpoint_type = %s, checkpoint_blob = %s
+                        WHERE thread_id = %s AND checkpoint_ns = %s AND checkpoint_id = %s
+                    ''', updates)
+                # Rows locked by live writes are skipped; the next run converts them
+                if not rows:
+                    return reencoded
+                reencoded += len(rows)
+                last_key = rows[-1][:3]
+                time.sleep(self.pause)
+
+    def rebuild_search_index(self):
+        """Add the messages of every thread's latest checkpoint to the full-text search index.
+        
+        Needed once for conversations stored before the index existed; new messages
+        are indexed by the checkpointers as they are written.
+        
+        Returns:
+            int: Number of indexed threads
+        """
+        serializer = CheckpointSerializer()
+        indexed = 0
+        with self._connect() as conn:
+            for page in self._thread_pages(conn):
+                for thread_id in page:
+                    with conn.transaction():
+                        cursor = conn.cursor()
+                        messages = self._latest_messages(cursor, thread_id, serializer)
+                        if isinstance(messages, list):
+                            index_messages(cursor, thread_id, '', messages)
+                            indexed += 1
+                time.sleep(self.pause)
+        return indexed
+
+    def refresh_thread_summaries(self):
+        """Fill in the message count, language and last expert of every thread summary.
+        
+        The migration creating the summary table derives the activity figures from the
+        stored checkpoints; the message figures need the latest checkpoint decoded.
+        
+        Returns:
+            int: Number of updated threads
+        """
+        serializer = CheckpointSerializer()
+        updated = 0
+        with self._connect() as conn:
+            for page in self._thread_pages(conn):
+                for thread_id in page:
+                    with conn.transaction():
+                        cursor = conn.cursor()
+                        message_count, language, last_expert = summarize_messages(
+                            self._latest_messages(cursor, thread_id, serializer))
+                        if message_count is not None:
+                            cursor.execute(UPDATE_THREAD_MESSAGES,
+                                           (message_count, language, last_expert, thread_id, ''))
+                            updated += cursor.rowcount
+                time.sleep(self.pause)
+        return updated
+
+    def _latest_messages(self, cursor, thread_id, serializer):
+        """Messages of the latest checkpoint of a thread, or None."""
+        row = cursor.execute('''
+            SELECT checkpoint_type, checkpoint_blob, checkpoint FROM checkpoints
+            WHERE thread_id = %s AND checkpoint_ns = ''
+            ORDER BY checkpoint_id DESC LIMIT 1
+        ''', (thread_id,)).fetchone()
+        if row is None:
+            return None
+        checkpoint = resolve_checkpoint(cursor, thread_id, '', serializer.decode(*row))
+        return (checkpoint.get('channel_values') or {}).get('messages')
+
+    def run(self, keep_last=CHECKPOINT_KEEP_LAST, ttl_days=CHECKPOINT_TTL_DAYS):
+        """Run the configured jobs, skipping if another worker is already running them.
+
+        Returns:
+            dict: Counts per job, or None if another worker holds the maintenance lock
+        """
+        with psycopg.connect(self.db_url, autocommit=True) as lock_conn:
+            locked = lock_conn.execute("SELECT pg_try_advisory_lock(%s)", (MAINTENANCE_LOCK_KEY,)).fetchone()[0]
+            if not locked:
+                return None
+            try:
+                results = {}
+                if ttl_days:
+                    results["purged_threads"] = self.purge_expired_threads(ttl_days)
+                if keep_last:
+                    results["pruned_checkpoints"] = self.prune_checkpoints(keep_last)
+                return results
+            finally:
+                lock_conn.execute("SELECT pg_advisory_unlock(%s)", (MAINTENANCE_LOCK_KEY,))
+
+
+async def run_periodically(interval=CHECKPOINT_MAINTENANCE_INTERVAL, keep_last=CHECKPOINT_KEEP_LAST,
+                           ttl_days=CHECKPOINT_TTL_DAYS, db_url=None):
+    """Background task running the maintenance jobs every `interval` seconds."""
+    if sqlite_path(db_url or DB_URL) is not None:
+        # The jobs are written for PostgreSQL; failing every interval would only fill the log
+        logger.warning("Checkpoint maintenance is not available for SQLite databases; not scheduled")
+        return
+    maintenance = CheckpointMaintenance(db_url)
+    while True:
+        try:
+            results = await asyncio.to_thread(maintenance.run, keep_last, ttl_days)
+            if results:
+                logger.info(f"Checkpoint maintenance finished: {results}")
+        except Exception:
+            logger.exception("Checkpoint maintenance failed")
+        await asyncio.sleep(interval)
+
+
+def main():
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Checkpoint retention and purge jobs")
+    parser.add_argument("--batch-size", type=int, default=CHECKPOINT_MAINTENANCE_BATCH_SIZE)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    prune = subparsers.add_parser("prune", help="Keep only the newest checkpoints per thread")
+    prune.add_argument("--keep-last", type=int, required=True)
+
+    purge = subparsers.add_parser("purge", help="Delete threads inactive for longer than the TTL")
+    purge.add_argument("--ttl-days", type=float, required=True)
+
+    delete = subparsers.add_parser("delete-thread", help="Delete all data of one thread")
+    delete.add_argument("thread_id")
+
+    run = subparsers.add_parser("run", help="Run the configured retention jobs once")
+    run.add_argument("--keep-last", type=int, default=CHECKPOINT_KEEP_LAST)
+    run.add_argument("--ttl-days", type=float, default=CHECKPOINT_TTL_DAYS)
+
+    reencode = subparsers.add_parser("reencode", help="Convert JSONB checkpoints to the binary format")
+    reencode.add_argument("--compression", choices=["none", "zstd"], default="none")
+
+    subparsers.add_parser("index-search", help="Add stored conversations to the full-text search index")
+    subparsers.add_parser("index-threads", help="Fill in the message figures of the thread summaries")
+
+    args = parser.parse_args()
+
+    try:
+        maintenance = CheckpointMaintenance(batch_size=args.batch_size)
+
+        if args.command == "prune":
+            print(f"🧹 Pruned {maintenance.prune_checkpoints(args.keep_last)} checkpoints")
+        elif args.command == "purge":
+            print(f"🧹 Purged {maintenance.purge_expired_threads(args.ttl_days)} expired threads")
+        elif args.command == "delete-thread":
+            print(f"🗑️ Deleted {maintenance.delete_thread(args.thread_id)} rows for thread {args.thread_id}")
+        elif args.command == "run":
+            results = maintenance.run(args.keep_last, args.ttl_days)
+            if results is None:
+                print("⏳ Maintenance is already running in another process")
+            else:
+                print(f"🧹 Maintenance finished: {results}")
+        elif args.command == "reencode":
+            serializer = CheckpointSerializer(format="msgpack", compression=args.compression)
+            print(f"📦 Re-encoded {maintenance.reencode_checkpoints(serializer)} checkpoints as {serializer.name}")
+        elif args.command == "index-search":
+            print(f"🔍 Indexed the messages of {maintenance.rebuild_search_index()} threads")
+        elif args.command == "index-threads":
+            print(f"📇 Updated the summaries of {maintenance.refresh_thread_summaries()} threads")
+
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+Append-only message log for conversation checkpoints.
+
+In ``message_log`` storage mode the checkpointer stores every message once in
+the ``checkpoint_messages`` table and the checkpoint row only keeps a reference
+to a contiguous range of that log, so the cost of a write no longer depends on
+the length of the conversation.
+
+Each log row carries a hash chained over its segment up to and including
+itself, so a write only extends a segment whose logged messages are exactly
+the start of the new list (same ids and contents); anything else, such as a
+message replaced by id, starts a new segment.
+"""
+
+import json
+import hashlib
+from psycopg.types.json import Jsonb
+from langchain_core.messages import BaseMessage, message_to_dict, messages_from_dict
+
+# Key used in place of the messages list inside a stored checkpoint
+MESSAGE_LOG_REF = "__message_log__"
+
+CREATE_MESSAGE_LOG_TABLE = '''
+    CREATE TABLE IF NOT EXISTS checkpoint_messages (
+        thread_id TEXT NOT NULL,
+        checkpoint_ns TEXT NOT NULL DEFAULT '',
+        seq BIGINT NOT NULL,
+        segment_start BIGINT NOT NULL,
+        message_id TEXT,
+        message JSONB NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (thread_id, checkpoint_ns, seq)
+    )
+'''
+
+# Rows logged before the hash chain have none and are never extended
+ADD_MESSAGE_LOG_PREFIX_HASH = "ALTER TABLE checkpoint_messages ADD COLUMN IF NOT EXISTS prefix_hash TEXT"
+
+# Serializes concurrent writers of the same thread so sequence numbers don't collide
+LOCK_THREAD_LOG = "SELECT pg_advisory_xact_lock(hashtext(%s))"
+
+SELECT_LOG_TAIL = '''
+    SELECT seq, segment_start, prefix_hash FROM checkpoint_messages
+    WHERE thread_id = %s AND checkpoint_ns = %s
+    ORDER BY seq DESC LIMIT 1
+'''
+
+INSERT_LOG_MESSAGE = '''
+    INSERT INTO checkpoint_messages (thread_id, checkpoint_ns, seq, segment_start, message_id, message, prefix_hash)
+    VALUES (%s, %s, %s, %s, %s, %s, %s)
+'''
+
+SELECT_LOG_RANGE = '''
+    SELECT message FROM checkpoint_messages
+    WHERE thread_id = %s AND checkpoint_ns = %s AND seq >= %s AND seq < %s
+    ORDER BY seq
+'''
+
+
+def can_log_messages(messages):
+    """Return True if the value is a list of LangChain messages."""
+    return isinstance(messages, list) and all(isinstance(m, BaseMessage) for m in messages)
+
+
+def is_message_log_ref(value):
+    """Return True if a stored channel value is a message log reference."""
+    return isinstance(value, dict) and MESSAGE_LOG_REF in value
+
+
+def _prefix_hashes(messages):
+    """Hash of every prefix of the list: hashes[i] covers messages[0..i], ids and contents."""
+    hashes = []
+    digest = b""
+    for message in messages:
+        encoded = json.dumps(message_to_dict(message), sort_keys=True, default=str).encode("utf-8")
+        digest = hashlib.sha256(digest + encoded).digest()
+        hashes.append(digest.hex())
+    return hashes
+
+
+def _plan_append(tail, messages, hashes):
+    """Work out which messages still need to be logged.
+
+    Messages are assumed to be append-only (which is how ``add_messages`` grows
+    the list). If the logged segment is not exactly the start of the list, for
+    example after a message was removed or replaced by id, a new segment holding
+    the whole list is started.
+
+    Returns:
+        tuple: (segment start, first new sequence number, index of the first message to append)
+    """
+    if tail is None:
+        return 0, 0, 0
+    
+    last_seq, segment_start, prefix_hash = tail
+    position = last_seq - segment_start
+    if position < len(messages) and prefix_hash is not None and hashes[position] == prefix_hash:
+        return segment_start, last_seq + 1, position + 1
+    return last_seq + 1, last_seq + 1, 0
+
+
+def _log_rows(thread_id, checkpoint_ns, segment_start, next_seq, messages, hashes, first):
+    return [
+        (thread_id, checkpoint_ns, next_seq + i, segment_start, message.id, Jsonb(message_to_dict(message)),
+         hashes[first + i])
+        for i, message in enumerate(messages[first:])
+    ]
+
+
+def _log_ref(segment_start, messages):
+    return {MESSAGE_LOG_REF: {"from": segment_start, "to": segment_start + len(messages)}}
+
+
+def append_messages(cursor, thread_id, checkpoint_ns, messages):
+    """Append the messages not yet in the log and return a reference to the full list.
+
+    Returns:
+        tuple: (reference dict, list of newly appended messages)
+    """
+    cursor.execute(LOCK_THREAD_LOG, (f"{thread_id}:{checkpoint_ns}",))
+    cursor.execute(SELECT_LOG_TAIL, (thread_id, checkpoint_ns))
+    hashes = _prefix_hashes(messages)
+    segment_start, next_seq, first = _plan_append(cursor.fetchone(), messages, hashes)
+    
+    if first < len(messages):
+        cursor.executemany(INSERT_LOG_MESSAGE,
+                           _log_rows(thread_id, checkpoint_ns, segment_start, next_seq, messages, hashes, first))
+    
+    return _log_ref(segment_start, messages), messages[first:]
+
+
+async def aappend_messages(cursor, thread_id, checkpoint_ns, messages):
+    """Async version of append_messages for psycopg async cursors."""
+    await cursor.execute(LOCK_THREAD_LOG, (f"{thread_id}:{checkpoint_ns}",))
+    await cursor.execute(SELECT_LOG_TAIL, (thread_id, checkpoint_ns))
+    hashes = _prefix_hashes(messages)
+    segment_start, next_seq, first = _plan_append(await cursor.fetchone(), messages, hashes)
+    
+    if first < len(messages):
+        await cursor.executemany(INSERT_LOG_MESSAGE,
+                                 _log_rows(thread_id, checkpoint_ns, segment_start, next_seq, messages, hashes, first))
+    
+    return _log_ref(segment_start, messages), messages[first:]
+
+
+def load_messages(cursor, thread_id, checkpoint_ns, ref):
+    """Rebuild the messages list referenced by a stored checkpoint."""
+    bounds = ref[MESSAGE_LOG_REF]
+    cursor.execute(SELECT_LOG_RANGE, (thread_id, checkpoint_ns, bounds["from"], bounds["to"]))
+    return messages_from_dict([row[0] for row in cursor.fetchall()])
+
+
+async def aload_messages(cursor, thread_id, checkpoint_ns, ref):
+    """Async version of load_messages for psycopg async cursors."""
+    bounds = ref[MESSAGE_LOG_REF]
+    await cursor.execute(SELECT_LOG_RANGE, (thread_id, checkpoint_ns, bounds["from"], bounds["to"]))
+    return messages_from_dict([row[0] for row in await cursor.fetchall()])
+
+
+def _with_messages(checkpoint, messages):
+    return {**checkpoint, 'channel_values': {**checkpoint['channel_values'], 'messages': messages}}
+
+
+def _message_ref(checkpoint):
+    channel_values = checkpoint.get('channel_values') or {}
+    ref = channel_values.get('messages')
+    return ref if is_message_log_ref(ref) else None
+
+
+def resolve_checkpoint(cursor, thread_id, checkpoint_ns, checkpoint):
+    """Replace a message log reference in a loaded checkpoint with the actual messages."""
+    ref = _message_ref(checkpoint)
+    if ref is None:
+        return checkpoint
+    return _with_messages(checkpoint, load_messages(cursor, thread_id, checkpoint_ns, ref))
+
+
+async def aresolve_checkpoint(cursor, thread_id, checkpoint_ns, checkpoint):
+    """Async version of resolve_checkpoint for psycopg async cursors."""
+    ref = _message_ref(checkpoint)
+    if ref is None:
+        return checkpoint
+    return _with_messages(checkpoint, await aload_messages(cursor, thread_id, checkpoint_ns, ref))
@@ -0,0 +1,157 @@
+"""
+Full-text search index over conversation messages.
+
+Every message written by the PostgreSQL checkpointers is also stored once in
+``message_search`` with a ``tsvector`` of its normalized text (see
+utils/language.py), backed by a GIN index. Searching is then an index lookup
+ranked with ts_rank_cd and grouped by thread, instead of a sequential
+``ILIKE`` scan over every checkpoint.
+
+The ``simple`` text search configuration is used for both Arabic and English:
+it does not stem, so queries match word prefixes instead.
+"""
+
+import os
+import re
+import sys
+from langchain_core.messages import BaseMessage
+
+# Add the src directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.language import detect_language, normalize_for_search
+
+# Load environment variables
+CHECKPOINT_SEARCH_INDEX = os.getenv("CHECKPOINT_SEARCH_INDEX", "true").lower() in ("1", "true", "yes")
+
+# Without the message log, the newest messages of each checkpoint are checked against the
+# index; a step adds far fewer messages than this
+SEARCH_INDEX_TAIL = 16
+
+# Messages longer than this are indexed by their beginning only (tsvector has a 1MB limit)
+MAX_INDEXED_CHARS = 20000
+
+CREATE_MESSAGE_SEARCH_TABLE = '''
+    CREATE TABLE IF NOT EXISTS message_search (
+        thread_id TEXT NOT NULL,
+        checkpoint_ns TEXT NOT NULL DEFAULT '',
+        message_id TEXT NOT NULL,
+        role TEXT NOT NULL,
+        language TEXT NOT NULL,
+        content TEXT NOT NULL,
+        document TSVECTOR NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (thread_id, checkpoint_ns, message_id)
+    )
+'''
+
+CREATE_MESSAGE_SEARCH_INDEX = '''
+    CREATE INDEX CONCURRENTLY IF NOT EXISTS message_search_document_idx
+    ON message_search USING GIN (document)
+'''
+
+# One statement per checkpoint; messages that are already indexed are filtered out before
+# their tsvector is computed
+INSERT_SEARCH_MESSAGES = '''
+    INSERT INTO message_search (thread_id, checkpoint_ns, message_id, role, language, content, document)
+    SELECT %s, %s, m.message_id, m.role, m.language, m.content, to_tsvector('simple', m.normalized)
+    FROM unnest(%s::text[], %s::text[], %s::text[], %s::text[], %s::text[])
+         AS m(message_id, role, language, content, normalized)
+    WHERE NOT EXISTS (
+        SELECT 1 FROM message_search s
+        WHERE s.thread_id = %s AND s.checkpoint_ns = %s AND s.message_id = m.message_id
+    )
+    ON CONFLICT (thread_id, checkpoint_ns, message_id) DO NOTHING
+'''
+
+# Best-ranked message of each matching thread, best threads first
+SEARCH_THREADS = '''
+    SELECT thread_id, rank, hits, last_match, content FROM (
+        SELECT thread_id, content, created_at,
+               ts_rank_cd(document, query) AS rank,
+               COUNT(*) OVER (PARTITION BY thread_id) AS hits,
+               MAX(created_at) OVER (PARTITION BY thread_id) AS last_match,
+               row_number() OVER (PARTITION BY thread_id ORDER BY ts_rank_cd(document, query) DESC) AS best
+        FROM message_search, to_tsquery('simple', %s) AS query
+        WHERE document @@ query
+    ) matches
+    WHERE best = 1
+    ORDER BY rank DESC, last_match DESC, thread_id
+    LIMIT %s OFFSET %s
+'''
+
+WORD = re.compile(r'\w+')
+
+
+def message_text(message):
+    """Plain text of a message, including the text parts of multi-part content."""
+    content = message.content
+    if isinstance(content, str):
+        return content
+    parts = []
+    for part in content or []:
+        if isinstance(part, str):
+            parts.append(part)
+        elif isinstance(part, dict) and part.get("type") == "text":
+            parts.append(part.get("text", ""))
+    return " ".join(parts)
+
+
+def search_params(thread_id, checkpoint_ns, messages):
+    """Build the INSERT_SEARCH_MESSAGES parameters for the messages that have an id and some text.
+
+    Returns:
+        tuple: Statement parameters, or None if there is nothing to index
+    """
+    columns = ([], [], [], [], [])
+    for message in messages:
+        if not isinstance(message, BaseMessage) or not message.id:
+            continue
+        text = message_text(message).strip()[:MAX_INDEXED_CHARS]
+        if not text:
+            continue
+        for column, value in zip(columns, (message.id, message.type, detect_language(text),
+                                           text, normalize_for_search(text))):
+            column.append(value)
+    if not columns[0]:
+        return None
+    return (thread_id, checkpoint_ns, *columns, thread_id, checkpoint_ns)
+
+
+def messages_to_index(messages, new_messages=None):
+    """Pick the messages of a checkpoint that may not be indexed yet.
+
+    Returns:
+        list: `new_messages` when the caller knows them (message log mode), else the newest messages
+    """
+    if new_messages is not None:
+        return new_messages
+    if not isinstance(messages, list):
+        return []
+    return messages[-SEARCH_INDEX_TAIL:]
+
+
+def index_messages(cursor, thread_id, checkpoint_ns, messages):
+    """Add messages to the search index; already indexed messages are skipped."""
+    params = search_params(thread_id, checkpoint_ns, messages)
+    if params:
+        cursor.execute(INSERT_SEARCH_MESSAGES, params)
+
+
+async def aindex_messages(cursor, thread_id, checkpoint_ns, messages):
+    """Async version of index_messages for psycopg async cursors."""
+    params = search_params(thread_id, checkpoint_ns, messages)
+    if params:
+        await cursor.execute(INSERT_SEARCH_MESSAGES, params)
+
+
+def build_search_query(keyword):
+    """Turn user input into a tsquery matching messages that contain every word (as a prefix).
+
+    Returns:
+        str: tsquery text, or None if the input has no searchable words
+    """
+    words = WORD.findall(normalize_for_search(keyword))
+    if not words:
+        return None
+    return " & ".join(f"{word}:*" for word in words)
@@ -0,0 +1,91 @@
+"""
+Versioned schema migrations for the checkpoint tables.
+
+Each entry of MIGRATIONS runs once per database, in order, and the applied
+version is recorded in ``checkpoint_migrations``. Statements run in
+autocommit mode so indexes can be built CONCURRENTLY on large tables, and a
+session advisory lock keeps several workers from migrating at the same time.
+"""
+
+import psycopg
+
+try:
+    from .checkpoint_sql import CREATE_CHECKPOINTS_TABLE, CREATE_CHECKPOINT_WRITES_TABLE
+    from .message_log import CREATE_MESSAGE_LOG_TABLE, MESSAGE_LOG_REF, ADD_MESSAGE_LOG_PREFIX_HASH
+    from .message_search import CREATE_MESSAGE_SEARCH_TABLE, CREATE_MESSAGE_SEARCH_INDEX
+    from .thread_summary import CREATE_THREADS_TABLE, CREATE_THREADS_ACTIVITY_INDEX, BACKFILL_THREADS
+except ImportError:
+    from checkpoint_sql import CREATE_CHECKPOINTS_TABLE, CREATE_CHECKPOINT_WRITES_TABLE
+    from message_log import CREATE_MESSAGE_LOG_TABLE, MESSAGE_LOG_REF, ADD_MESSAGE_LOG_PREFIX_HASH
+    from message_search import CREATE_MESSAGE_SEARCH_TABLE, CREATE_MESSAGE_SEARCH_INDEX
+    from thread_summary import CREATE_THREADS_TABLE, CREATE_THREADS_ACTIVITY_INDEX, BACKFILL_THREADS
+
+MIGRATIONS_LOCK_KEY = 7305_1841
+
+MIGRATIONS = [
+    # 0: tables created by earlier versions with CREATE TABLE IF NOT EXISTS
+    CREATE_CHECKPOINTS_TABLE,
+    CREATE_MESSAGE_LOG_TABLE,
+    # 2: parent pointer, so CheckpointTuple.parent_config can be filled in
+    "ALTER TABLE checkpoints ADD COLUMN IF NOT EXISTS parent_checkpoint_id TEXT",
+    # 3: ids derived from hash(str(checkpoint)) neither sort nor match across workers.
+    # Rewrite them to ids that sort by creation time and before any uuid6 id.
+    '''
+    UPDATE checkpoints c
+    SET checkpoint_id = legacy.new_id
+    FROM (
+        SELECT thread_id, checkpoint_ns, checkpoint_id,
+               '00000000-0000-6000-8000-' || lpad(to_hex(row_number() OVER (
+                   PARTITION BY thread_id, checkpoint_ns ORDER BY created_at, checkpoint_id
+               )), 12, '0') AS new_id
+        FROM checkpoints
+        WHERE checkpoint_id !~ '^[0-9a-f]{8}-[0-9a-f]{4}-'
+    ) legacy
+    WHERE c.thread_id = legacy.thread_id
+      AND c.checkpoint_ns = legacy.checkpoint_ns
+      AND c.checkpoint_id = legacy.checkpoint_id
+    ''',
+    # 4: was a second index on the primary key columns; the primary key already serves the
+    # latest-checkpoint lookup (scanned backwards), see 17. Kept as a no-op so versions don't shift.
+    "SELECT 1",
+    # 5: binary checkpoint encodings (see serializers.py); JSONB stays for the "json" format
+    "ALTER TABLE checkpoints ALTER COLUMN checkpoint DROP NOT NULL",
+    "ALTER TABLE checkpoints ADD COLUMN IF NOT EXISTS checkpoint_type TEXT",
+    "ALTER TABLE checkpoints ADD COLUMN IF NOT EXISTS checkpoint_blob BYTEA",
+    # 8: start of the message log range a checkpoint references, readable without decoding the row
+    "ALTER TABLE checkpoints ADD COLUMN IF NOT EXISTS messages_from BIGINT",
+    f'''
+    UPDATE checkpoints
+    SET messages_from = (checkpoint->'channel_values'->'messages'->'{MESSAGE_LOG_REF}'->>'from')::bigint
+    WHERE checkpoint->'channel_values'->'messages' ? '{MESSAGE_LOG_REF}'
+    ''',
+    # 10: pending writes, returned in CheckpointTuple.pending_writes
+    CREATE_CHECKPOINT_WRITES_TABLE,
+    # 11: full-text search over messages; existing threads are indexed by `maintenance.py index-search`
+    CREATE_MESSAGE_SEARCH_TABLE,
+    CREATE_MESSAGE_SEARCH_INDEX,
+    # 13: per-thread summary kept up to date by the checkpointers; `maintenance.py index-threads`
+    # fills in the message figures of existing threads
+    CREATE_THREADS_TABLE,
+    BACKFILL_THREADS,
+    CREATE_THREADS_ACTIVITY_INDEX,
+    # 16: hash chain over each message log segment, so a replaced message starts a new segment
+    ADD_MESSAGE_LOG_PREFIX_HASH,
+    # 17: databases that ran the old migration 4 drop the redundant index
+    "DROP INDEX CONCURRENTLY IF EXISTS checkpoints_thread_latest_idx",
+]
+
+
+def run_migrations(db_url):
+    """Apply the migrations that have not run on this database yet."""
+    with psycopg.connect(db_url, autocommit=True) as conn:
+        conn.execute("SELECT pg_advisory_lock(%s)", (MIGRATIONS_LOCK_KEY,))
+        try:
+            conn.execute("CREATE TABLE IF NOT EXISTS checkpoint_migrations (v INTEGER PRIMARY KEY)")
+            row = conn.execute("SELECT MAX(v) FROM checkpoint_migrations").fetchone()
+            version = -1 if row[0] is None else row[0]
+            for v in range(version + 1, len(MIGRATIONS)):
+                conn.execute(MIGRATIONS[v])
+                conn.execute("INSERT INTO checkpoint_migrations (v) VALUES (%s)", (v,))
+        finally:
+            conn.execute("SELECT pg_advisory_unlock(%s)", (MIGRATIONS_LOCK_KEY,))
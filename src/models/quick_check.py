@@ -21,7 +21,7 @@ def quick_check(thread_id=None):
             inspector.display_conversation(thread_id)
         else:
             print("🔍 Finding latest conversations...")
-            threads = inspector.list_all_threads()
+            threads, _ = inspector.list_all_threads(limit=5)
             
             if threads:
                 print(f"\n📋 Displaying latest conversation: {threads[0]}")
@@ -0,0 +1,404 @@
+"""
+Embedded SQLite checkpointer for single-node installs.
+
+Uses the same layout as the PostgreSQL checkpointer (a ``checkpoints`` table
+keyed by thread, namespace and time-ordered checkpoint id, plus
+``checkpoint_writes`` for pending writes) in a SQLite database file in WAL
+mode, so readers never block the writer.
+
+SQLite allows one writer at a time, so every write goes through a single
+writer thread that owns the only write connection. Writes queued while a
+transaction is running are committed together in the next one. Reads use a
+connection per calling thread, closed when that thread exits. Statements are fixed strings with ``?``
+parameters, so SQLite's per-connection statement cache prepares each of them
+once.
+
+Select it with ``DATABASE_URL=sqlite:///path/to/checkpoints.db``.
+"""
+
+import os
+import queue
+import asyncio
+import sqlite3
+import threading
+import weakref
+from concurrent.futures import Future
+from langgraph.checkpoint.base import CheckpointTuple, WRITES_IDX_MAP
+
+try:
+    from .checkpoint_sql import checkpoint_id_for, checkpoint_config, group_pending_writes
+    from .serializers import CheckpointSerializer, json_dumps, load_json
+except ImportError:
+    from checkpoint_sql import checkpoint_id_for, checkpoint_config, group_pending_writes
+    from serializers import CheckpointSerializer, json_dumps, load_json
+
+SQLITE_URL_PREFIX = "sqlite:///"
+
+# Writes committed together in one transaction by the writer thread
+SQLITE_WRITE_BATCH_SIZE = int(os.getenv("SQLITE_WRITE_BATCH_SIZE", "64"))
+
+SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS checkpoints (
+        thread_id TEXT NOT NULL,
+        checkpoint_ns TEXT NOT NULL DEFAULT '',
+        checkpoint_id TEXT NOT NULL,
+        parent_checkpoint_id TEXT,
+        checkpoint TEXT,
+        checkpoint_type TEXT,
+        checkpoint_blob BLOB,
+        metadata TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+    ) WITHOUT ROWID;
+    CREATE TABLE IF NOT EXISTS checkpoint_writes (
+        thread_id TEXT NOT NULL,
+        checkpoint_ns TEXT NOT NULL DEFAULT '',
+        checkpoint_id TEXT NOT NULL,
+        task_id TEXT NOT NULL,
+        idx INTEGER NOT NULL,
+        channel TEXT NOT NULL,
+        type TEXT,
+        blob BLOB,
+        task_path TEXT NOT NULL DEFAULT '',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+    ) WITHOUT ROWID;
+'''
+
+UPSERT_CHECKPOINT = '''
+    INSERT INTO checkpoints (thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id,
+                             checkpoint, checkpoint_type, checkpoint_blob, metadata)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (thread_id, checkpoint_ns, checkpoint_id)
+    DO UPDATE SET checkpoint = excluded.checkpoint, checkpoint_type = excluded.checkpoint_type,
+                  checkpoint_blob = excluded.checkpoint_blob, metadata = excluded.metadata
+'''
+
+SELECT_COLUMNS = "SELECT checkpoint_id, parent_checkpoint_id, checkpoint_type, checkpoint_blob, checkpoint, metadata"
+
+# The primary key is ordered by checkpoint_id, so this is a backward scan that stops after one row
+SELECT_LATEST_CHECKPOINT = f'''
+    {SELECT_COLUMNS} FROM checkpoints
+    WHERE thread_id = ? AND checkpoint_ns = ?
+    ORDER BY checkpoint_id DESC LIMIT 1
+'''
+
+SELECT_CHECKPOINT_BY_ID = f'''
+    {SELECT_COLUMNS} FROM checkpoints
+    WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?
+'''
+
+# NULL bounds disable the filters, so one prepared statement serves every list() call
+SELECT_CHECKPOINTS = f'''
+    {SELECT_COLUMNS} FROM checkpoints
+    WHERE thread_id = ? AND checkpoint_ns = ? AND (? IS NULL OR checkpoint_id < ?)
+    ORDER BY checkpoint_id DESC
+    LIMIT ?
+'''
+
+INSERT_CHECKPOINT_WRITES = '''
+    INSERT INTO checkpoint_writes (thread_id, checkpoint_ns, checkpoint_id, task_id, idx, channel, type, blob, task_path)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (thread_id, checkpoint_ns, checkpoint_id, task_id, idx) DO NOTHING
+'''
+
+UPSERT_CHECKPOINT_WRITES = INSERT_CHECKPOINT_WRITES.replace(
+    "DO NOTHING", "DO UPDATE SET channel = excluded.channel, type = excluded.type, blob = excluded.blob"
+)
+
+SELECT_CHECKPOINT_WRITES = '''
+    SELECT checkpoint_id, task_id, channel, type, blob FROM checkpoint_writes
+    WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?
+    ORDER BY task_id, idx
+'''
+
+_STOP = object()
+
+
+class _ReaderConnection:
+    """Read connection of one thread.
+
+    Held only by the thread's threading.local, so it is released, and the
+    connection closed, when the thread exits.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.pid = os.getpid()
+
+    def close(self):
+        # A connection inherited through a fork belongs to the parent process
+        if self.pid == os.getpid():
+            self.conn.close()
+
+    def __del__(self):
+        self.close()
+
+
+def sqlite_path(db_url):
+    """Return the database file of a sqlite:/// URL, or None for any other URL."""
+    if not db_url or not db_url.startswith(SQLITE_URL_PREFIX):
+        return None
+    return db_url[len(SQLITE_URL_PREFIX):]
+
+
+class SqliteCheckpointer:
+    """SQLite (WAL) checkpointer with a single writer thread."""
+
+    def __init__(self, path, serializer=None, batch_size=SQLITE_WRITE_BATCH_SIZE, busy_timeout=30.0):
+        if path in ("", ":memory:"):
+            raise ValueError("SqliteCheckpointer needs a database file; use MemorySaver for in-memory storage")
+        self.path = path
+        self.serializer = serializer or CheckpointSerializer()
+        self.batch_size = batch_size
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        self._readers = weakref.WeakSet()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._queue = None
+        self._writer = None
+        self._writer_pid = None
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+        finally:
+            conn.close()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None,
+                               check_same_thread=False, cached_statements=128)
+        # WAL + NORMAL syncs only at checkpoints of the WAL; a power loss can drop the
+        # last transactions but never corrupts the database
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=OFF")
+        return conn
+
+    def _reader(self):
+        """Read connection of the calling thread."""
+        reader = getattr(self._local, "reader", None)
+        if reader is None or reader.pid != os.getpid():
+            if self._closed:
+                raise RuntimeError("SqliteCheckpointer is closed")
+            reader = _ReaderConnection(self._connect())
+            self._local.reader = reader
+            with self._lock:
+                self._readers.add(reader)
+        return reader.conn
+
+    # Writer thread
+
+    def _submit(self, fn, *args):
+        """Run `fn(conn, *args)` on the writer thread.
+
+        Returns:
+            Future: Resolved with the result once the transaction has committed
+        """
+        if self._closed:
+            raise RuntimeError("SqliteCheckpointer is closed")
+        if self._writer_pid != os.getpid():
+            with self._lock:
+                # Threads do not survive a fork, so each process starts its own writer
+                if self._writer_pid != os.getpid():
+                    self._queue = queue.Queue()
+                    self._writer = threading.Thread(target=self._write_loop, name="sqlite-checkpoint-writer",
+                                                    daemon=True)
+                    self._writer_pid = os.getpid()
+                    self._writer.start()
+        future = Future()
+        self._queue.put((future, fn, args))
+        return future
+
+    def _write(self, fn, *args):
+        return self._submit(fn, *args).result()
+
+    def _write_loop(self):
+        conn = self._connect()
+        own_queue = self._queue
+        try:
+            while True:
+                batch = [own_queue.get()]
+                while len(batch) < self.batch_size:
+                    try:
+                        batch.append(own_queue.get_nowait())
+                    except queue.Empty:
+                        break
+                stop = any(item is _STOP for item in batch)
+                self._commit_batch(conn, [item for item in batch if item is not _STOP])
+                if stop:
+                    return
+        finally:
+            conn.close()
+
+    def _commit_batch(self, conn, batch):
+        """Run a batch of writes in one transaction, falling back to one transaction each on errors."""
+        if not batch:
+            return
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            results = [fn(conn, *args) for _, fn, args in batch]
+            conn.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            if len(batch) == 1:
+                future, fn, args = batch[0]
+                try:
+                    conn.execute("BEGIN IMMEDIATE")
+                    result = fn(conn, *args)
+                    conn.execute("COMMIT")
+                    future.set_result(result)
+                except Exception as e:
+                    if conn.in_transaction:
+                        conn.execute("ROLLBACK")
+                    future.set_exception(e)
+                return
+            for item in batch:
+                self._commit_batch(conn, [item])
+            return
+        for (future, _, _), result in zip(batch, results):
+            future.set_result(result)
+
+    def close(self):
+        """Let the writer finish the queued writes and close every connection."""
+        if self._closed:
+            return
+        self._closed = True
+        if self._writer_pid == os.getpid() and self._writer.is_alive():
+            self._queue.put(_STOP)
+            self._writer.join()
+        with self._lock:
+            readers = list(self._readers)
+        # Connections of threads that already exited were closed with them
+        for reader in readers:
+            reader.close()
+
+    # Checkpointer interface
+
+    def get_next_version(self, current, channel):
+        return (current or 0) + 1
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        row, next_config = self._checkpoint_row(config, checkpoint, metadata)
+        self._write(_execute, UPSERT_CHECKPOINT, row)
+        return next_config
+
+    def put_many(self, items):
+        """Store several checkpoints in one transaction.
+
+        Returns:
+            list: The config of every stored checkpoint, in input order
+        """
+        rows, configs = [], []
+        for config, checkpoint, metadata in items:
+            row, next_config = self._checkpoint_row(config, checkpoint, metadata)
+            rows.append(row)
+            configs.append(next_config)
+        if rows:
+            self._write(_executemany, UPSERT_CHECKPOINT, rows)
+        return configs
+
+    def _checkpoint_row(self, config, checkpoint, metadata):
+        thread_id = config['configurable']['thread_id']
+        checkpoint_id = checkpoint_id_for(checkpoint)
+        json_value, checkpoint_type, blob = self.serializer.encode(checkpoint)
+        row = (
+            thread_id, '', checkpoint_id, config['configurable'].get('checkpoint_id'),
+            json_dumps(json_value) if json_value is not None else None,
+            checkpoint_type, blob, json_dumps(metadata)
+        )
+        return row, checkpoint_config(thread_id, checkpoint_id)
+
+    def put_writes(self, config, writes, task_id, task_path=""):
+        """Store the writes of a finished task, so resuming the step does not run it again."""
+        thread_id = config['configurable']['thread_id']
+        checkpoint_id = config['configurable']['checkpoint_id']
+        query = UPSERT_CHECKPOINT_WRITES if all(channel in WRITES_IDX_MAP for channel, _ in writes) \
+            else INSERT_CHECKPOINT_WRITES
+        rows = [
+            (thread_id, '', checkpoint_id, task_id, WRITES_IDX_MAP.get(channel, idx), channel,
+             *self.serializer.encode_value(value), task_path)
+            for idx, (channel, value) in enumerate(writes)
+        ]
+        self._write(_executemany, query, rows)
+
+    def get_tuple(self, config):
+        """Retrieve a checkpoint for a thread, the latest one unless the config names a checkpoint_id."""
+        thread_id = config['configurable']['thread_id']
+        checkpoint_id = config['configurable'].get('checkpoint_id')
+
+        conn = self._reader()
+        if checkpoint_id:
+            row = conn.execute(SELECT_CHECKPOINT_BY_ID, (thread_id, '', checkpoint_id)).fetchone()
+        else:
+            row = conn.execute(SELECT_LATEST_CHECKPOINT, (thread_id, '')).fetchone()
+        if row is None:
+            return None
+        return self._row_to_tuple(conn, thread_id, row)
+
+    def list(self, config, **kwargs):
+        """List checkpoints for a thread, newest first."""
+        thread_id = config['configurable']['thread_id']
+        before = kwargs.get('before')
+        before_id = before['configurable'].get('checkpoint_id') if before else None
+        limit = kwargs.get('limit')
+
+        conn = self._reader()
+        rows = conn.execute(SELECT_CHECKPOINTS, (thread_id, '', before_id, before_id,
+                                                 -1 if limit is None else limit)).fetchall()
+        return [self._row_to_tuple(conn, thread_id, row) for row in rows]
+
+    def _row_to_tuple(self, conn, thread_id, row):
+        """Build a CheckpointTuple from a checkpoints row."""
+        checkpoint_id, parent_checkpoint_id, checkpoint_type, checkpoint_blob, checkpoint_data, metadata = row
+        writes = conn.execute(SELECT_CHECKPOINT_WRITES, (thread_id, '', checkpoint_id)).fetchall()
+        pending = group_pending_writes(writes, self.serializer)
+
+        return CheckpointTuple(
+            config=checkpoint_config(thread_id, checkpoint_id),
+            checkpoint=self.serializer.decode(checkpoint_type, checkpoint_blob, checkpoint_data),
+            metadata=load_json(metadata),
+            parent_config=checkpoint_config(thread_id, parent_checkpoint_id),
+            pending_writes=pending.get(checkpoint_id, [])
+        )
+
+    def delete_thread(self, thread_id):
+        """Delete all stored data of one thread."""
+        self._write(_delete_thread, thread_id)
+
+    # Async interface, so graph.ainvoke works without a separate async backend
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        row, next_config = self._checkpoint_row(config, checkpoint, metadata)
+        await asyncio.wrap_future(self._submit(_execute, UPSERT_CHECKPOINT, row))
+        return next_config
+
+    async def aput_writes(self, config, writes, task_id, task_path=""):
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def aget_tuple(self, config):
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(self, config, **kwargs):
+        for item in await asyncio.to_thread(self.list, config, **kwargs):
+            yield item
+
+    async def adelete_thread(self, thread_id):
+        await asyncio.wrap_future(self._submit(_delete_thread, thread_id))
+
+
+def _execute(conn, query, params):
+    conn.execute(query, params)
+
+
+def _executemany(conn, query, rows):
+    conn.executemany(query, rows)
+
+
+def _delete_thread(conn, thread_id):
+    conn.execute("DELETE FROM checkpoints WHERE thread_id = ?", (thread_id,))
+    conn.execute("DELETE FROM checkpoint_writes WHERE thread_id = ?", (thread_id,))
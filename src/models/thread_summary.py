@@ -0,0 +1,134 @@
+"""
+Per-thread summary table maintained by the checkpointers.
+
+Listing conversations used to aggregate the whole ``checkpoints`` table
+(``GROUP BY thread_id`` with COUNT/MIN/MAX). The ``threads`` table keeps those
+figures per thread instead, updated with one upsert on every checkpoint write,
+so listings are keyset-paginated index scans whatever the size of the history.
+"""
+
+from langchain_core.messages import HumanMessage, ToolMessage
+
+try:
+    from .message_search import message_text, detect_language
+except ImportError:
+    from message_search import message_text, detect_language
+from utils.domains import EXPERT_TOOLS
+
+CREATE_THREADS_TABLE = '''
+    CREATE TABLE IF NOT EXISTS threads (
+        thread_id TEXT NOT NULL,
+        checkpoint_ns TEXT NOT NULL DEFAULT '',
+        first_activity TIMESTAMP NOT NULL,
+        last_activity TIMESTAMP NOT NULL,
+        checkpoint_count INTEGER NOT NULL DEFAULT 0,
+        message_count INTEGER,
+        language TEXT,
+        last_expert TEXT,
+        last_checkpoint_id TEXT,
+        PRIMARY KEY (thread_id, checkpoint_ns)
+    )
+'''
+
+CREATE_THREADS_ACTIVITY_INDEX = '''
+    CREATE INDEX CONCURRENTLY IF NOT EXISTS threads_last_activity_idx
+    ON threads (last_activity DESC, thread_id DESC)
+'''
+
+# Message counts, languages and experts are filled in by the next write of each
+# thread, or by `maintenance.py index-threads`
+BACKFILL_THREADS = '''
+    INSERT INTO threads (thread_id, checkpoint_ns, first_activity, last_activity, checkpoint_count, last_checkpoint_id)
+    SELECT thread_id, checkpoint_ns, MIN(created_at), MAX(created_at), COUNT(*), MAX(checkpoint_id)
+    FROM checkpoints
+    GROUP BY thread_id, checkpoint_ns
+    ON CONFLICT (thread_id, checkpoint_ns) DO NOTHING
+'''
+
+# Checkpoint ids are time-ordered, so a rewrite of an already counted checkpoint is not counted again
+UPSERT_THREAD = '''
+    INSERT INTO threads AS t (thread_id, checkpoint_ns, first_activity, last_activity, checkpoint_count,
+                              message_count, language, last_expert, last_checkpoint_id)
+    VALUES (%s, %s, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP, 1, %s, %s, %s, %s)
+    ON CONFLICT (thread_id, checkpoint_ns) DO UPDATE SET
+        last_activity = EXCLUDED.last_activity,
+        checkpoint_count = t.checkpoint_count
+            + CASE WHEN t.last_checkpoint_id IS NULL OR EXCLUDED.last_checkpoint_id > t.last_checkpoint_id
+                   THEN 1 ELSE 0 END,
+        message_count = COALESCE(EXCLUDED.message_count, t.message_count),
+        language = COALESCE(EXCLUDED.language, t.language),
+        last_expert = COALESCE(EXCLUDED.last_expert, t.last_expert),
+        last_checkpoint_id = GREATEST(EXCLUDED.last_checkpoint_id, t.last_checkpoint_id)
+'''
+
+# Keeps checkpoint_count in step when maintenance prunes old checkpoints
+SUBTRACT_THREAD_CHECKPOINTS = '''
+    UPDATE threads t SET checkpoint_count = GREATEST(t.checkpoint_count - d.pruned, 0)
+    FROM (
+        SELECT thread_id, checkpoint_ns, COUNT(*) AS pruned
+        FROM unnest(%s::text[], %s::text[]) AS p(thread_id, checkpoint_ns)
+        GROUP BY thread_id, checkpoint_ns
+    ) d
+    WHERE t.thread_id = d.thread_id AND t.checkpoint_ns = d.checkpoint_ns
+'''
+
+UPDATE_THREAD_MESSAGES = '''
+    UPDATE threads
+    SET message_count = %s, language = COALESCE(%s, language), last_expert = COALESCE(%s, last_expert)
+    WHERE thread_id = %s AND checkpoint_ns = %s
+'''
+
+SELECT_EXPIRED_THREADS = '''
+    SELECT thread_id FROM threads
+    WHERE last_activity < %s
+    ORDER BY last_activity
+    LIMIT %s
+'''
+
+THREAD_COLUMNS = '''thread_id, first_activity, last_activity, checkpoint_count, message_count,
+                    language, last_expert'''
+
+
+def select_threads(after=None, limit=50):
+    """Build the query listing threads by most recent activity, one page at a time.
+
+    Args:
+        after: (last_activity, thread_id) of the last row of the previous page, or None
+        limit: Page size
+
+    Returns:
+        tuple: (SQL string, parameters)
+    """
+    query = f"SELECT {THREAD_COLUMNS} FROM threads WHERE checkpoint_ns = ''"
+    params = []
+    if after is not None:
+        query += " AND (last_activity, thread_id) < (%s, %s)"
+        params.extend(after)
+    query += " ORDER BY last_activity DESC, thread_id DESC LIMIT %s"
+    params.append(limit)
+    return query, params
+
+
+def summarize_messages(messages):
+    """Work out the per-thread figures that come from the messages.
+
+    Returns:
+        tuple: (message count, language of the latest user message, name of the latest expert tool
+        of EXPERT_TOOLS), each None when unknown
+    """
+    if not isinstance(messages, list):
+        return None, None, None
+    language, last_expert = None, None
+    for message in reversed(messages):
+        if language is None and isinstance(message, HumanMessage):
+            language = detect_language(message_text(message))
+        if last_expert is None and isinstance(message, ToolMessage) and message.name in EXPERT_TOOLS:
+            last_expert = message.name
+        if language is not None and last_expert is not None:
+            break
+    return len(messages), language, last_expert
+
+
+def thread_params(thread_id, checkpoint_ns, checkpoint_id, messages):
+    """Build the UPSERT_THREAD parameters for a checkpoint write."""
+    return (thread_id, checkpoint_ns, *summarize_messages(messages), checkpoint_id)
@@ -0,0 +1,416 @@
+"""
+Write-behind wrapper for the PostgreSQL checkpointer.
+
+``put`` only records the checkpoint in memory and queues it; a background
+writer thread drains the queue and stores the checkpoints in batches with one
+multi-row INSERT per batch, so the user no longer waits for the database
+before getting the answer.
+
+Reads of a thread that still has queued checkpoints are answered from memory
+(read-your-writes within this process). The queue is bounded: when the writer
+falls behind, ``put`` blocks until there is room again instead of growing
+without limit. Queued checkpoints are flushed on ``close()`` and at interpreter
+exit; a hard crash can still lose the checkpoints that were queued at the time.
+
+The pending writes of a task (``put_writes``) go through the same queue when
+their checkpoint is still queued, so they are always stored after it and never
+point at a checkpoint that was not stored; writes to an already stored
+checkpoint are written through. A queued checkpoint keeps being answered from
+memory until its queued writes are stored as well.
+
+A batch that cannot be written is never dropped: the writer keeps retrying it
+(with backoff) and takes nothing else from the queue meanwhile, so ``put``
+blocks once the queue is full and raises CheckpointWriteError if it stays full
+for ``put_timeout`` seconds. ``flush()`` raises the failure instead of waiting,
+and ``write_stats()`` reports it. Only a checkpointer closed while the database
+is still failing gives up on what is left in the queue, after a few short
+retries; ``close()`` then raises CheckpointWriteError with what was lost.
+"""
+
+import os
+import time
+import queue
+import atexit
+import logging
+import threading
+from collections import deque
+from langgraph.checkpoint.base import CheckpointTuple, copy_checkpoint
+
+try:
+    from .checkpoint_sql import checkpoint_id_for, checkpoint_config, merge_pending_writes
+except ImportError:
+    from checkpoint_sql import checkpoint_id_for, checkpoint_config, merge_pending_writes
+
+# Load environment variables
+CHECKPOINT_WRITE_QUEUE_SIZE = int(os.getenv("CHECKPOINT_WRITE_QUEUE_SIZE", "1000"))
+CHECKPOINT_WRITE_BATCH_SIZE = int(os.getenv("CHECKPOINT_WRITE_BATCH_SIZE", "100"))
+
+# Longest wait between two attempts at a failing batch, and flush()'s polling interval
+MAX_RETRY_DELAY = 30.0
+FLUSH_POLL_INTERVAL = 0.1
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class CheckpointWriteError(RuntimeError):
+    """Queued checkpoints cannot be written because the database writes keep failing."""
+
+
+class WriteBehindCheckpointer:
+    """Queues checkpoint writes and stores them in batches from a background thread."""
+
+    def __init__(self, store, max_queue=CHECKPOINT_WRITE_QUEUE_SIZE, batch_size=CHECKPOINT_WRITE_BATCH_SIZE,
+                 retries=3, retry_delay=0.5, put_timeout=30.0):
+        self.store = store
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.put_timeout = put_timeout
+        self._lock = threading.Lock()
+        # Held while queueing, so writes are queued after the checkpoint they belong to
+        self._enqueue_lock = threading.Lock()
+        self._pending = {}  # thread_id -> queued CheckpointTuples, oldest first
+        self._queued_writes = {}  # (thread_id, checkpoint_id) -> number of queued put_writes
+        self._stored = set()  # (thread_id, checkpoint_id) stored, but with writes still queued
+        self._flush_ms = deque(maxlen=256)
+        self._lag_ms = deque(maxlen=256)
+        self._written = 0
+        self._batches = 0
+        self._failed_attempts = 0
+        self._retrying = 0  # checkpoints of the batch the writer keeps retrying
+        self._lost = 0
+        self._lost_writes = 0
+        self._written_writes = 0
+        self._error = None  # last write error, while the retries are exhausted
+        self._closed = False
+        self._closing = threading.Event()
+        self._queue = None
+        self._writer = None
+        self._writer_pid = None
+        self._start_writer()
+        atexit.register(self.close)
+
+    @property
+    def db_url(self):
+        return self.store.db_url
+
+    def _start_writer(self):
+        self._queue = queue.Queue(maxsize=self.max_queue)
+        self._writer = threading.Thread(target=self._write_loop, name="checkpoint-writer", daemon=True)
+        self._writer_pid = os.getpid()
+        self._writer.start()
+
+    def _ensure_writer(self):
+        # Threads do not survive a fork, so a pre-forked worker starts its own writer
+        if self._writer_pid != os.getpid():
+            with self._lock:
+                if self._writer_pid != os.getpid():
+                    self._pending = {}
+                    self._queued_writes = {}
+                    self._stored = set()
+                    self._start_writer()
+
+    def get_next_version(self, current, channel):
+        return self.store.get_next_version(current, channel)
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        if self._closed:
+            raise RuntimeError("WriteBehindCheckpointer is closed")
+        self._ensure_writer()
+
+        thread_id = config['configurable']['thread_id']
+        checkpoint_id = checkpoint_id_for(checkpoint)
+        # LangGraph keeps updating its own checkpoint dict after put, so keep a copy
+        checkpoint = {**copy_checkpoint(checkpoint), "id": checkpoint_id}
+        next_config = checkpoint_config(thread_id, checkpoint_id)
+        saved = CheckpointTuple(
+            config=next_config,
+            checkpoint=checkpoint,
+            metadata=metadata,
+            parent_config=checkpoint_config(thread_id, config['configurable'].get('checkpoint_id')),
+            pending_writes=[]
+        )
+
+        with self._enqueue_lock:
+            with self._lock:
+                self._pending.setdefault(thread_id, []).append(saved)
+            # Blocks while the queue is full, which slows callers down to the writer's pace
+            try:
+                self._queue.put(("checkpoint", time.perf_counter(), config, checkpoint, metadata, saved),
+                                timeout=self.put_timeout)
+            except queue.Full:
+                self._forget([saved])
+                raise self._queue_full_error() from None
+        return next_config
+
+    def _queue_full_error(self):
+        return CheckpointWriteError(
+            f"Checkpoint queue full for {self.put_timeout:g}s; last write error: {self._error}")
+
+    def get_tuple(self, config):
+        """Return the newest queued checkpoint of the thread, or read it from the database."""
+        thread_id = config['configurable']['thread_id']
+        checkpoint_id = config['configurable'].get('checkpoint_id')
+
+        with self._lock:
+            queued = list(self._pending.get(thread_id, ()))
+        if queued:
+            if not checkpoint_id:
+                return _copy_tuple(queued[-1])
+            for saved in queued:
+                if saved.config['configurable']['checkpoint_id'] == checkpoint_id:
+                    return _copy_tuple(saved)
+        return self.store.get_tuple(config)
+
+    def list(self, config, **kwargs):
+        """List checkpoints for a thread, newest first, after flushing the queued ones."""
+        thread_id = config['configurable']['thread_id']
+        with self._lock:
+            has_queued = bool(self._pending.get(thread_id))
+        if has_queued:
+            self.flush()
+        return self.store.list(config, **kwargs)
+
+    def put_writes(self, config, writes, task_id, task_path=""):
+        """Queue a task's writes behind their checkpoint, or store them right away if it is stored already."""
+        if self._closed:
+            raise RuntimeError("WriteBehindCheckpointer is closed")
+        self._ensure_writer()
+
+        thread_id = config['configurable']['thread_id']
+        checkpoint_id = config['configurable']['checkpoint_id']
+        key = (thread_id, checkpoint_id)
+        with self._enqueue_lock:
+            with self._lock:
+                queued = self._pending.get(thread_id, [])
+                for i, saved in enumerate(queued):
+                    if saved.config['configurable']['checkpoint_id'] == checkpoint_id:
+                        queued[i] = saved._replace(
+                            pending_writes=merge_pending_writes(saved.pending_writes, writes, task_id))
+                        self._queued_writes[key] = self._queued_writes.get(key, 0) + 1
+                        break
+                else:
+                    queued = None
+            if queued is not None:
+                try:
+                    self._queue.put(("writes", time.perf_counter(), config, writes, task_id, task_path),
+                                    timeout=self.put_timeout)
+                except queue.Full:
+                    self._writes_done(key)
+                    raise self._queue_full_error() from None
+                return
+        # The checkpoint is stored: nothing queued can come before these writes
+        self.store.put_writes(config, writes, task_id, task_path)
+
+    def flush(self):
+        """Block until every queued checkpoint and pending write has been stored.
+
+        Raises:
+            CheckpointWriteError: The writes are failing; the checkpoints stay queued and are retried
+        """
+        if self._queue is None or self._writer_pid != os.getpid() or not self._writer.is_alive():
+            return
+        own_queue = self._queue
+        with own_queue.all_tasks_done:
+            while own_queue.unfinished_tasks:
+                if self._error is not None:
+                    raise CheckpointWriteError(
+                        f"{own_queue.unfinished_tasks} queued writes are not stored yet: {self._error}")
+                own_queue.all_tasks_done.wait(FLUSH_POLL_INTERVAL)
+
+    def close(self):
+        """Flush the queue, stop the writer and close the underlying checkpointer.
+
+        Raises:
+            CheckpointWriteError: Queued checkpoints or writes could not be stored and were dropped
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._closing.set()
+        if self._writer_pid == os.getpid() and self._writer.is_alive():
+            self._queue.put((_STOP,))
+            self._writer.join()
+        self.store.close()
+        if self._lost or self._lost_writes:
+            raise CheckpointWriteError(f"Closed with {self._lost} checkpoints and {self._lost_writes} pending "
+                                       f"writes not stored: {self._error}")
+
+    def pool_stats(self):
+        """Return connection pool statistics of the underlying checkpointer."""
+        return self.store.pool_stats()
+
+    def cache_stats(self):
+        """Return hit/miss counters of the underlying checkpointer's cache."""
+        return self.store.cache_stats()
+
+    def write_stats(self):
+        """Return queue depth and flush latency statistics."""
+        with self._lock:
+            flush_ms = sorted(self._flush_ms)
+            lag_ms = sorted(self._lag_ms)
+            pending_threads = sum(1 for queued in self._pending.values() if queued)
+        return {
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "queue_capacity": self.max_queue,
+            "pending_threads": pending_threads,
+            "written_checkpoints": self._written,
+            "written_writes": self._written_writes,
+            "batches": self._batches,
+            "retrying_checkpoints": self._retrying,
+            "failed_attempts": self._failed_attempts,
+            "lost_checkpoints": self._lost,
+            "lost_writes": self._lost_writes,
+            "last_error": self._error,
+            "flush_ms_p50": _percentile(flush_ms, 0.50),
+            "flush_ms_p99": _percentile(flush_ms, 0.99),
+            "write_lag_ms_p50": _percentile(lag_ms, 0.50),
+            "write_lag_ms_p99": _percentile(lag_ms, 0.99),
+        }
+
+    def _write_loop(self):
+        own_queue = self._queue
+        while True:
+            batch = [own_queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(own_queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            try:
+                # Queue order is kept: checkpoints queued before a task's writes are stored first
+                checkpoints = []
+                for item in batch:
+                    if item[0] == "checkpoint":
+                        checkpoints.append(item)
+                    elif item[0] == "writes":
+                        self._write_checkpoints(checkpoints)
+                        checkpoints = []
+                        self._write_writes(item)
+                self._write_checkpoints(checkpoints)
+            finally:
+                for _ in batch:
+                    own_queue.task_done()
+            if any(item[0] is _STOP for item in batch):
+                return
+
+    def _write_checkpoints(self, items):
+        if not items:
+            return
+        rows = [(config, checkpoint, metadata) for _, _, config, checkpoint, metadata, _ in items]
+        start = time.perf_counter()
+        written = self._retry(lambda: self.store.put_many(rows), len(items), "checkpoints")
+        done = time.perf_counter()
+        self._forget([saved for *_, saved in items])
+        if not written:
+            return
+        with self._lock:
+            for _, enqueued, *_ in items:
+                self._lag_ms.append((done - enqueued) * 1000)
+            self._flush_ms.append((done - start) * 1000)
+            self._written += len(items)
+            self._batches += 1
+
+    def _write_writes(self, item):
+        _, _, config, writes, task_id, task_path = item
+        written = self._retry(lambda: self.store.put_writes(config, writes, task_id, task_path), 1, "pending writes")
+        if written:
+            with self._lock:
+                self._written_writes += 1
+        self._writes_done((config['configurable']['thread_id'], config['configurable']['checkpoint_id']))
+
+    def _retry(self, write, count, kind):
+        """Run a write until it succeeds; only give up once the checkpointer is closed.
+
+        Returns:
+            bool: True if written, False if given up
+        """
+        attempt = 0
+        while True:
+            try:
+                write()
+                with self._lock:
+                    self._retrying = 0
+                    self._error = None
+                return True
+            except Exception as error:
+                exhausted = attempt >= self.retries
+                with self._lock:
+                    self._failed_attempts += 1
+                    self._retrying = count
+                    if exhausted:
+                        self._error = f"{type(error).__name__}: {error}"
+                    # Once something was dropped at close, the rest of the queue is not retried at length
+                    give_up = self._closed and (exhausted or self._lost or self._lost_writes)
+                    if give_up:
+                        if kind == "checkpoints":
+                            self._lost += count
+                        else:
+                            self._lost_writes += count
+                        self._retrying = 0
+                        self._error = f"{type(error).__name__}: {error}"
+                if give_up:
+                    # Nobody is left to retry for; the only case where anything is given up
+                    logger.error(f"Lost {count} {kind}: writes still failing when the checkpointer closed",
+                                 exc_info=True)
+                    return False
+                if exhausted:
+                    logger.error(f"Checkpoint {kind} write failed {attempt + 1} times, keeping {count} "
+                                 f"queued and retrying", exc_info=True)
+                else:
+                    logger.warning(f"Checkpoint {kind} write failed, retrying", exc_info=True)
+                delay = min(self.retry_delay * 2 ** attempt, MAX_RETRY_DELAY)
+                if self._closing.is_set():
+                    time.sleep(min(delay, self.retry_delay * 2 ** self.retries))
+                else:
+                    # close() cuts a long backoff short
+                    self._closing.wait(delay)
+                attempt += 1
+
+    def _writes_done(self, key):
+        """Count a queued put_writes as handled; its checkpoint leaves memory once nothing is queued for it."""
+        with self._lock:
+            remaining = self._queued_writes.get(key, 0) - 1
+            if remaining > 0:
+                self._queued_writes[key] = remaining
+                return
+            self._queued_writes.pop(key, None)
+            if key not in self._stored:
+                return
+            self._stored.discard(key)
+            self._drop_pending(*key)
+
+    def _forget(self, saved_items):
+        """Stop answering reads of these checkpoints from memory, once their queued writes are stored too."""
+        with self._lock:
+            for saved in saved_items:
+                key = (saved.config['configurable']['thread_id'], saved.config['configurable']['checkpoint_id'])
+                if self._queued_writes.get(key):
+                    self._stored.add(key)
+                else:
+                    self._drop_pending(*key)
+
+    def _drop_pending(self, thread_id, checkpoint_id):
+        queued = [
+            other for other in self._pending.get(thread_id, [])
+            if other.config['configurable']['checkpoint_id'] != checkpoint_id
+        ]
+        if queued:
+            self._pending[thread_id] = queued
+        else:
+            self._pending.pop(thread_id, None)
+
+
+def _percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    return round(sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))], 2)
+
+
+def _copy_tuple(saved):
+    """Copy of a queued checkpoint tuple that the caller is free to modify."""
+    return saved._replace(checkpoint=copy_checkpoint(saved.checkpoint), pending_writes=list(saved.pending_writes))
@@ -0,0 +1,200 @@
+"""
+Bounded conversation context for the chatbot node.
+
+The chatbot used to send the whole history, every verbose tool output
+included, on every turn, so latency and token cost grew with the length of
+the session. The context sent to the model is now:
+
+    system prompt + rolling summary of the older turns
+    + as many unsummarized turns as fit in CONTEXT_TOKEN_BUDGET
+      (the last CONTEXT_RECENT_TURNS always, verbatim)
+
+Tool outputs of earlier turns are cut to CONTEXT_TOOL_OUTPUT_CHARS. The stored
+history is never changed; only what the model sees.
+
+The summary is extended incrementally: once the turns before the recent window
+hold CONTEXT_SUMMARY_BATCH_TOKENS, they are summarized together with the
+previous summary by the graph's summarize node, which runs after the final
+answer (its tokens are already streamed). The result is part of the state
+(`summary`, `summarized_count`), so it is stored in the checkpoint with the
+answer, shared by all workers and never recomputed.
+"""
+
+import os
+import logging
+from langchain_core.messages import SystemMessage, HumanMessage, AIMessage, ToolMessage
+from utils.instrumentation import traced
+
+# Load environment variables
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "8000"))
+CONTEXT_RECENT_TURNS = int(os.getenv("CONTEXT_RECENT_TURNS", "4"))
+CONTEXT_TOOL_OUTPUT_CHARS = int(os.getenv("CONTEXT_TOOL_OUTPUT_CHARS", "1500"))
+CONTEXT_SUMMARY_BATCH_TOKENS = int(os.getenv("CONTEXT_SUMMARY_BATCH_TOKENS", "2000"))
+CONTEXT_SUMMARY = os.getenv("CONTEXT_SUMMARY", "true").lower() in ("1", "true", "yes")
+
+# Rough token estimate that holds for English and errs on the safe side for Arabic
+CHARS_PER_TOKEN = 3
+
+SUMMARY_PROMPT = """
+You maintain the running summary of a conversation between a user and a multilingual (Arabic/English) assistant that consults medical, AI and general experts.
+
+Update the summary with the new messages. Keep:
+- The user's health concerns, symptoms, conditions, medications and any emergency
+- Facts the user shared about themselves and their preferences, including language
+- The questions asked, the experts consulted and the key points of their answers
+- Open questions and follow-ups
+
+Write a concise summary in the user's language, in short bullet points, without greetings or commentary.
+"""
+
+logger = logging.getLogger(__name__)
+
+
+def message_text(message):
+    content = message.content
+    return content if isinstance(content, str) else message.text()
+
+
+def estimate_tokens(message):
+    """Estimate the tokens a message takes in the prompt."""
+    tokens = len(message_text(message)) // CHARS_PER_TOKEN + 4
+    if isinstance(message, AIMessage) and message.tool_calls:
+        tokens += sum(len(str(call["args"])) // CHARS_PER_TOKEN + 10 for call in message.tool_calls)
+    return tokens
+
+
+def turn_starts(messages, start=0):
+    """Indices of the messages that start a turn (user messages) from `start` on."""
+    return [index for index in range(start, len(messages)) if isinstance(messages[index], HumanMessage)]
+
+
+def compact(message, max_chars):
+    """Cut a long tool output of an earlier turn."""
+    text = message_text(message)
+    if not isinstance(message, ToolMessage) or len(text) <= max_chars:
+        return message
+    return message.model_copy(update={"content": text[:max_chars] + " …[truncated]"})
+
+
+class ContextManager:
+    """Builds the chatbot's context and maintains the rolling summary of each thread."""
+
+    def __init__(self, token_budget=CONTEXT_TOKEN_BUDGET, recent_turns=CONTEXT_RECENT_TURNS,
+                 tool_output_chars=CONTEXT_TOOL_OUTPUT_CHARS, summary_batch_tokens=CONTEXT_SUMMARY_BATCH_TOKENS,
+                 summarize=CONTEXT_SUMMARY):
+        self.token_budget = token_budget
+        self.recent_turns = max(1, recent_turns)
+        self.tool_output_chars = tool_output_chars
+        self.summary_batch_tokens = summary_batch_tokens
+        self.summarize = summarize
+        self.summaries = 0
+        self.summary_errors = 0
+        self.dropped_messages = 0
+
+    def build(self, state):
+        """Select the context of the next model call.
+
+        Returns:
+            tuple: (summary or None, messages to send after the system prompt)
+        """
+        messages = state["messages"]
+        summary = state.get("summary")
+        summarized_count = state.get("summarized_count", 0)
+
+        starts = turn_starts(messages, summarized_count)
+        if not starts:
+            return summary, self._visible(messages[summarized_count:])
+        recent_start = starts[-self.recent_turns] if len(starts) >= self.recent_turns else starts[0]
+        current_start = starts[-1]
+
+        # Older unsummarized turns are added newest first while they fit in the budget
+        selected = self._visible(messages[recent_start:], current_start - recent_start)
+        used = sum(estimate_tokens(message) for message in selected)
+        if summary:
+            used += len(summary) // CHARS_PER_TOKEN
+        older = [start for start in starts if start < recent_start]
+        end = recent_start
+        for start in reversed(older):
+            turn = self._visible(messages[start:end], end - start)
+            cost = sum(estimate_tokens(message) for message in turn)
+            if used + cost > self.token_budget:
+                self.dropped_messages += start - summarized_count
+                break
+            selected = turn + selected
+            used += cost
+            end = start
+        return summary, selected
+
+    def _visible(self, messages, compact_before=0):
+        """Messages sent to the model: no stored system prompts, older tool outputs cut."""
+        return [
+            compact(message, self.tool_output_chars) if index < compact_before else message
+            for index, message in enumerate(messages) if not isinstance(message, SystemMessage)
+        ]
+
+    def _summary_batch(self, state):
+        """The messages that left the recent window since the last summary, once they are worth summarizing.
+
+        Returns:
+            tuple: (messages to summarize, summarized_count after them), or None
+        """
+        messages = state["messages"]
+        last = messages[-1] if messages else None
+        if not self.summarize or not isinstance(last, AIMessage) or last.tool_calls:
+            return None
+        summarized_count = state.get("summarized_count", 0)
+        starts = turn_starts(messages, summarized_count)
+        if len(starts) <= self.recent_turns:
+            return None
+        cut = starts[-self.recent_turns]
+        batch = [message for message in messages[summarized_count:cut] if not isinstance(message, SystemMessage)]
+        if sum(estimate_tokens(message) for message in batch) < self.summary_batch_tokens:
+            return None
+        return batch, cut
+
+    def summary_due(self, state):
+        """Return True after a final answer when the turns that left the recent window should be summarized."""
+        return self._summary_batch(state) is not None
+
+    @traced("summary", "conversation")
+    def summarize_state(self, state):
+        """Extend the summary with the turns that left the recent window.
+
+        Returns:
+            dict: state update with the new `summary` and `summarized_count`, empty if nothing was summarized
+        """
+        pending = self._summary_batch(state)
+        if pending is None:
+            return {}
+        batch, cut = pending
+        try:
+            # Imported here: the Gemini client libraries are the largest part of startup
+            from utils.llm_clients import get_llm
+            transcript = "\n".join(
+                f"{message.type.upper()}{f' ({message.name})' if isinstance(message, ToolMessage) else ''}: "
+                f"{message_text(compact(message, self.tool_output_chars))}"
+                for message in batch if message_text(message)
+            )
+            prompt = f"Current summary:\n{state.get('summary') or '(none)'}\n\nNew messages:\n{transcript}"
+            result = get_llm(temperature=0.2).invoke([SystemMessage(content=SUMMARY_PROMPT), HumanMessage(content=prompt)])
+        except Exception:
+            # The turns stay unsummarized and are retried after the next answer
+            logger.exception("Conversation summary failed")
+            self.summary_errors += 1
+            return {}
+        self.summaries += 1
+        return {"summary": message_text(result).strip(), "summarized_count": cut}
+
+    def stats(self):
+        """Return the settings and the summaries computed so far."""
+        return {
+            "summarize": self.summarize,
+            "token_budget": self.token_budget,
+            "recent_turns": self.recent_turns,
+            "summaries": self.summaries,
+            "summary_errors": self.summary_errors,
+            "dropped_messages": self.dropped_messages,
+        }
+
+
+context_manager = ContextManager()
@@ -0,0 +1,125 @@
+"""
+Fast-path router that sends clearly medical or AI questions straight to the expert tool.
+
+For a query like an Arabic symptom description the chatbot spent a full model
+call only to decide to call ConsultArabicDoctorTool. This node scores the
+latest user message with the domain keywords (utils/domains.py) and, when one
+domain clearly dominates, emits the tool call itself as an AIMessage so the
+graph goes directly to the tools node. Everything else, including questions
+about current events, is deferred to the chatbot.
+
+A query is routed when its best domain has at least DOMAIN_ROUTER_MIN_SCORE
+keyword words and a confidence (its share of all keyword words found) of at
+least DOMAIN_ROUTER_CONFIDENCE, and at least one of them is not ambiguous
+(utils.domains.AMBIGUOUS_KEYWORDS): "cold heart" or "transformer algorithm"
+alone go to the chatbot.
+"""
+
+import os
+import uuid
+import threading
+from langchain_core.messages import AIMessage, HumanMessage
+from tools import tool_registry
+from .ToolNode import tool_call_sends
+from utils.domains import score_domains, unambiguous_domains, mentions_current_events
+
+# Load environment variables
+DOMAIN_ROUTER = os.getenv("DOMAIN_ROUTER", "true").lower() in ("1", "true", "yes")
+DOMAIN_ROUTER_MIN_SCORE = int(os.getenv("DOMAIN_ROUTER_MIN_SCORE", "2"))
+DOMAIN_ROUTER_CONFIDENCE = float(os.getenv("DOMAIN_ROUTER_CONFIDENCE", "0.8"))
+
+# Domain -> (tool name, argument name), preferred tool first
+DOMAIN_TOOLS = {
+    "medical": [("ConsultArabicDoctorTool", "medical_query"), ("ConsultDoctorTool", "medical_query")],
+    "ai": [("ConsultArabicAIResearcherTool", "research_query"), ("ConsultAIResearcherTool", "research_query")],
+}
+
+
+def classify(text, min_score=DOMAIN_ROUTER_MIN_SCORE):
+    """Find the domain of a query.
+
+    Returns:
+        tuple: (domain or None, confidence between 0 and 1)
+    """
+    if mentions_current_events(text):
+        return None, 0.0
+    scores = score_domains(text)
+    domain = max(scores, key=scores.get)
+    total = sum(scores.values())
+    if scores[domain] < min_score or domain not in unambiguous_domains(text):
+        return None, scores[domain] / total if total else 0.0
+    return domain, scores[domain] / total
+
+
+class DomainRouter:
+    """Graph node emitting the expert tool call for high-confidence queries."""
+
+    def __init__(self, enabled=DOMAIN_ROUTER, min_score=DOMAIN_ROUTER_MIN_SCORE,
+                 confidence=DOMAIN_ROUTER_CONFIDENCE):
+        self.enabled = enabled
+        self.min_score = min_score
+        self.confidence = confidence
+        self._lock = threading.Lock()
+        self.routed = {domain: 0 for domain in DOMAIN_TOOLS}
+        self.deferred = 0
+
+    def __call__(self, state):
+        messages = state.get("messages", [])
+        if not self.enabled or not messages or not isinstance(messages[-1], HumanMessage):
+            return {}
+        query = messages[-1].content if isinstance(messages[-1].content, str) else messages[-1].text()
+
+        domain, confidence = classify(query, self.min_score)
+        tool = self._tool(domain) if domain is not None and confidence >= self.confidence else None
+        with self._lock:
+            if tool is None:
+                self.deferred += 1
+            else:
+                self.routed[domain] += 1
+        if tool is None:
+            return {}
+
+        name, argument = tool
+        return {"messages": [AIMessage(
+            content="",
+            tool_calls=[{"name": name, "args": {argument: query}, "id": f"fast_path_{uuid.uuid4().hex}"}],
+            # Marks the call as made by the router rather than the model
+            response_metadata={"domain_router": {"domain": domain, "confidence": round(confidence, 3)}},
+        )]}
+
+    def _tool(self, domain):
+        """Return the first enabled tool of a domain, or None."""
+        for name, argument in DOMAIN_TOOLS[domain]:
+            if name not in tool_registry.enabled:
+                continue
+            try:
+                tool_registry.get(name)
+            except Exception:
+                # Failed to load (e.g. missing API key); the model gets to choose instead
+                continue
+            return name, argument
+        return None
+
+    def stats(self):
+        """Return the thresholds and the numbers of routed and deferred queries."""
+        routed = sum(self.routed.values())
+        total = routed + self.deferred
+        return {
+            "enabled": self.enabled,
+            "min_score": self.min_score,
+            "confidence": self.confidence,
+            "routed": dict(self.routed),
+            "deferred": self.deferred,
+            "routed_rate": round(routed / total, 4) if total else None,
+        }
+
+
+domain_router = DomainRouter()
+
+
+def route_domain(state):
+    """Conditional edge after the domain router: the tool call it emitted, else the chatbot."""
+    last_message = state["messages"][-1]
+    if isinstance(last_message, AIMessage) and last_message.tool_calls:
+        return tool_call_sends(last_message)
+    return "chatbot"
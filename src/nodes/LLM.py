@@ -1,31 +1,34 @@
-from langchain_google_genai import ChatGoogleGenerativeAI
-import os
-from tools import (
-    WebSearchTool, 
-    HumanAssistanceTool, 
-    ConsultDoctorTool, 
-    ConsultAIResearcherTool,
-    MultilingualSupportTool,
-    ConsultArabicDoctorTool,
-    ConsultArabicAIResearcherTool,
-    ConsultGeneralExpertTool
-)
+import threading
+from tools import tool_registry
+from utils.component_timings import timed
 
-# Create the base LLM model
-try:
-    base_model = ChatGoogleGenerativeAI(
-        model="gemini-2.5-flash",
-        google_api_key=os.getenv("GEMINI_API_KEY"),
-        temperature=0.7
-    ).bind_tools([
-        WebSearchTool, 
-        HumanAssistanceTool, 
-        ConsultDoctorTool, 
-        ConsultAIResearcherTool,
-        MultilingualSupportTool,
-        ConsultArabicDoctorTool,
-        ConsultArabicAIResearcherTool,
-        ConsultGeneralExpertTool
-    ])
-except:
-    print("GEMINI_API_KEY is not provided")
\ No newline at end of file
+_base_model = None
+_lock = threading.Lock()
+
+
+def get_base_model():
+    """Return the agent's model with the enabled tools bound, creating it on first use."""
+    global _base_model
+    if _base_model is None:
+        with _lock:
+            if _base_model is None:
+                # Imported here: the Gemini client libraries are the largest part of startup
+                from utils.llm_clients import get_llm
+                try:
+                    with timed("base_model"):
+                        _base_model = get_llm(temperature=0.7).bind_tools(tool_registry.enabled_tools())
+                except Exception:
+                    print("GEMINI_API_KEY is not provided")
+                    raise
+    return _base_model
+
+
+def is_base_model_loaded():
+    return _base_model is not None
+
+
+def __getattr__(name):
+    # `from nodes.LLM import base_model` keeps working and builds the model on first access
+    if name == "base_model":
+        return get_base_model()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
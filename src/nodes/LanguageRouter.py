@@ -0,0 +1,62 @@
+"""
+Pre-routing node that detects the user's language before the chatbot runs.
+
+The chatbot used to call MultilingualSupportTool first on every turn, a full
+model round trip to run a regex. This node detects the language of the latest
+user message locally, keeps it in the graph state (so a turn without letters,
+like "ok" in digits or an emoji, keeps the session's language) and the chatbot
+adds the matching guidance to its system prompt.
+"""
+
+import re
+from langchain_core.messages import HumanMessage
+from utils.language import ARABIC_PATTERN
+
+LATIN_PATTERN = re.compile(r'[A-Za-z]')
+
+DEFAULT_LANGUAGE = "en"
+
+LANGUAGE_GUIDANCE = {
+    "ar": """
+## User Language: ARABIC (detected automatically)
+- Respond ONLY in Arabic (العربية الفصحى), and ask the expert tools in Arabic
+- Use proper Arabic medical/technical terminology
+- For medical emergencies, mention Arabic emergency numbers (999 or 997)
+- Be respectful and culturally sensitive, including Islamic cultural considerations when relevant
+""",
+    "en": """
+## User Language: ENGLISH (detected automatically)
+- Respond ONLY in clear, professional English
+- Use standard medical/technical terminology
+- For medical emergencies, mention standard emergency numbers (911)
+- Maintain a professional but friendly tone
+""",
+}
+
+
+def detect_message_language(text, previous=None):
+    """Detect the language of a message, keeping the previous one when it has no letters.
+
+    Returns:
+        str: "ar" or "en"
+    """
+    if ARABIC_PATTERN.search(text):
+        return "ar"
+    if LATIN_PATTERN.search(text):
+        return "en"
+    return previous or DEFAULT_LANGUAGE
+
+
+def language_guidance(language):
+    """System prompt section telling the chatbot which language to answer in."""
+    return LANGUAGE_GUIDANCE.get(language, LANGUAGE_GUIDANCE[DEFAULT_LANGUAGE])
+
+
+def language_router(state):
+    """Graph node: store the language of the latest user message in the state."""
+    previous = state.get("language")
+    for message in reversed(state.get("messages", [])):
+        if isinstance(message, HumanMessage):
+            content = message.content if isinstance(message.content, str) else message.text()
+            return {"language": detect_message_language(content, previous)}
+    return {"language": previous or DEFAULT_LANGUAGE}
@@ -1,23 +1,162 @@
+import os
 import json
+import time
+import asyncio
+import threading
+import weakref
+from concurrent.futures import wait, FIRST_COMPLETED
+from typing import Optional
 from langchain_core.messages import ToolMessage
+from langchain_core.runnables import RunnableConfig
+from langchain_core.runnables.config import ContextThreadPoolExecutor
+from langgraph.errors import GraphBubbleUp
+from langgraph.types import Send
+from utils.instrumentation import span, traced, record_error
+
+# Load environment variables
+TOOL_MAX_CONCURRENCY = int(os.getenv("TOOL_MAX_CONCURRENCY", "4"))
+TOOL_TIMEOUT = float(os.getenv("TOOL_TIMEOUT", "60"))
+
+# How often to check for tools that have started running while others are queued
+QUEUED_POLL_INTERVAL = 0.05
+
+
+class ToolTimeout:
+    """Placeholder result of a tool call that did not finish in time."""
+
+
+def tool_call_sends(message, node="tools"):
+    """Conditional edge result running each tool call of `message` as its own task of `node`.
+
+    LangGraph checkpoints the writes of every finished task, so when one tool call
+    interrupts the step (HumanAssistanceTool) or fails, resuming only runs that call
+    again; the other tools' results are taken from the checkpoint.
+    """
+    return [Send(node, {"tool_call": tool_call}) for tool_call in message.tool_calls]
 
 
 class BasicToolNode:
-    """A node that runs the tools requested in the last AIMessage."""
+    """A node that runs the requested tool calls.
+
+    In the graph, each tool call is its own task (see tool_call_sends) and the
+    tasks of a step run concurrently; the node also accepts a state whose last
+    AIMessage holds several calls, and then runs them concurrently itself: in a
+    thread pool when the graph is run synchronously, with asyncio.gather when it
+    is run asynchronously (`acall`). At most `max_concurrency` tools run at once
+    across all tasks, each for at most `timeout` seconds, and the ToolMessages keep
+    the order of the tool calls.
+    """
 
-    def __init__(self, tools: list) -> None:
+    def __init__(self, tools: list, max_concurrency: int = TOOL_MAX_CONCURRENCY,
+                 timeout: Optional[float] = TOOL_TIMEOUT) -> None:
         self.tools_by_name = {tool.name: tool for tool in tools}
+        self.max_concurrency = max(1, max_concurrency)
+        self.timeout = timeout or None
+        # Shared by the concurrent tasks of a step; asyncio semaphores belong to one event loop
+        self._semaphore = threading.BoundedSemaphore(self.max_concurrency)
+        self._async_semaphores = weakref.WeakKeyDictionary()
+
+    @traced("node", "tools")
+    def __call__(self, inputs: dict, config: Optional[RunnableConfig] = None):
+        tool_calls = self._tool_calls(inputs)
+        if not tool_calls:
+            return {"messages": []}
+
+        # Copies of the caller's context, so interrupts and the stream writer work in the workers
+        executor = ContextThreadPoolExecutor(max_workers=min(self.max_concurrency, len(tool_calls)))
+        started = {}
+
+        def run(index, tool_call):
+            with self._semaphore:
+                started[index] = time.monotonic()
+                return self._invoke(tool_call, config)
 
-    def __call__(self, inputs: dict):
+        futures = {executor.submit(run, index, tool_call): index for index, tool_call in enumerate(tool_calls)}
+        results = [None] * len(tool_calls)
+        pending = set(futures)
+        try:
+            while pending:
+                wait_for = None
+                if self.timeout is not None:
+                    running = [started[futures[f]] for f in pending if futures[f] in started]
+                    wait_for = max(min(running) + self.timeout - time.monotonic(), 0) if running else self.timeout
+                    if len(running) < len(pending):
+                        wait_for = min(wait_for, QUEUED_POLL_INTERVAL)
+                done, pending = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index = futures[future]
+                    error = future.exception()
+                    results[index] = error if error is not None else future.result()
+                if self.timeout is not None:
+                    now = time.monotonic()
+                    for future in list(pending):
+                        index = futures[future]
+                        if index in started and now - started[index] >= self.timeout:
+                            # The thread can't be stopped; its result is dropped when it finishes
+                            results[index] = ToolTimeout()
+                            pending.discard(future)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        return self._messages(tool_calls, results)
+
+    @traced("node", "tools")
+    async def acall(self, inputs: dict, config: Optional[RunnableConfig] = None):
+        """Async version of the node: tool calls run concurrently on the event loop."""
+        tool_calls = self._tool_calls(inputs)
+        loop = asyncio.get_running_loop()
+        semaphore = self._async_semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._async_semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+
+        async def run(tool_call):
+            async with semaphore:
+                try:
+                    return await asyncio.wait_for(self._ainvoke(tool_call, config), self.timeout)
+                except asyncio.TimeoutError:
+                    return ToolTimeout()
+
+        results = await asyncio.gather(*(run(tool_call) for tool_call in tool_calls), return_exceptions=True)
+        return self._messages(tool_calls, results)
+
+    def _tool_calls(self, inputs: dict):
+        if "tool_call" in inputs:
+            # One task per tool call, sent by tool_call_sends
+            return [inputs["tool_call"]]
         if messages := inputs.get("messages", []):
-            message = messages[-1]
-        else:
-            raise ValueError("No message found in input")
+            return messages[-1].tool_calls
+        raise ValueError("No message found in input")
+
+    def _invoke(self, tool_call, config):
+        tool = self.tools_by_name.get(tool_call["name"])
+        if tool is None:
+            return self._unavailable(tool_call)
+        # The node's config carries the callbacks and stream writer, so experts can stream tokens
+        with span("tool", tool_call["name"]):
+            return tool.invoke(tool_call["args"], config)
+
+    async def _ainvoke(self, tool_call, config):
+        tool = self.tools_by_name.get(tool_call["name"])
+        if tool is None:
+            return self._unavailable(tool_call)
+        with span("tool", tool_call["name"]):
+            return await tool.ainvoke(tool_call["args"], config)
+
+    def _unavailable(self, tool_call):
+        # The tool is not enabled in this deployment (see tools/registry.py)
+        return f"Error: the {tool_call['name']} tool is not available."
+
+    def _messages(self, tool_calls, results):
+        """Build the ToolMessages in tool call order, re-raising the first error once every call has ended."""
+        errors = [result for result in results if isinstance(result, BaseException)]
+        if errors:
+            # Interrupts (HumanAssistanceTool) take precedence so the graph can pause and resume
+            raise next((error for error in errors if isinstance(error, GraphBubbleUp)), errors[0])
+
         outputs = []
-        for tool_call in message.tool_calls:
-            tool_result = self.tools_by_name[tool_call["name"]].invoke(
-                tool_call["args"]
-            )
+        for tool_call, tool_result in zip(tool_calls, results):
+            if isinstance(tool_result, ToolTimeout):
+                tool_result = f"Error: the {tool_call['name']} tool did not respond within {self.timeout:g} seconds."
+                record_error(TimeoutError(tool_result))
             outputs.append(
                 ToolMessage(
                     content=json.dumps(tool_result),
@@ -1,2 +1,11 @@
-from .ToolNode import BasicToolNode
-from .LLM import base_model
\ No newline at end of file
+from .ToolNode import BasicToolNode, tool_call_sends
+from .LLM import get_base_model, is_base_model_loaded
+from .LanguageRouter import language_router, language_guidance
+from .DomainRouter import domain_router, route_domain
+from .ContextManager import context_manager
+
+
+def __getattr__(name):
+    if name == "base_model":
+        return get_base_model()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -5,10 +5,10 @@ import os
 # Add the src directory to the path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from AgentExpert import AIResearcherAgent
+from AgentExpert import AIResearcherAgent, LazyAgent
 
-# Initialize the AI researcher agent
-ai_researcher_agent = AIResearcherAgent()
+# The AI researcher agent is created on first use
+ai_researcher_agent = LazyAgent(AIResearcherAgent)
 
 @tool
 def ConsultAIResearcherTool(research_query: str) -> str:
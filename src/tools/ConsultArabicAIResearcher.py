@@ -5,10 +5,10 @@ import os
 # Add the src directory to the path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from AgentExpert.arabic_ai_researcher import ArabicAIResearcherAgent
+from AgentExpert import ArabicAIResearcherAgent, LazyAgent
 
-# Initialize the Arabic AI researcher agent
-arabic_ai_researcher_agent = ArabicAIResearcherAgent()
+# The Arabic AI researcher agent is created on first use
+arabic_ai_researcher_agent = LazyAgent(ArabicAIResearcherAgent)
 
 @tool
 def ConsultArabicAIResearcherTool(research_query: str) -> str:
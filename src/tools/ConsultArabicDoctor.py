@@ -5,10 +5,11 @@ import os
 # Add the src directory to the path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from AgentExpert.arabic_doctor import ArabicDoctorAgent
+from AgentExpert import ArabicDoctorAgent, LazyAgent
+from AgentExpert.streaming import stream_alert
 
-# Initialize the Arabic doctor agent
-arabic_doctor_agent = ArabicDoctorAgent()
+# The Arabic doctor agent is created on first use
+arabic_doctor_agent = LazyAgent(ArabicDoctorAgent)
 
 @tool
 def ConsultArabicDoctorTool(medical_query: str) -> str:
@@ -35,21 +36,23 @@ def ConsultArabicDoctorTool(medical_query: str) -> str:
             language = arabic_doctor_agent.detect_language(medical_query)
             
             if language == "arabic":
-                emergency_msg = (
+                alert = (
                     "⚠️ تنبيه طارئ: بناءً على وصفك، قد تحتاج هذه الحالة إلى عناية طبية فورية. "
                     "يرجى الاتصال بخدمات الطوارئ (999 أو 997) أو التوجه إلى أقرب قسم طوارئ فوراً. "
                     "لا تؤخر طلب الرعاية الطبية المتخصصة.\n\n"
-                    f"تقييم الطبيب: {arabic_doctor_agent.get_response(medical_query)}"
                 )
+                assessment = "تقييم الطبيب"
             else:
-                emergency_msg = (
+                alert = (
                     "⚠️ EMERGENCY ALERT: Based on your description, this may require immediate medical attention. "
                     "Please call emergency services (911) or go to the nearest emergency room immediately. "
                     "Do not delay seeking professional medical care.\n\n"
-                    f"Doctor's assessment: {arabic_doctor_agent.get_response(medical_query)}"
                 )
+                assessment = "Doctor's assessment"
             
-            return emergency_msg
+            # Streaming callers see the alert before the assessment is generated
+            stream_alert(alert)
+            return f"{alert}{assessment}: {arabic_doctor_agent.get_response(medical_query)}"
         
         return arabic_doctor_agent.get_response(medical_query)
     
@@ -5,10 +5,11 @@ import os
 # Add the src directory to the path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from AgentExpert import DoctorAgent
+from AgentExpert import DoctorAgent, LazyAgent
+from AgentExpert.streaming import stream_alert
 
-# Initialize the doctor agent
-doctor_agent = DoctorAgent()
+# The doctor agent is created on first use
+doctor_agent = LazyAgent(DoctorAgent)
 
 @tool
 def ConsultDoctorTool(medical_query: str) -> str:
@@ -29,12 +30,14 @@ def ConsultDoctorTool(medical_query: str) -> str:
     try:
         # Check for emergency situations
         if doctor_agent.is_emergency(medical_query):
-            return (
+            alert = (
                 "⚠️ EMERGENCY ALERT: Based on your description, this may require immediate medical attention. "
                 "Please call emergency services (911) or go to the nearest emergency room immediately. "
                 "Do not delay seeking professional medical care.\n\n"
-                f"Doctor's assessment: {doctor_agent.get_response(medical_query)}"
             )
+            # Streaming callers see the alert before the assessment is generated
+            stream_alert(alert)
+            return f"{alert}Doctor's assessment: {doctor_agent.get_response(medical_query)}"
         
         return doctor_agent.get_response(medical_query)
     
@@ -5,10 +5,10 @@ import os
 # Add the src directory to the path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from AgentExpert import GeneralExpertAgent
+from AgentExpert import GeneralExpertAgent, LazyAgent
 
-# Initialize the general expert agent
-general_expert_agent = GeneralExpertAgent()
+# The general expert agent is created on first use
+general_expert_agent = LazyAgent(GeneralExpertAgent)
 
 @tool
 def ConsultGeneralExpertTool(general_query: str) -> str:
@@ -1,5 +1,6 @@
 from langchain_core.tools import tool
-from langchain_google_genai import ChatGoogleGenerativeAI
+from utils.llm_clients import get_llm
+from AgentExpert import LazyAgent
 from langchain_core.messages import SystemMessage, HumanMessage
 import os
 import re
@@ -11,11 +12,7 @@ class MultilingualAgent:
         if not self.gemini_api_key:
             raise ValueError("GEMINI_API_KEY environment variable is required")
         
-        self.llm = ChatGoogleGenerativeAI(
-            model="gemini-2.5-flash",
-            google_api_key=self.gemini_api_key,
-            temperature=0.7
-        )
+        self.llm = get_llm(temperature=0.7)
     
     def detect_language(self, text: str) -> str:
         """Detect the language of input text"""
@@ -107,14 +104,15 @@ Translate the following text to English:
         except Exception as e:
             return f"Translation error: {str(e)}"
 
-# Initialize the multilingual agent
-multilingual_agent = MultilingualAgent()
+# The multilingual agent is created on first use
+multilingual_agent = LazyAgent(MultilingualAgent)
 
 @tool
 def MultilingualSupportTool(user_input: str) -> str:
     """Provide multilingual support for Arabic and English users.
     
-    **ALWAYS CALL THIS TOOL FIRST** for every user input to ensure consistent language handling.
+    Optional: the user's language is already detected before every turn. Use this tool
+    only when you need the detailed response guidance for a language.
     
     This tool:
     - Detects the language of user input (Arabic or English)
@@ -1,8 +1,8 @@
-from .WebSearch import WebSearchTool
-from .HumanAssistant import HumanAssistanceTool
-from .ConsultDoctor import ConsultDoctorTool
-from .ConsultAIResearcher import ConsultAIResearcherTool
-from .MultilingualSupport import MultilingualSupportTool
-from .ConsultArabicDoctor import ConsultArabicDoctorTool
-from .ConsultArabicAIResearcher import ConsultArabicAIResearcherTool
-from .ConsultGeneralExpert import ConsultGeneralExpertTool
\ No newline at end of file
+# Tools are imported on first access (see registry.py), e.g. `from tools import ConsultDoctorTool`
+from .registry import TOOL_MODULES, ENABLED_TOOLS, tool_registry
+
+
+def __getattr__(name):
+    if name in TOOL_MODULES:
+        return tool_registry.get(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
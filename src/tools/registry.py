@@ -0,0 +1,89 @@
+"""
+Tool registry: imports tools on first use and only the enabled ones.
+
+ENABLED_TOOLS (comma-separated tool names) restricts the tools a deployment
+binds to the model; all tools but MultilingualSupportTool are enabled by
+default. Importing a tool module builds its dependencies (Tavily client,
+expert agent classes), so tools are only imported when the model is built or
+the tool is requested by name.
+"""
+
+import os
+import logging
+import importlib
+import threading
+from utils.component_timings import timed
+
+# Tool name -> module of the tools package defining it
+TOOL_MODULES = {
+    "WebSearchTool": "WebSearch",
+    "HumanAssistanceTool": "HumanAssistant",
+    "ConsultDoctorTool": "ConsultDoctor",
+    "ConsultAIResearcherTool": "ConsultAIResearcher",
+    "MultilingualSupportTool": "MultilingualSupport",
+    "ConsultArabicDoctorTool": "ConsultArabicDoctor",
+    "ConsultArabicAIResearcherTool": "ConsultArabicAIResearcher",
+    "ConsultGeneralExpertTool": "ConsultGeneralExpert",
+}
+
+# The language router node replaced MultilingualSupportTool's call on every turn; it can still be enabled
+DEFAULT_TOOLS = [name for name in TOOL_MODULES if name != "MultilingualSupportTool"]
+
+# Load environment variables
+ENABLED_TOOLS = [name.strip() for name in os.getenv("ENABLED_TOOLS", ",".join(DEFAULT_TOOLS)).split(",")
+                 if name.strip()]
+
+logger = logging.getLogger(__name__)
+
+
+class ToolRegistry:
+    """Imports tools lazily and keeps the ones that loaded."""
+
+    def __init__(self, enabled=ENABLED_TOOLS):
+        unknown = [name for name in enabled if name not in TOOL_MODULES]
+        if unknown:
+            raise ValueError(f"Unknown tools in ENABLED_TOOLS: {', '.join(unknown)}")
+        self.enabled = list(enabled)
+        self._tools = {}
+        self._errors = {}
+        self._lock = threading.RLock()
+
+    def get(self, name):
+        """Return a tool by name, importing its module on first use."""
+        tool = self._tools.get(name)
+        if tool is not None:
+            return tool
+        if name not in TOOL_MODULES:
+            raise AttributeError(f"Unknown tool: {name}")
+        with self._lock:
+            if name not in self._tools:
+                with timed(f"tool:{name}"):
+                    module = importlib.import_module(f"{__package__}.{TOOL_MODULES[name]}")
+                # Tool modules report missing API keys instead of raising
+                if not hasattr(module, name):
+                    raise ImportError(f"{name} could not be created (is its API key configured?)")
+                self._tools[name] = getattr(module, name)
+            return self._tools[name]
+
+    def enabled_tools(self):
+        """Return the enabled tools, skipping (and recording) the ones that fail to load."""
+        tools = []
+        for name in self.enabled:
+            try:
+                tools.append(self.get(name))
+            except Exception as e:
+                if name not in self._errors:
+                    logger.error(f"Tool {name} is disabled: {e}")
+                self._errors[name] = str(e)
+        return tools
+
+    def stats(self):
+        """Return the enabled, loaded and failed tools."""
+        return {
+            "enabled": self.enabled,
+            "loaded": list(self._tools),
+            "errors": dict(self._errors),
+        }
+
+
+tool_registry = ToolRegistry()
@@ -0,0 +1,5 @@
+from .language import ARABIC_PATTERN, detect_language, normalize_arabic, normalize_for_search
+from .emergency import EMERGENCY_KEYWORDS_ENGLISH, EMERGENCY_KEYWORDS_ARABIC, detect_emergency
+from .domains import score_domains, unambiguous_domains, mentions_current_events
+from .component_timings import timed, component_timings
+from .instrumentation import instrumentation, trace, span, traced, instrument_checkpointer
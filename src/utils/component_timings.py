@@ -0,0 +1,30 @@
+"""
+Load times of the lazily created components (tools, agents, model, graph).
+
+Components are built on first use instead of at import, so their cost shows up
+on the first request that needs them; timed() records it for the health API.
+"""
+
+import time
+import threading
+from contextlib import contextmanager
+
+_timings = {}
+_lock = threading.Lock()
+
+
+@contextmanager
+def timed(component):
+    """Record how long the body takes as the load time of `component`."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        with _lock:
+            _timings[component] = round(time.perf_counter() - start, 4)
+
+
+def component_timings():
+    """Return the load time in seconds of every component created so far."""
+    with _lock:
+        return dict(_timings)
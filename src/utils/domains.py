@@ -0,0 +1,134 @@
+"""
+Domain keywords shared by the expert agents and the graph's domain router.
+
+score_domains() counts the medical and AI keywords of a query, in English and
+Arabic. Keywords are matched on whole words of the normalized text (Arabic
+letter forms folded, definite article removed), allowing a one-letter Arabic
+prefix (و، ب، ل، ف، ك) and a short suffix, and a phrase of n words counts n.
+unambiguous_domains() tells which domains a query names with a keyword that
+has no everyday meaning outside the domain ("cold" or "transformer" alone do
+not make a question medical or about AI). EXPERT_TOOLS names the tools that
+consult a domain expert.
+"""
+
+import re
+from .language import normalize_arabic, normalize_for_search
+from .emergency import EMERGENCY_KEYWORDS_ENGLISH, EMERGENCY_KEYWORDS_ARABIC
+
+AI_KEYWORDS_ENGLISH = [
+    "artificial intelligence", "ai", "machine learning", "ml", "deep learning",
+    "neural network", "llm", "large language model", "gpt", "transformer",
+    "nlp", "natural language processing", "computer vision", "reinforcement learning",
+    "pytorch", "tensorflow", "hugging face", "openai", "anthropic", "google ai",
+    "algorithm", "model training", "fine-tuning", "prompt engineering",
+    "ai safety", "ai ethics", "agi", "multimodal", "embedding", "attention mechanism"
+]
+
+AI_KEYWORDS_ARABIC = [
+    "الذكاء الاصطناعي", "تعلم الآلة", "التعلم العميق", "الشبكات العصبية",
+    "نماذج اللغة الكبيرة", "معالجة اللغات الطبيعية", "الرؤية الحاسوبية",
+    "التعلم المعزز", "خوارزمية", "نموذج", "تدريب", "ضبط دقيق",
+    "هندسة التوجيه", "أمان الذكاء الاصطناعي", "أخلاقيات الذكاء الاصطناعي"
+]
+
+MEDICAL_KEYWORDS_ENGLISH = EMERGENCY_KEYWORDS_ENGLISH + [
+    "symptom", "pain", "ache", "fever", "headache", "migraine", "cough", "sore throat", "flu", "cold",
+    "diabetes", "blood sugar", "insulin", "blood pressure", "hypertension", "cholesterol", "heart",
+    "kidney", "liver", "asthma", "cancer", "infection", "allergy", "rash", "nausea", "vomiting",
+    "diarrhea", "dizziness", "fatigue", "anxiety", "depression", "pregnancy", "injury", "fracture",
+    "medication", "medicine", "drug", "dose", "dosage", "side effect", "antibiotic", "vaccine",
+    "prescription", "treatment", "diagnosis", "disease", "doctor", "surgery", "health"
+]
+
+MEDICAL_KEYWORDS_ARABIC = EMERGENCY_KEYWORDS_ARABIC + [
+    "أعراض", "ألم", "وجع", "حمى", "حرارة", "صداع", "صداع نصفي", "سعال", "كحة", "التهاب الحلق",
+    "إنفلونزا", "زكام", "السكري", "سكر الدم", "إنسولين", "ضغط الدم", "كوليسترول", "قلب", "كلى",
+    "كبد", "ربو", "سرطان", "عدوى", "التهاب", "حساسية", "طفح", "غثيان", "قيء", "إسهال", "دوخة",
+    "تعب", "قلق", "اكتئاب", "حمل", "إصابة", "كسر", "دواء", "أدوية", "جرعة", "آثار جانبية",
+    "مضاد حيوي", "لقاح", "وصفة طبية", "علاج", "تشخيص", "مرض", "طبيب", "جراحة", "صحة"
+]
+
+DOMAIN_KEYWORDS = {
+    "medical": MEDICAL_KEYWORDS_ENGLISH + MEDICAL_KEYWORDS_ARABIC,
+    "ai": AI_KEYWORDS_ENGLISH + AI_KEYWORDS_ARABIC,
+}
+
+# Keywords with a common meaning outside their domain: they add to a domain's score but never
+# identify it on their own
+AMBIGUOUS_KEYWORDS = frozenset({
+    "cold", "heart", "drug", "health", "treatment", "depression",
+    "ai", "ml", "transformer", "algorithm", "embedding",
+    "قلب", "صحة", "تعب", "قلق", "حمل", "كسر", "علاج",
+    "خوارزمية", "نموذج", "تدريب",
+})
+
+# Questions about current events need WebSearchTool, which only the model can combine with an expert.
+# Matched as exact words with the article kept ("اليوم" is "today", "يوم" just "day")
+CURRENT_EVENTS_KEYWORDS = [
+    "latest", "news", "today", "this week", "this year", "current", "recent", "price",
+    "أحدث", "آخر", "أخبار", "اليوم", "هذا الأسبوع", "هذا العام", "حاليا", "سعر"
+]
+
+# Tools that consult an expert agent; the thread summary records the latest one used.
+# Plain names so the storage layer can use them without importing the tools
+EXPERT_TOOLS = frozenset({
+    "ConsultDoctorTool",
+    "ConsultArabicDoctorTool",
+    "ConsultAIResearcherTool",
+    "ConsultArabicAIResearcherTool",
+    "ConsultGeneralExpertTool",
+})
+
+ARABIC_PREFIX = '[وبلفك]?'
+ARABIC_SUFFIX = '[؀-ۿ]{0,2}'
+ENGLISH_SUFFIX = '(?:s|es)?'
+
+
+def _normalize_exact(text):
+    return normalize_arabic(text).lower()
+
+
+def _keyword_pattern(keywords, normalize=normalize_for_search, arabic_affixes=True):
+    """Compile keywords into one regex matching any of them as whole words."""
+    alternatives = []
+    for keyword in sorted({normalize(keyword) for keyword in keywords}, key=len, reverse=True):
+        escaped = re.escape(keyword)
+        if re.search('[؀-ۿ]', keyword):
+            if arabic_affixes:
+                escaped = f'{ARABIC_PREFIX}{escaped}{ARABIC_SUFFIX}'
+            alternatives.append(f'(?<!\\w){escaped}(?!\\w)')
+        else:
+            alternatives.append(f'(?<!\\w){escaped}{ENGLISH_SUFFIX}(?!\\w)')
+    return re.compile('|'.join(alternatives))
+
+
+DOMAIN_PATTERNS = {domain: _keyword_pattern(keywords) for domain, keywords in DOMAIN_KEYWORDS.items()}
+UNAMBIGUOUS_DOMAIN_PATTERNS = {
+    domain: _keyword_pattern([keyword for keyword in keywords if keyword not in AMBIGUOUS_KEYWORDS])
+    for domain, keywords in DOMAIN_KEYWORDS.items()
+}
+CURRENT_EVENTS_PATTERN = _keyword_pattern(CURRENT_EVENTS_KEYWORDS, _normalize_exact, arabic_affixes=False)
+
+
+def score_domains(text):
+    """Score how strongly a query belongs to each domain.
+
+    Returns:
+        dict: domain -> number of keyword words found (a phrase of n words counts n)
+    """
+    normalized = normalize_for_search(text)
+    return {
+        domain: sum(len(match.group().split()) for match in pattern.finditer(normalized))
+        for domain, pattern in DOMAIN_PATTERNS.items()
+    }
+
+
+def unambiguous_domains(text):
+    """Return the domains the query names with at least one keyword not in AMBIGUOUS_KEYWORDS."""
+    normalized = normalize_for_search(text)
+    return {domain for domain, pattern in UNAMBIGUOUS_DOMAIN_PATTERNS.items() if pattern.search(normalized)}
+
+
+def mentions_current_events(text):
+    """Return True if the query asks about recent or time-sensitive information."""
+    return CURRENT_EVENTS_PATTERN.search(_normalize_exact(text)) is not None
@@ -0,0 +1,22 @@
+"""
+Emergency keywords shared by the API and the conversation analytics.
+"""
+
+EMERGENCY_KEYWORDS_ENGLISH = [
+    "chest pain", "heart attack", "can't breathe", "difficulty breathing",
+    "stroke", "unconscious", "severe bleeding", "allergic reaction",
+    "overdose", "suicide", "emergency", "911", "urgent", "help me"
+]
+
+EMERGENCY_KEYWORDS_ARABIC = [
+    "ألم في الصدر", "ألم الصدر", "نوبة قلبية", "لا أستطيع التنفس", "صعوبة التنفس",
+    "سكتة دماغية", "فاقد الوعي", "نزيف شديد", "حساسية شديدة", "جرعة زائدة",
+    "انتحار", "طوارئ", "عاجل", "إسعاف", "ساعدني"
+]
+
+
+def detect_emergency(text):
+    """Return True if the text contains an emergency keyword."""
+    text_lower = text.lower()
+    return (any(keyword in text_lower for keyword in EMERGENCY_KEYWORDS_ENGLISH) or
+            any(keyword in text for keyword in EMERGENCY_KEYWORDS_ARABIC))
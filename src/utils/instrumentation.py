@@ -0,0 +1,423 @@
+"""
+Per-request traces and aggregated latency, token and cache metrics.
+
+A request handled by the API runs inside trace(); the graph nodes, tools,
+expert agents and checkpointer calls inside it are recorded as spans with their
+wall time and errors, and the LLM clients add the input/output tokens reported
+in the Gemini usage metadata to the span they run in. The current span is kept
+in a context variable, so it follows the graph into its worker threads and
+asyncio tasks (which copy the context), and a span's parent is the span that
+was current when it started.
+
+Finished traces are kept in memory (the last INSTRUMENTATION_TRACES), and every
+span also feeds the process-wide histograms returned by metrics(), whether or
+not it ran inside a trace (e.g. the CLI, or the write-behind thread).
+"""
+
+import os
+import time
+import uuid
+import inspect
+import threading
+import functools
+from contextvars import ContextVar
+from contextlib import contextmanager
+from collections import OrderedDict
+from langgraph.errors import GraphBubbleUp
+
+# Load environment variables
+INSTRUMENTATION = os.getenv("INSTRUMENTATION", "true").lower() in ("1", "true", "yes")
+INSTRUMENTATION_TRACES = int(os.getenv("INSTRUMENTATION_TRACES", "100"))
+
+# Spans kept per trace; a runaway loop must not grow a trace without limit
+MAX_SPANS = 500
+
+# Histogram bucket upper bounds
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+TOKEN_BUCKETS = (10, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 25000, 100000)
+
+_current_span = ContextVar("instrumentation_span", default=None)
+
+
+class Histogram:
+    """Fixed-bucket histogram with count, sum, maximum and estimated percentiles."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        index = next((i for i, bound in enumerate(self.buckets) if value <= bound), len(self.buckets))
+        self.counts[index] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def percentile(self, fraction):
+        """Upper bound of the bucket holding the given fraction of the observations."""
+        target = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= target:
+                return self.buckets[index] if index < len(self.buckets) else self.max
+        return None
+
+    def to_dict(self):
+        labels = [f"le_{bound}" for bound in self.buckets] + ["inf"]
+        return {
+            "count": self.count,
+            "sum": round(self.total, 2),
+            "mean": round(self.total / self.count, 2) if self.count else None,
+            "max": round(self.max, 2),
+            "p50": self.percentile(0.5),
+            "p95": self.percentile(0.95),
+            "buckets": {label: count for label, count in zip(labels, self.counts) if count},
+        }
+
+
+class Span:
+    """One timed operation (a node, a tool, an expert, a checkpointer call)."""
+
+    def __init__(self, kind, name, trace=None, parent=None, attributes=None):
+        self.id = uuid.uuid4().hex[:16]
+        self.kind = kind
+        self.name = name
+        self.trace = trace
+        self.parent = parent
+        self.attributes = dict(attributes or {})
+        self.start = time.perf_counter()
+        self.duration_ms = None
+        self.error = None
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.llm_calls = 0
+        self.cache = None
+
+    def to_dict(self):
+        origin = self.trace.start if self.trace is not None else self.start
+        return {
+            "id": self.id,
+            "parent": self.parent.id if self.parent is not None else None,
+            "kind": self.kind,
+            "name": self.name,
+            "start_ms": round((self.start - origin) * 1000, 2),
+            "duration_ms": self.duration_ms,
+            "error": self.error,
+            "llm_calls": self.llm_calls,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "cache": self.cache,
+            **({"attributes": self.attributes} if self.attributes else {}),
+        }
+
+
+class Trace:
+    """Spans of one request, with its token, cache and error totals."""
+
+    def __init__(self, name, attributes=None):
+        self.id = uuid.uuid4().hex
+        self.name = name
+        self.attributes = dict(attributes or {})
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        self.duration_ms = None
+        self.spans = []
+        self.dropped_spans = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.cache = {}
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def add(self, span):
+        with self._lock:
+            if len(self.spans) < MAX_SPANS:
+                self.spans.append(span)
+            else:
+                self.dropped_spans += 1
+
+    def summary(self):
+        """The trace without its spans, with the time spent per span kind.
+
+        Span times are summed, so a kind whose calls overlap (checkpoint writes run
+        alongside the nodes in async runs) can add up to more than the request.
+        """
+        with self._lock:
+            spans = list(self.spans)
+        time_by_kind = {}
+        for span in spans:
+            if span.duration_ms is not None:
+                time_by_kind[span.kind] = round(time_by_kind.get(span.kind, 0) + span.duration_ms, 2)
+        return {
+            "trace_id": self.id,
+            "name": self.name,
+            "started_at": self.started_at,
+            "duration_ms": self.duration_ms,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "cache": dict(self.cache),
+            "errors": self.errors,
+            "spans": len(spans),
+            "time_by_kind_ms": time_by_kind,
+            **({"attributes": self.attributes} if self.attributes else {}),
+        }
+
+    def to_dict(self):
+        with self._lock:
+            spans = list(self.spans)
+        return {
+            **self.summary(),
+            "spans": [span.to_dict() for span in spans],
+            "dropped_spans": self.dropped_spans,
+        }
+
+
+class Instrumentation:
+    """Keeps the recent traces and the aggregated histograms and counters."""
+
+    def __init__(self, enabled=INSTRUMENTATION, max_traces=INSTRUMENTATION_TRACES):
+        self.enabled = enabled
+        self.max_traces = max_traces
+        self._lock = threading.Lock()
+        self._traces = OrderedDict()  # trace id -> Trace, oldest first
+        self._latency = {}  # "kind.name" -> Histogram of milliseconds
+        self._tokens = {}  # "kind.name.input|output" -> Histogram of tokens per LLM call
+        self._counters = {}  # "cache.<result>", "errors.<kind>.<name>", ...
+
+    @contextmanager
+    def trace(self, name, **attributes):
+        """Record everything running in the body as one trace; yields the Trace (None when disabled)."""
+        if not self.enabled:
+            yield None
+            return
+        trace = Trace(name, attributes)
+        root = Span("request", name, trace)
+        trace.add(root)
+        token = _current_span.set(root)
+        try:
+            yield trace
+        except GeneratorExit:
+            # A streamed response whose client went away
+            root.attributes["cancelled"] = True
+            raise
+        except BaseException as error:
+            self._fail(root, error)
+            raise
+        finally:
+            try:
+                _current_span.reset(token)
+            except ValueError:
+                # A response generator closed from another context; that context is discarded anyway
+                pass
+            self._finish(root)
+            trace.duration_ms = root.duration_ms
+            with self._lock:
+                self._traces[trace.id] = trace
+                while len(self._traces) > self.max_traces:
+                    self._traces.popitem(last=False)
+
+    @contextmanager
+    def span(self, kind, name, attributes=None, activate=True):
+        """Time the body as a child of the current span; yields the Span (None when disabled).
+
+        With activate=False the span does not become the current span, for bodies
+        that yield to the caller (generators), whose context may change in between.
+        """
+        if not self.enabled:
+            yield None
+            return
+        parent = _current_span.get()
+        trace = parent.trace if parent is not None else None
+        span = Span(kind, name, trace, parent, attributes)
+        if trace is not None:
+            trace.add(span)
+        token = _current_span.set(span) if activate else None
+        try:
+            yield span
+        except GeneratorExit:
+            # The caller stopped iterating early; not an error
+            raise
+        except BaseException as error:
+            self._fail(span, error)
+            raise
+        finally:
+            if token is not None:
+                _current_span.reset(token)
+            self._finish(span)
+
+    def traced(self, kind, name=None):
+        """Decorator running a function (sync, async or async generator) inside a span.
+
+        The span is named `name`, or after the class of the instance for methods
+        (e.g. "DoctorAgent") and after the function otherwise.
+        """
+        def decorator(function):
+            qualified = "." in function.__qualname__
+
+            def span_name(args):
+                if name is not None:
+                    return name
+                return type(args[0]).__name__ if qualified and args else function.__name__
+
+            if inspect.isasyncgenfunction(function):
+                @functools.wraps(function)
+                async def wrapper(*args, **kwargs):
+                    with self.span(kind, span_name(args), activate=False):
+                        async for item in function(*args, **kwargs):
+                            yield item
+            elif inspect.iscoroutinefunction(function):
+                @functools.wraps(function)
+                async def wrapper(*args, **kwargs):
+                    with self.span(kind, span_name(args)):
+                        return await function(*args, **kwargs)
+            else:
+                @functools.wraps(function)
+                def wrapper(*args, **kwargs):
+                    with self.span(kind, span_name(args)):
+                        return function(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def record_tokens(self, input_tokens, output_tokens):
+        """Add the usage of one LLM call to the current span and its trace."""
+        if not self.enabled:
+            return
+        span = _current_span.get()
+        key = f"{span.kind}.{span.name}" if span is not None else "llm.untraced"
+        with self._lock:
+            self._histogram(self._tokens, f"{key}.input", TOKEN_BUCKETS).observe(input_tokens)
+            self._histogram(self._tokens, f"{key}.output", TOKEN_BUCKETS).observe(output_tokens)
+        if span is None:
+            return
+        span.llm_calls += 1
+        span.input_tokens += input_tokens
+        span.output_tokens += output_tokens
+        if span.trace is not None:
+            with span.trace._lock:
+                span.trace.input_tokens += input_tokens
+                span.trace.output_tokens += output_tokens
+
+    def record_cache(self, result):
+        """Record a cache lookup ("hit", "semantic_hit", "miss" or "bypassed") on the current span."""
+        if not self.enabled:
+            return
+        self._count(f"cache.{result}")
+        span = _current_span.get()
+        if span is None:
+            return
+        span.cache = result
+        if span.trace is not None:
+            with span.trace._lock:
+                span.trace.cache[result] = span.trace.cache.get(result, 0) + 1
+
+    def record_error(self, error):
+        """Record an error that was handled (and so did not end the current span with an exception)."""
+        if not self.enabled:
+            return
+        span = _current_span.get()
+        if span is None:
+            self._count("errors.untraced")
+        elif span.error is None:
+            self._fail(span, error)
+
+    def _fail(self, span, error):
+        if isinstance(error, GraphBubbleUp):
+            # Interrupts pause the graph (HumanAssistanceTool); they are not failures
+            span.attributes["interrupted"] = True
+            return
+        span.error = f"{type(error).__name__}: {error}"[:300]
+        self._count(f"errors.{span.kind}.{span.name}")
+        if span.trace is not None:
+            with span.trace._lock:
+                span.trace.errors += 1
+
+    def _finish(self, span):
+        span.duration_ms = round((time.perf_counter() - span.start) * 1000, 2)
+        with self._lock:
+            self._histogram(self._latency, f"{span.kind}.{span.name}", LATENCY_BUCKETS_MS).observe(span.duration_ms)
+
+    def _histogram(self, histograms, key, buckets):
+        histogram = histograms.get(key)
+        if histogram is None:
+            histogram = histograms[key] = Histogram(buckets)
+        return histogram
+
+    def _count(self, counter):
+        with self._lock:
+            self._counters[counter] = self._counters.get(counter, 0) + 1
+
+    def get_trace(self, trace_id):
+        """Return a finished trace with all its spans, or None."""
+        with self._lock:
+            trace = self._traces.get(trace_id)
+        return trace.to_dict() if trace is not None else None
+
+    def recent_traces(self, limit=20):
+        """Return the summaries of the most recent traces, newest first."""
+        with self._lock:
+            traces = list(self._traces.values())[-limit:] if limit > 0 else []
+        return [trace.summary() for trace in reversed(traces)]
+
+    def metrics(self):
+        """Return the latency and token histograms and the cache and error counters."""
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "latency_ms": {key: histogram.to_dict() for key, histogram in sorted(self._latency.items())},
+                "tokens": {key: histogram.to_dict() for key, histogram in sorted(self._tokens.items())},
+                "counters": dict(sorted(self._counters.items())),
+            }
+
+    def reset(self):
+        with self._lock:
+            self._traces.clear()
+            self._latency.clear()
+            self._tokens.clear()
+            self._counters.clear()
+
+
+instrumentation = Instrumentation()
+
+trace = instrumentation.trace
+span = instrumentation.span
+traced = instrumentation.traced
+record_tokens = instrumentation.record_tokens
+record_cache = instrumentation.record_cache
+record_error = instrumentation.record_error
+
+
+class InstrumentedCheckpointer:
+    """Checkpointer proxy recording a span for every read and write of the wrapped checkpointer."""
+
+    TRACED_METHODS = ("put", "put_writes", "get_tuple", "list", "delete_thread",
+                      "aput", "aput_writes", "aget_tuple", "alist", "adelete_thread")
+
+    def __init__(self, checkpointer):
+        self.checkpointer = checkpointer
+        for method in self.TRACED_METHODS:
+            if hasattr(checkpointer, method):
+                setattr(self, method, self._wrap(method))
+
+    def _wrap(self, method):
+        function = getattr(self.checkpointer, method)
+        # list() of MemorySaver is a generator; time the iteration, not the call
+        if inspect.isgeneratorfunction(function):
+            def wrapper(*args, **kwargs):
+                with span("checkpointer", method, activate=False):
+                    yield from function(*args, **kwargs)
+            return functools.wraps(function)(wrapper)
+        return traced("checkpointer", method)(function)
+
+    def __getattr__(self, name):
+        return getattr(self.checkpointer, name)
+
+
+def instrument_checkpointer(checkpointer):
+    """Wrap a checkpointer so its calls are recorded, unless instrumentation is disabled."""
+    if not instrumentation.enabled or checkpointer is None:
+        return checkpointer
+    return InstrumentedCheckpointer(checkpointer)
@@ -0,0 +1,51 @@
+"""
+Language helpers shared by the storage layer and the graph.
+
+Arabic text is written with several interchangeable letter forms (أ/إ/آ/ا,
+ى/ي, ة/ه), optional diacritics and decorative tatweel, so the same word can
+be spelled many ways. normalize_arabic() folds them to one form, which is what
+the search index stores and what search queries are matched against.
+"""
+
+import re
+import unicodedata
+
+# Arabic, Arabic Supplement, Arabic Extended-A and the presentation forms
+ARABIC_PATTERN = re.compile(r'[\u0600-\u06FF\u0750-\u077F\u08A0-\u08FF\uFB50-\uFDFF\uFE70-\uFEFF]')
+
+# Harakat, tanween, shadda, sukun, superscript alef and Quranic marks
+ARABIC_DIACRITICS = re.compile(r'[\u0610-\u061A\u064B-\u065F\u0670\u06D6-\u06ED]')
+TATWEEL = '\u0640'
+
+ARABIC_LETTER_FORMS = str.maketrans({
+    'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ٱ': 'ا',
+    'ى': 'ي',
+    'ة': 'ه',
+    'ؤ': 'و',
+    'ئ': 'ي',
+})
+
+# Definite article (optionally preceded by wa-/bi-/fa-/ka-) in front of a word
+ARABIC_ARTICLE = re.compile(r'\b(?:[وبفك]?ال)(?=\w{2,})')
+
+
+def detect_language(text):
+    """Detect the language of a text.
+
+    Returns:
+        str: "ar" if the text contains Arabic script, "en" otherwise
+    """
+    return "ar" if text and ARABIC_PATTERN.search(text) else "en"
+
+
+def normalize_arabic(text):
+    """Fold alef/yaa/taa-marbuta variants and drop diacritics and tatweel."""
+    # NFKC maps the presentation forms (e.g. ﻻ) back to the base letters
+    text = unicodedata.normalize('NFKC', text)
+    text = ARABIC_DIACRITICS.sub('', text).replace(TATWEEL, '')
+    return text.translate(ARABIC_LETTER_FORMS)
+
+
+def normalize_for_search(text):
+    """Normalize text for the full-text index: lower case, Arabic forms folded, definite article removed."""
+    return ARABIC_ARTICLE.sub('', normalize_arabic(text).lower())
@@ -0,0 +1,165 @@
+"""
+Shared registry of Gemini chat clients.
+
+Every ChatGoogleGenerativeAI instance builds its own gRPC channel, so an agent
+per expert meant one channel (connection setup, sockets, memory) per agent
+and worker. The registry hands out one client per (model, temperature,
+options) key, created on first use, and all clients that only differ in
+request settings (model, temperature, top_p, ...) share the channel of a
+single transport owner per API key and transport configuration.
+
+Each client carries a RequestCounter callback; registry.stats() reports the
+requests, errors and token usage of every client, and each call's usage is also
+recorded on the current instrumentation span (utils/instrumentation.py).
+"""
+
+import os
+import threading
+from typing import Any, Optional
+from pydantic import Field
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_google_genai import ChatGoogleGenerativeAI
+from .instrumentation import record_tokens, record_error
+
+# Load environment variables
+LLM_MODEL = os.getenv("LLM_MODEL", "gemini-2.5-flash")
+
+# Options that change how the client connects; clients share a channel only if these match
+TRANSPORT_OPTIONS = ("google_api_key", "credentials", "transport", "client_options", "additional_headers")
+
+
+def _freeze(value):
+    """Hashable form of an option value for the registry keys."""
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+class RequestCounter(BaseCallbackHandler):
+    """Counts the requests, errors and tokens of one client."""
+
+    run_inline = True
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+
+    def on_chat_model_start(self, serialized, messages, **kwargs):
+        with self._lock:
+            self.requests += 1
+
+    def on_llm_end(self, response, **kwargs):
+        input_tokens = output_tokens = 0
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                input_tokens += usage.get("input_tokens", 0)
+                output_tokens += usage.get("output_tokens", 0)
+        with self._lock:
+            self.input_tokens += input_tokens
+            self.output_tokens += output_tokens
+        # Attributed to the node, tool or expert making the call (the handler runs inline)
+        record_tokens(input_tokens, output_tokens)
+
+    def on_llm_error(self, error, **kwargs):
+        with self._lock:
+            self.errors += 1
+        record_error(error)
+
+    def stats(self):
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+        }
+
+
+class SharedChatGoogleGenerativeAI(ChatGoogleGenerativeAI):
+    """ChatGoogleGenerativeAI that uses the (async) channel of a transport owner."""
+
+    transport_owner: Optional[Any] = Field(default=None, exclude=True)
+
+    @property
+    def async_client(self):
+        # The async channel is created lazily inside the event loop; create it once, on the owner
+        if self.transport_owner is not None:
+            return self.transport_owner.async_client
+        return super().async_client
+
+
+class LLMClientRegistry:
+    """Creates chat clients lazily and shares them, and their transports, across agents."""
+
+    def __init__(self):
+        self._clients = {}  # (model, temperature, options) -> (client, RequestCounter)
+        self._owners = {}  # transport options -> client owning the channel
+        self._lock = threading.Lock()
+
+    def get(self, model=LLM_MODEL, temperature=0.7, **options):
+        """Return the shared client for these settings, creating it on first use.
+
+        Args:
+            model: Gemini model name
+            temperature: Sampling temperature
+            **options: Other ChatGoogleGenerativeAI fields (e.g. top_p, max_output_tokens)
+
+        Returns:
+            ChatGoogleGenerativeAI: Client to use for requests
+        """
+        key = (model, temperature, _freeze(options))
+        entry = self._clients.get(key)
+        if entry is None:
+            with self._lock:
+                entry = self._clients.get(key)
+                if entry is None:
+                    entry = self._create(model, temperature, options)
+                    self._clients[key] = entry
+        return entry[0]
+
+    def _create(self, model, temperature, options):
+        if not 0 <= temperature <= 2.0:
+            raise ValueError("temperature must be in the range [0.0, 2.0]")
+        transport_options = {name: options.pop(name) for name in TRANSPORT_OPTIONS if name in options}
+        transport_options.setdefault("google_api_key", os.getenv("GEMINI_API_KEY"))
+        owner_key = _freeze(transport_options)
+        owner = self._owners.get(owner_key)
+        if owner is None:
+            owner = SharedChatGoogleGenerativeAI(model=model, **transport_options)
+            self._owners[owner_key] = owner
+
+        counter = RequestCounter()
+        # A shallow copy keeps the owner's channel; validators (which would build a new one) don't run
+        client = owner.model_copy(update={
+            "model": model if model.startswith("models/") else f"models/{model}",
+            "temperature": temperature,
+            "callbacks": [counter],
+            "transport_owner": owner,
+            **options,
+        })
+        return client, counter
+
+    def stats(self):
+        """Return the request counters of every client created so far."""
+        with self._lock:
+            entries = list(self._clients.items())
+        return {
+            "transports": len(self._owners),
+            "clients": [
+                {"model": model, "temperature": temperature, "options": dict(options), **counter.stats()}
+                for (model, temperature, options), (_, counter) in entries
+            ],
+        }
+
+
+registry = LLMClientRegistry()
+
+
+def get_llm(model=LLM_MODEL, temperature=0.7, **options):
+    """Shortcut for registry.get()."""
+    return registry.get(model, temperature, **options)
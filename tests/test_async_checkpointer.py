@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from models.async_checkpointer import AsyncSimplePostgresCheckpointer
+from models.connect_database import SimplePostgresCheckpointer
+from tests.test_checkpointer_conformance import make_checkpoint
+
+
+def run_with_saver(url, test, **kwargs):
+    """Run `test(saver)` in a fresh event loop with a set up async checkpointer."""
+    async def run():
+        saver = AsyncSimplePostgresCheckpointer(url, min_size=1, max_size=2, **kwargs)
+        await saver.setup()
+        try:
+            return await test(saver)
+        finally:
+            await saver.aclose()
+    return asyncio.run(run())
+
+
+def test_put_get_list_and_writes(postgres_url):
+    async def test(saver):
+        config = {"configurable": {"thread_id": "async-round-trip", "checkpoint_ns": ""}}
+        first = await saver.aput(config, make_checkpoint(1), {"source": "input", "step": -1}, {})
+        second = await saver.aput(first, make_checkpoint(2), {"source": "loop", "step": 0}, {})
+        await saver.aput_writes(second, [("value", 3)], "task-1")
+
+        latest = await saver.aget_tuple(config)
+        assert latest.config == second
+        assert latest.parent_config == first
+        assert latest.checkpoint["channel_values"] == {"value": 2}
+        assert latest.metadata == {"source": "loop", "step": 0}
+        assert latest.pending_writes == [("task-1", "value", 3)]
+
+        assert (await saver.aget_tuple(first)).checkpoint["channel_values"] == {"value": 1}
+        listed = [saved.config async for saved in saver.alist(config)]
+        assert listed == [second, first]
+        assert [saved.config async for saved in saver.alist(config, before=second)] == [first]
+
+    run_with_saver(postgres_url, test)
+
+
+def test_message_log_is_shared_with_the_sync_checkpointer(postgres_url):
+    thread_id = "async-message-log"
+    messages = [HumanMessage("what is a fever?", id="m1"), AIMessage("a high temperature", id="m2")]
+
+    async def test(saver):
+        config = {"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}}
+        checkpoint = make_checkpoint(1)
+        checkpoint["channel_values"] = {"messages": messages}
+        config = await saver.aput(config, checkpoint, {"source": "loop", "step": 0}, {})
+
+        checkpoint = make_checkpoint(2)
+        checkpoint["channel_values"] = {"messages": messages + [HumanMessage("thanks", id="m3")]}
+        await saver.aput(config, checkpoint, {"source": "loop", "step": 1}, {})
+        return (await saver.aget_tuple(config)).checkpoint["channel_values"]["messages"]
+
+    assert [m.content for m in run_with_saver(postgres_url, test, storage_mode="message_log")] == [
+        "what is a fever?", "a high temperature"]
+
+    sync_saver = SimplePostgresCheckpointer(postgres_url, min_size=1, max_size=1, cache_size=0)
+    try:
+        latest = sync_saver.get_tuple({"configurable": {"thread_id": thread_id}})
+        assert [m.id for m in latest.checkpoint["channel_values"]["messages"]] == ["m1", "m2", "m3"]
+    finally:
+        sync_saver.close()
+
+
+def test_sync_calls_from_the_event_loop_are_refused(postgres_url):
+    async def test(saver):
+        with pytest.raises(asyncio.InvalidStateError):
+            saver.get_tuple({"configurable": {"thread_id": "async-sync-call"}})
+        # Other threads use the serving loop
+        assert await asyncio.to_thread(saver.get_tuple, {"configurable": {"thread_id": "async-sync-call"}}) is None
+
+    run_with_saver(postgres_url, test)
@@ -0,0 +1,94 @@
+"""/chat/stream frames the graph's answer and the experts' tokens as Server-Sent Events."""
+
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import StateGraph, START, END, MessagesState
+
+from AgentExpert.streaming import generate, stream_alert
+from api.routes import chat
+
+
+def expert(state: MessagesState):
+    stream_alert("Call 911 now")
+    expert_llm = GenericFakeChatModel(messages=iter([AIMessage("See a doctor today")]))
+    return {"messages": [AIMessage(generate(expert_llm, state["messages"], "DoctorAgent"))]}
+
+
+def chatbot(state: MessagesState):
+    chatbot_llm = GenericFakeChatModel(messages=iter([AIMessage("Please see a doctor")]))
+    return {"messages": [chatbot_llm.invoke(state["messages"])]}
+
+
+def build_graph():
+    builder = StateGraph(MessagesState)
+    builder.add_node("expert", expert)
+    builder.add_node("chatbot", chatbot)
+    builder.add_edge(START, "expert")
+    builder.add_edge("expert", "chatbot")
+    builder.add_edge("chatbot", END)
+    return builder.compile(checkpointer=MemorySaver())
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(chat, "async_graph", build_graph())
+    app = FastAPI()
+    app.include_router(chat.router)
+    return TestClient(app)
+
+
+def stream_events(client, message, session_id):
+    with client.stream("POST", "/chat/stream", json={"message": message, "session_id": session_id}) as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        body = response.read().decode("utf-8")
+    frames = body.split("\n\n")
+    assert frames[-1] == ""
+    assert all(frame.startswith("data: ") and "\n" not in frame for frame in frames[:-1])
+    return [json.loads(frame[len("data: "):]) for frame in frames[:-1]]
+
+
+def test_stream_sends_expert_tokens_then_the_answer(client):
+    events = stream_events(client, "I have chest pain", "stream-session")
+    types = [event["type"] for event in events]
+
+    assert types[0] == "emergency_alert" and events[0]["content"] == "Call 911 now"
+    expert_tokens = [event for event in events if event["type"] == "expert_token"]
+    assert {event["expert"] for event in expert_tokens} == {"DoctorAgent"}
+    assert "".join(event["content"] for event in expert_tokens) == "See a doctor today"
+    # The expert node's model tokens are not repeated as answer tokens
+    assert "".join(event["content"] for event in events if event["type"] == "token") == "Please see a doctor"
+    assert types.index("token") > types.index("expert_token")
+
+    done = events[-1]
+    assert types.count("done") == 1 and done["type"] == "done"
+    assert done["message"] == "Please see a doctor"
+    assert done["session_id"] == "stream-session"
+    assert done["is_emergency"] is True
+
+
+def test_stream_reports_errors_as_an_event(client, monkeypatch):
+    def broken(state: MessagesState):
+        raise RuntimeError("model unavailable")
+
+    builder = StateGraph(MessagesState)
+    builder.add_node("chatbot", broken)
+    builder.add_edge(START, "chatbot")
+    monkeypatch.setattr(chat, "async_graph", builder.compile(checkpointer=MemorySaver()))
+
+    events = stream_events(client, "hello", "broken-session")
+
+    assert events == [{"type": "error", "detail": "Error processing request: model unavailable"}]
+
+
+def test_experts_outside_a_graph_run_answer_in_one_call():
+    llm = GenericFakeChatModel(messages=iter([AIMessage("Rest and fluids")]))
+    assert generate(llm, [], "DoctorAgent") == "Rest and fluids"
+    # No stream to send the alert to
+    stream_alert("Call 911 now")
@@ -0,0 +1,94 @@
+import time
+
+import psycopg
+import pytest
+
+from models.checkpoint_cache import CACHE_CHANNEL, CheckpointCache, invalidation_payload, worker_id
+from models.connect_database import SimplePostgresCheckpointer
+from tests.test_checkpointer_conformance import make_checkpoint
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.02)
+    return True
+
+
+def put(saver, thread_id, value=1):
+    config = {"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}}
+    return saver.put(config, make_checkpoint(value), {"source": "loop", "step": value}, {})
+
+
+@pytest.fixture
+def cached_saver(create_database):
+    url = create_database()
+    saver = SimplePostgresCheckpointer(url, min_size=1, max_size=2, cache_size=10)
+    put(saver, "warm-up")
+    # The listener clears the cache once it is listening; wait for that before testing
+    with psycopg.connect(url, autocommit=True) as conn:
+        assert wait_for(lambda: conn.execute(
+            "SELECT COUNT(*) FROM pg_stat_activity WHERE datname = current_database() AND query = %s",
+            (f"LISTEN {CACHE_CHANNEL}",)).fetchone()[0] == 1)
+    yield url, saver
+    saver.close()
+
+
+def test_cache_is_a_bounded_lru_with_a_ttl():
+    cache = CheckpointCache(max_size=2, ttl=60)
+    cache.put("a", "tuple a")
+    cache.put("b", "tuple b")
+    assert cache.get("a") == "tuple a"
+    cache.put("c", "tuple c")
+    # "b" was the least recently used
+    assert cache.get("b") is None
+    assert cache.get("a") == "tuple a" and cache.get("c") == "tuple c"
+    assert cache.stats()["evictions"] == 1
+
+    expired = CheckpointCache(max_size=2, ttl=0)
+    expired.put("a", "tuple a")
+    time.sleep(0.01)
+    assert expired.get("a") is None
+
+
+def test_reads_started_before_an_invalidation_are_not_cached():
+    cache = CheckpointCache(max_size=2, ttl=60)
+    generation = cache.generation()
+    cache.invalidate("a")
+    cache.fill("a", "stale tuple", generation)
+    assert cache.get("a") is None
+
+
+def test_invalidation_payload_names_the_writer_and_the_thread():
+    assert invalidation_payload("thread-1", sender="worker-a") == "worker-a:thread-1"
+    assert invalidation_payload("thread-1") == f"{worker_id()}:thread-1"
+
+
+def test_writes_notify_the_other_workers(cached_saver):
+    url, saver = cached_saver
+    with psycopg.connect(url, autocommit=True) as conn:
+        conn.execute(f"LISTEN {CACHE_CHANNEL}")
+        put(saver, "notified")
+        payloads = [notify.payload for notify in conn.notifies(timeout=2.0, stop_after=1)]
+    assert payloads == [invalidation_payload("notified")]
+
+
+def test_listener_evicts_threads_written_by_other_workers(cached_saver):
+    url, saver = cached_saver
+    put(saver, "own")
+    config = put(saver, "other")
+    assert saver.get_tuple(config).config == config
+    assert saver.cache_stats()["hits"] == 1
+
+    with psycopg.connect(url, autocommit=True) as conn:
+        # Notifications are delivered in order, so once "other" is evicted "own" has been seen too
+        conn.execute("SELECT pg_notify(%s, %s)", (CACHE_CHANNEL, invalidation_payload("own")))
+        conn.execute("SELECT pg_notify(%s, %s)", (CACHE_CHANNEL, invalidation_payload("other", "worker-b")))
+
+    assert wait_for(lambda: saver.cache.get("other") is None)
+    assert saver.cache.get("own") is not None
+    # The next read goes to the database and caches the result again
+    assert saver.get_tuple({"configurable": {"thread_id": "other"}}).config == config
+    assert saver.cache.get("other") is not None
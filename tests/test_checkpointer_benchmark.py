@@ -0,0 +1,38 @@
+import psycopg
+import pytest
+
+from benchmarks.checkpointer_benchmark import run_benchmark, run_scenario
+
+
+def test_scenario_reports_every_metric():
+    result = run_scenario("sqlite", None, message_count=4, thread_count=3, concurrency=2, turns=6)
+
+    assert {key: result[key] for key in ("backend", "messages", "threads", "concurrency", "turns")} == {
+        "backend": "sqlite", "messages": 4, "threads": 3, "concurrency": 2, "turns": 6}
+    # Every turn stores exactly one new checkpoint row
+    assert result["rows_per_turn"] == 1
+    assert result["turns_per_s"] > 0
+    for operation in ("put", "get_tuple", "list"):
+        assert 0 <= result[f"{operation}_p50_ms"] <= result[f"{operation}_p99_ms"]
+
+
+def test_concurrency_above_the_thread_count_is_not_run_twice():
+    results = run_benchmark(["memory"], [2], [1, 4], [1, 8], turns=4, db_url=None)
+
+    assert [(row["threads"], row["concurrency"]) for row in results] == [(1, 1), (4, 1), (4, 4)]
+
+
+def test_postgres_runs_in_a_throwaway_schema(postgres_url):
+    result = run_scenario("postgres-log", postgres_url, message_count=4, thread_count=2, concurrency=1, turns=4)
+
+    # The checkpoint row and the turn's two messages in the log
+    assert result["rows_per_turn"] == 3
+    assert result["wal_bytes_per_turn"] > 0
+    with psycopg.connect(postgres_url) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM information_schema.schemata "
+                            "WHERE schema_name LIKE 'checkpoint_bench_%'").fetchone()[0] == 0
+
+
+def test_postgres_needs_a_database_url():
+    with pytest.raises(ValueError, match="BENCHMARK_DATABASE_URL"):
+        run_scenario("postgres", None, message_count=1, thread_count=1, concurrency=1, turns=1)
@@ -0,0 +1,177 @@
+"""Behaviour every checkpointer backend must share with LangGraph's own savers.
+
+Runs against SqliteCheckpointer and SimplePostgresCheckpointer (on the server
+of TEST_DATABASE_URL, see conftest.py), the latter also behind the write-behind
+queue.
+"""
+
+import gc
+import sqlite3
+import threading
+import uuid
+
+import pytest
+from langgraph.checkpoint.base import WRITES_IDX_MAP, empty_checkpoint
+from langgraph.checkpoint.base.id import uuid6
+from langgraph.graph import StateGraph, START, END
+from langgraph.types import Command, interrupt
+from typing_extensions import TypedDict
+
+from models.sqlite_checkpointer import SqliteCheckpointer
+
+INTERRUPT = next(channel for channel in WRITES_IDX_MAP if "interrupt" in channel)
+
+
+@pytest.fixture(params=["sqlite", "postgres", "write_behind"])
+def saver(request, tmp_path):
+    if request.param == "sqlite":
+        saver = SqliteCheckpointer(str(tmp_path / "checkpoints.db"))
+    else:
+        from models.connect_database import SimplePostgresCheckpointer
+        saver = SimplePostgresCheckpointer(request.getfixturevalue("postgres_url"), min_size=1, max_size=2,
+                                           cache_size=0)
+        if request.param == "write_behind":
+            from models.write_behind import WriteBehindCheckpointer
+            saver = WriteBehindCheckpointer(saver)
+    yield saver
+    saver.close()
+
+
+@pytest.fixture
+def thread_id():
+    return f"conformance-{uuid.uuid4().hex}"
+
+
+def make_checkpoint(value):
+    checkpoint = empty_checkpoint()
+    checkpoint["id"] = str(uuid6())
+    checkpoint["channel_values"] = {"value": value}
+    checkpoint["channel_versions"] = {"value": 1}
+    return checkpoint
+
+
+def put_chain(saver, thread_id, count):
+    """Store `count` checkpoints, each the child of the previous one."""
+    config = {"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}}
+    configs = []
+    for step in range(count):
+        config = saver.put(config, make_checkpoint(step), {"source": "loop", "step": step}, {})
+        configs.append(config)
+    return configs
+
+
+def checkpoint_ids(tuples):
+    return [saved.config["configurable"]["checkpoint_id"] for saved in tuples]
+
+
+def test_get_tuple_latest_and_by_id(saver, thread_id):
+    first, second, third = put_chain(saver, thread_id, 3)
+
+    latest = saver.get_tuple({"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}})
+    assert latest.config == third
+    assert latest.checkpoint["channel_values"] == {"value": 2}
+    assert latest.metadata == {"source": "loop", "step": 2}
+    assert latest.parent_config == second
+
+    oldest = saver.get_tuple(first)
+    assert oldest.checkpoint["channel_values"] == {"value": 0}
+    assert oldest.parent_config is None
+
+    assert saver.get_tuple({"configurable": {"thread_id": f"{thread_id}-missing", "checkpoint_ns": ""}}) is None
+
+
+def test_list_with_before_and_limit(saver, thread_id):
+    configs = put_chain(saver, thread_id, 4)
+    ids = [config["configurable"]["checkpoint_id"] for config in configs]
+    thread = {"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}}
+
+    assert checkpoint_ids(saver.list(thread)) == ids[::-1]
+    assert checkpoint_ids(saver.list(thread, limit=2)) == ids[:1:-1]
+    assert checkpoint_ids(saver.list(thread, before=configs[2])) == ids[1::-1]
+    assert checkpoint_ids(saver.list(thread, before=configs[3], limit=1)) == [ids[2]]
+    assert list(saver.list({"configurable": {"thread_id": f"{thread_id}-missing", "checkpoint_ns": ""}})) == []
+
+
+def test_put_writes_become_pending_writes(saver, thread_id):
+    _, latest = put_chain(saver, thread_id, 2)
+
+    saver.put_writes(latest, [("value", "a"), ("other", {"n": 1})], "task-1")
+    # Regular writes are stored once per task and index, like LangGraph's savers
+    saver.put_writes(latest, [("value", "changed")], "task-1")
+    # Special channels are replaced
+    saver.put_writes(latest, [(INTERRUPT, "first")], "task-2")
+    saver.put_writes(latest, [(INTERRUPT, "second")], "task-2")
+
+    pending = saver.get_tuple(latest).pending_writes
+    assert sorted(pending) == sorted([
+        ("task-1", "value", "a"),
+        ("task-1", "other", {"n": 1}),
+        ("task-2", INTERRUPT, "second"),
+    ])
+    # Writes belong to their checkpoint only
+    parent = saver.get_tuple(saver.get_tuple(latest).parent_config)
+    assert parent.pending_writes == []
+    assert sorted(next(iter(saver.list(latest, limit=1))).pending_writes) == sorted(pending)
+
+
+class ResumeState(TypedDict, total=False):
+    work: str
+    answer: str
+
+
+def test_interrupt_and_resume(saver, thread_id):
+    runs = []
+
+    def work(state):
+        runs.append("work")
+        return {"work": "done"}
+
+    def ask(state):
+        return {"answer": interrupt("question?")}
+
+    builder = StateGraph(ResumeState)
+    builder.add_node("work", work)
+    builder.add_node("ask", ask)
+    builder.add_edge(START, "work")
+    builder.add_edge(START, "ask")
+    builder.add_edge("work", END)
+    builder.add_edge("ask", END)
+    graph = builder.compile(checkpointer=saver)
+    config = {"configurable": {"thread_id": thread_id}}
+
+    graph.invoke({}, config)
+    state = graph.get_state(config)
+    assert [item.value for item in state.interrupts] == ["question?"]
+
+    assert graph.invoke(Command(resume="yes"), config) == {"work": "done", "answer": "yes"}
+    # The finished parallel task was taken from the pending writes, not run again
+    assert runs == ["work"]
+    assert graph.get_state(config).next == ()
+
+
+def test_sqlite_reader_connections_close_with_their_threads(tmp_path):
+    saver = SqliteCheckpointer(str(tmp_path / "checkpoints.db"))
+    thread = {"configurable": {"thread_id": "readers", "checkpoint_ns": ""}}
+    connections = []
+
+    def read():
+        saver.get_tuple(thread)
+        connections.append(saver._reader())
+
+    workers = [threading.Thread(target=read) for _ in range(3)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    gc.collect()
+
+    assert len(saver._readers) == 0
+    for conn in connections:
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+
+    saver.get_tuple(thread)
+    main_connection = saver._reader()
+    saver.close()
+    with pytest.raises(sqlite3.ProgrammingError):
+        main_connection.execute("SELECT 1")
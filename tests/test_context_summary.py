@@ -0,0 +1,47 @@
+from langchain_core.messages import AIMessage, HumanMessage
+
+import StateGraph
+import utils.llm_clients
+from models.sqlite_checkpointer import SqliteCheckpointer
+from nodes import context_manager
+
+
+class FakeModel:
+    def __init__(self, answer):
+        self.answer = answer
+        self.calls = []
+
+    def invoke(self, messages):
+        self.calls.append(messages)
+        return AIMessage(content=self.answer(len(self.calls)))
+
+
+def test_summary_is_stored_in_the_checkpoint(tmp_path, monkeypatch):
+    chat_model = FakeModel(lambda n: f"answer {n} " + "x" * 300)
+    summary_model = FakeModel(lambda n: f"summary {n}")
+    monkeypatch.setattr(StateGraph, "get_base_model", lambda: chat_model)
+    monkeypatch.setattr(utils.llm_clients, "get_llm", lambda **kwargs: summary_model)
+    monkeypatch.setattr(context_manager, "summarize", True)
+    monkeypatch.setattr(context_manager, "recent_turns", 2)
+    monkeypatch.setattr(context_manager, "summary_batch_tokens", 50)
+    path = str(tmp_path / "checkpoints.db")
+    config = {"configurable": {"thread_id": "summary"}}
+
+    saver = SqliteCheckpointer(path)
+    graph = StateGraph.build_graph_builder().compile(checkpointer=saver)
+    for turn in range(3):
+        result = graph.invoke({"messages": [HumanMessage(content=f"tell me story {turn}")]}, config)
+        assert result["messages"][-1].content.startswith(f"answer {turn + 1}")
+    saver.close()
+    assert len(summary_model.calls) == 1
+
+    # Another worker, or the same one after a restart, reads the summary from the checkpoint
+    saver = SqliteCheckpointer(path)
+    graph = StateGraph.build_graph_builder().compile(checkpointer=saver)
+    state = graph.get_state(config).values
+    assert state["summary"] == "summary 1"
+    assert state["summarized_count"] == 2
+
+    graph.invoke({"messages": [HumanMessage(content="tell me story 3")]}, config)
+    saver.close()
+    assert "summary 1" in chat_model.calls[-1][0].content
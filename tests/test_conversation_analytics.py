@@ -0,0 +1,56 @@
+import json
+import os
+from datetime import datetime
+
+from models.conversation_analytics import build_report, load_messages, report_to_json
+
+# Three sessions: an English emergency with a doctor consult (2 turns), an Arabic
+# consult and an English web search (1 turn each), over two days
+EXPORT = os.path.join(os.path.dirname(__file__), "fixtures", "analytics_export.jsonl")
+
+
+def test_report_values():
+    report = build_report(load_messages(EXPORT))
+
+    assert report["messages"] == 13
+    assert report["sessions"] == 3
+    assert report["medical_consults"] == {"ar": 1, "en": 1, "total": 2}
+    assert report["tool_usage"].to_dict("index") == {
+        "ConsultArabicDoctorTool": {"ar": 1, "en": 0, "total": 1},
+        "ConsultDoctorTool": {"ar": 0, "en": 1, "total": 1},
+        "WebSearchTool": {"ar": 0, "en": 1, "total": 1},
+    }
+    assert report["turns_per_session"] == {
+        "sessions": 3, "mean": 1.33, "p50": 1.0, "p90": 1.8, "max": 2,
+        "histogram": {"1": 2, "2": 1, "3-5": 0, "6-10": 0, "11-20": 0, "21+": 0},
+    }
+    assert report["language_mix"] == {
+        "messages": {"ar": 1, "en": 3, "ar_share": 0.25},
+        "sessions": {"ar": 1, "en": 2, "ar_share": 0.3333},
+    }
+    # Only user messages count: the assistant's "call 911" is not an emergency
+    assert report["emergency_rate"] == {
+        "flagged_messages": 1, "message_rate": 0.25,
+        "flagged_sessions": 1, "session_rate": 0.3333,
+        "by_language": {"ar": {"flagged": 0, "rate": 0.0}, "en": {"flagged": 1, "rate": 0.3333}},
+    }
+
+    human = report["message_lengths"].loc["human"]
+    assert (human["count"], human["mean"], human["p50"], human["max"]) == (4, 11.5, 11.5, 17)
+    # The longest answer is the Arabic one, counted in characters rather than bytes
+    assert report["message_lengths"].loc["ai", "max"] == 17
+
+    assert report["daily_volume"].reset_index().astype({"day": str}).to_dict("records") == [
+        {"day": "2025-06-01", "messages": 4, "user_messages": 2, "sessions": 1, "medical_consults": 1},
+        {"day": "2025-06-02", "messages": 6, "user_messages": 2, "sessions": 2, "medical_consults": 1},
+    ]
+    assert json.loads(json.dumps(report_to_json(report), default=str))["tool_usage"]["WebSearchTool"]["total"] == 1
+
+
+def test_time_range_keeps_the_messages_stored_in_it():
+    frame = load_messages(EXPORT, since=datetime(2025, 6, 2), until=datetime(2025, 6, 2, 11))
+    report = build_report(frame)
+
+    assert report["messages"] == 3
+    assert report["sessions"] == 1
+    assert report["language_mix"]["sessions"] == {"ar": 1, "en": 0, "ar_share": 1.0}
@@ -0,0 +1,25 @@
+import pytest
+
+from nodes.DomainRouter import classify
+
+
+@pytest.mark.parametrize("query", [
+    "I have a cold heart",
+    "What is a transformer algorithm?",
+    "Which ML algorithm is best for health data?",
+    "Is this drug good for my health?",
+    "عندي تعب وقلق",
+])
+def test_ambiguous_keywords_alone_defer_to_the_chatbot(query):
+    assert classify(query)[0] is None
+
+
+@pytest.mark.parametrize("query, domain", [
+    ("I have a fever and a headache", "medical"),
+    ("I caught a cold and have a fever", "medical"),
+    ("عندي حمى وصداع", "medical"),
+    ("Explain the transformer attention mechanism in deep learning", "ai"),
+    ("ما هي خوارزمية التعلم العميق", "ai"),
+])
+def test_unambiguous_keywords_are_routed(query, domain):
+    assert classify(query)[0] == domain
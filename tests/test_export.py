@@ -0,0 +1,94 @@
+import json
+
+import psycopg
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from models.connect_database import SimplePostgresCheckpointer
+from models.export_conversations import ConversationExporter, EXPORT_COLUMNS, pa
+from tests.test_checkpointer_conformance import make_checkpoint
+
+
+@pytest.fixture
+def database(create_database):
+    url = create_database()
+    saver = SimplePostgresCheckpointer(url, min_size=1, max_size=2, cache_size=0, storage_mode="message_log")
+    yield url, saver
+    saver.close()
+
+
+def write_conversation(saver, thread_id, messages, config=None):
+    config = config or {"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}}
+    checkpoint = make_checkpoint(len(messages))
+    checkpoint["channel_values"] = {"messages": messages}
+    return saver.put(config, checkpoint, {"source": "loop", "step": len(messages)}, {})
+
+
+def age_threads(url, minutes):
+    """Move the activity of every thread back, out of the incremental export's settle window."""
+    with psycopg.connect(url) as conn:
+        conn.execute("UPDATE threads SET last_activity = last_activity - make_interval(mins => %s)", (minutes,))
+
+
+def read_jsonl(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+CONSULTATION = [
+    HumanMessage("I have a fever", id="h0"),
+    AIMessage("", id="a0", tool_calls=[{"name": "ConsultDoctorTool", "args": {}, "id": "call-1"}]),
+    ToolMessage("Rest and fluids", name="ConsultDoctorTool", tool_call_id="call-1", id="t0"),
+    AIMessage("Rest and drink plenty of water", id="a1"),
+]
+
+
+def test_export_writes_one_row_per_message(database, tmp_path):
+    url, saver = database
+    write_conversation(saver, "consultation", CONSULTATION)
+    path = tmp_path / "conversations.jsonl"
+
+    assert ConversationExporter(url, chunk_size=3).export(str(path)) == {"threads": 1, "messages": 4}
+
+    rows = read_jsonl(path)
+    assert [tuple(row) for row in rows] == [EXPORT_COLUMNS] * 4
+    assert [(row["message_index"], row["role"], row["tool_name"]) for row in rows] == [
+        (0, "human", None), (1, "ai", "ConsultDoctorTool"), (2, "tool", "ConsultDoctorTool"), (3, "ai", None)]
+    assert rows[3]["content"] == "Rest and drink plenty of water"
+    # Messages with text are timed by the search index
+    assert rows[0]["timestamp"] is not None and rows[1]["timestamp"] is None
+    assert not (tmp_path / "conversations.jsonl.partial").exists()
+
+
+@pytest.mark.skipif(pa is None, reason="pyarrow is not installed")
+def test_parquet_export_has_the_same_rows(database, tmp_path):
+    import pyarrow.parquet as pq
+    url, saver = database
+    write_conversation(saver, "consultation", CONSULTATION)
+    path = tmp_path / "conversations.parquet"
+
+    ConversationExporter(url).export(str(path), format="parquet")
+
+    table = pq.read_table(path)
+    assert table.column_names == list(EXPORT_COLUMNS)
+    assert table.column("message_id").to_pylist() == ["h0", "a0", "t0", "a1"]
+
+
+def test_incremental_export_only_picks_up_threads_active_since_the_last_one(database, tmp_path):
+    url, saver = database
+    state_file = str(tmp_path / "state.json")
+    exporter = ConversationExporter(url)
+    config = write_conversation(saver, "returning", CONSULTATION[:1])
+    write_conversation(saver, "finished", CONSULTATION)
+    age_threads(url, 10)
+
+    assert exporter.export(str(tmp_path / "first.jsonl"), state_file=state_file) == {"threads": 2, "messages": 5}
+    assert exporter.export(str(tmp_path / "empty.jsonl"), state_file=state_file) == {"threads": 0, "messages": 0}
+
+    write_conversation(saver, "returning", CONSULTATION, config)
+    # Still inside the settle window: left for the next export
+    assert exporter.export(str(tmp_path / "early.jsonl"), state_file=state_file)["threads"] == 0
+    age_threads(url, 5)
+
+    assert exporter.export(str(tmp_path / "second.jsonl"), state_file=state_file) == {"threads": 1, "messages": 4}
+    assert {row["thread_id"] for row in read_jsonl(tmp_path / "second.jsonl")} == {"returning"}
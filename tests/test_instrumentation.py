@@ -0,0 +1,140 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.errors import GraphInterrupt
+from langgraph.graph import StateGraph, START, END, MessagesState
+
+from utils.instrumentation import Histogram, Instrumentation, instrumentation, instrument_checkpointer
+from api.routes import health
+
+
+@pytest.fixture
+def recorder():
+    return Instrumentation(enabled=True, max_traces=2)
+
+
+@pytest.fixture
+def global_instrumentation():
+    instrumentation.reset()
+    yield instrumentation
+    instrumentation.reset()
+
+
+def test_spans_nest_and_carry_tokens_cache_results_and_errors(recorder):
+    @recorder.traced("expert")
+    def consult():
+        recorder.record_cache("miss")
+        recorder.record_tokens(120, 30)
+        return "answer"
+
+    with recorder.trace("chat", session_id="s1") as trace:
+        with recorder.span("node", "chatbot") as node:
+            recorder.record_tokens(50, 10)
+            assert consult() == "answer"
+        with pytest.raises(ValueError):
+            with recorder.span("tool", "WebSearchTool"):
+                raise ValueError("no results")
+        with pytest.raises(GraphInterrupt):
+            with recorder.span("tool", "HumanAssistanceTool"):
+                raise GraphInterrupt()
+
+    spans = {span["name"]: span for span in recorder.get_trace(trace.id)["spans"]}
+    assert spans["consult"]["parent"] == node.id and spans["chatbot"]["parent"] == spans["chat"]["id"]
+    assert (spans["consult"]["input_tokens"], spans["consult"]["cache"]) == (120, "miss")
+    assert spans["WebSearchTool"]["error"] == "ValueError: no results"
+    # Interrupts pause the graph, they are not errors
+    assert spans["HumanAssistanceTool"]["error"] is None
+
+    summary = recorder.recent_traces()[0]
+    assert (summary["input_tokens"], summary["output_tokens"]) == (170, 40)
+    assert summary["cache"] == {"miss": 1} and summary["errors"] == 1
+    assert summary["attributes"] == {"session_id": "s1"}
+    assert set(summary["time_by_kind_ms"]) == {"request", "node", "expert", "tool"}
+
+    metrics = recorder.metrics()
+    assert metrics["counters"] == {"cache.miss": 1, "errors.tool.WebSearchTool": 1}
+    assert metrics["latency_ms"]["expert.consult"]["count"] == 1
+    assert metrics["tokens"]["expert.consult.input"]["sum"] == 120
+
+
+def test_spans_follow_the_request_into_threads_and_tasks(recorder):
+    @recorder.traced("node")
+    def in_thread():
+        recorder.record_tokens(1, 1)
+
+    @recorder.traced("node")
+    async def in_task():
+        recorder.record_tokens(2, 2)
+
+    async def request():
+        with recorder.trace("chat") as trace:
+            await asyncio.to_thread(in_thread)
+            await asyncio.gather(in_task(), in_task())
+        return trace
+
+    trace = asyncio.run(request())
+
+    assert sorted(span["name"] for span in recorder.get_trace(trace.id)["spans"]) == [
+        "chat", "in_task", "in_task", "in_thread"]
+    assert trace.input_tokens == 5
+
+
+def test_only_the_most_recent_traces_are_kept(recorder):
+    ids = []
+    for name in ("first", "second", "third"):
+        with recorder.trace(name) as trace:
+            ids.append(trace.id)
+
+    assert [summary["name"] for summary in recorder.recent_traces()] == ["third", "second"]
+    assert recorder.get_trace(ids[0]) is None
+
+
+def test_disabled_instrumentation_records_nothing():
+    recorder = Instrumentation(enabled=False)
+    with recorder.trace("chat") as trace, recorder.span("node", "chatbot") as span:
+        recorder.record_tokens(10, 10)
+    assert trace is None and span is None
+    assert recorder.metrics()["latency_ms"] == {} and recorder.recent_traces() == []
+
+
+def test_histogram_percentiles_are_bucket_bounds():
+    histogram = Histogram((10, 100))
+    for value in (1, 2, 50, 500):
+        histogram.observe(value)
+    assert (histogram.percentile(0.5), histogram.percentile(0.75), histogram.percentile(1.0)) == (10, 100, 500)
+    assert histogram.to_dict()["buckets"] == {"le_10": 2, "le_100": 1, "inf": 1}
+
+
+def test_checkpointer_calls_of_a_graph_run_are_traced(global_instrumentation):
+    builder = StateGraph(MessagesState)
+    builder.add_node("chatbot", lambda state: {"messages": [("ai", "hello")]})
+    builder.add_edge(START, "chatbot")
+    builder.add_edge("chatbot", END)
+    graph = builder.compile(checkpointer=instrument_checkpointer(MemorySaver()))
+
+    with global_instrumentation.trace("chat") as trace:
+        graph.invoke({"messages": [("user", "hi")]}, {"configurable": {"thread_id": "traced"}})
+        list(graph.get_state_history({"configurable": {"thread_id": "traced"}}))
+
+    names = {(span["kind"], span["name"]) for span in global_instrumentation.get_trace(trace.id)["spans"]}
+    assert {("checkpointer", "get_tuple"), ("checkpointer", "put"), ("checkpointer", "list")} <= names
+
+
+def test_health_endpoints_serve_metrics_and_traces(global_instrumentation):
+    app = FastAPI()
+    app.include_router(health.router)
+    client = TestClient(app)
+    with global_instrumentation.trace("chat") as trace:
+        with global_instrumentation.span("node", "chatbot"):
+            global_instrumentation.record_cache("hit")
+
+    metrics = client.get("/health/metrics").json()["metrics"]
+    assert metrics["counters"] == {"cache.hit": 1}
+    assert "node.chatbot" in metrics["latency_ms"]
+    assert [summary["trace_id"] for summary in client.get("/health/traces").json()["traces"]] == [trace.id]
+    assert len(client.get(f"/health/traces/{trace.id}").json()["spans"]) == 2
+    assert client.get("/health/traces/unknown").status_code == 404
+    assert client.get("/health/traces", params={"limit": 0}).json()["traces"] == []
@@ -0,0 +1,57 @@
+import threading
+
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
+
+from utils.llm_clients import LLMClientRegistry
+
+
+def test_clients_are_created_once_per_settings():
+    registry = LLMClientRegistry()
+    clients = []
+    workers = [threading.Thread(target=lambda: clients.append(registry.get("gemini-2.5-flash", 0.2)))
+               for _ in range(8)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert all(client is clients[0] for client in clients)
+    assert clients[0].model == "models/gemini-2.5-flash"
+    assert registry.get("gemini-2.5-flash", 0.3) is not clients[0]
+    assert len(registry.stats()["clients"]) == 2
+
+
+def test_clients_share_the_channel_of_their_transport():
+    registry = LLMClientRegistry()
+    focused = registry.get("gemini-2.5-flash", 0.2)
+    creative = registry.get("gemini-2.5-pro", 0.9, top_p=0.5)
+    other_key = registry.get("gemini-2.5-flash", 0.2, google_api_key="other")
+
+    assert (creative.temperature, creative.top_p) == (0.9, 0.5)
+    assert creative.client is focused.client
+    assert creative.async_client is focused.async_client
+    assert other_key.client is not focused.client
+    assert registry.stats()["transports"] == 2
+
+
+def test_invalid_temperature_is_rejected():
+    with pytest.raises(ValueError, match="temperature"):
+        LLMClientRegistry().get("gemini-2.5-flash", 3.0)
+
+
+def test_stats_count_requests_errors_and_tokens():
+    registry = LLMClientRegistry()
+    counter = registry.get("gemini-2.5-flash", 0.2).callbacks[0]
+    message = AIMessage("Rest", usage_metadata={"input_tokens": 12, "output_tokens": 3, "total_tokens": 15})
+
+    counter.on_chat_model_start({}, [[]])
+    counter.on_llm_end(LLMResult(generations=[[ChatGeneration(message=message)]]))
+    counter.on_chat_model_start({}, [[]])
+    counter.on_llm_error(RuntimeError("quota exceeded"))
+
+    assert registry.stats()["clients"] == [{
+        "model": "gemini-2.5-flash", "temperature": 0.2, "options": {},
+        "requests": 2, "errors": 1, "input_tokens": 12, "output_tokens": 3,
+    }]
@@ -0,0 +1,102 @@
+import psycopg
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from models.connect_database import SimplePostgresCheckpointer
+from models.maintenance import CheckpointMaintenance, THREAD_TABLES
+from tests.test_checkpointer_conformance import make_checkpoint
+
+
+@pytest.fixture
+def database(create_database):
+    url = create_database()
+    saver = SimplePostgresCheckpointer(url, min_size=1, max_size=2, cache_size=0, storage_mode="message_log")
+    yield url, saver
+    saver.close()
+
+
+def write_thread(saver, thread_id, turns):
+    """Store one checkpoint per turn, each with a pending write, the messages growing by two per turn."""
+    config = {"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}}
+    messages = []
+    for turn in range(turns):
+        messages = messages + [HumanMessage(f"question {turn} about fever", id=f"{thread_id}-h{turn}"),
+                               AIMessage(f"answer {turn}", id=f"{thread_id}-a{turn}")]
+        checkpoint = make_checkpoint(turn)
+        checkpoint["channel_values"] = {"messages": messages}
+        config = saver.put(config, checkpoint, {"source": "loop", "step": turn}, {})
+        saver.put_writes(config, [("value", turn)], f"task-{turn}")
+    return config
+
+
+def row_counts(url, thread_id):
+    with psycopg.connect(url) as conn:
+        return {table: conn.execute(f"SELECT COUNT(*) FROM {table} WHERE thread_id = %s", (thread_id,)).fetchone()[0]
+                for table in THREAD_TABLES}
+
+
+def test_prune_keeps_the_newest_checkpoints(database):
+    url, saver = database
+    latest = write_thread(saver, "prune", 5)
+    write_thread(saver, "short", 2)
+
+    assert CheckpointMaintenance(url, pause=0).prune_checkpoints(keep_last=2) == 3
+
+    counts = row_counts(url, "prune")
+    assert counts["checkpoints"] == 2 and counts["checkpoint_writes"] == 2
+    # The remaining checkpoints still reference the whole log segment
+    assert counts["checkpoint_messages"] == 10
+    assert row_counts(url, "short")["checkpoints"] == 2
+    assert [m.content for m in saver.get_tuple(latest).checkpoint["channel_values"]["messages"]][-1] == "answer 4"
+    with psycopg.connect(url) as conn:
+        assert conn.execute("SELECT checkpoint_count FROM threads WHERE thread_id = 'prune'").fetchone()[0] == 2
+
+
+def test_prune_compacts_unreferenced_log_segments(database):
+    url, saver = database
+    config = write_thread(saver, "compact", 2)
+    # A replaced message starts a new log segment; the old one is only referenced by older checkpoints
+    checkpoint = make_checkpoint(9)
+    checkpoint["channel_values"] = {"messages": [HumanMessage("edited question", id="compact-h0")]}
+    saver.put(config, checkpoint, {"source": "update", "step": 9}, {})
+
+    CheckpointMaintenance(url, pause=0).prune_checkpoints(keep_last=1)
+
+    assert row_counts(url, "compact")["checkpoint_messages"] == 1
+
+
+def test_purge_deletes_only_expired_threads(database):
+    url, saver = database
+    write_thread(saver, "old", 2)
+    write_thread(saver, "recent", 2)
+    with psycopg.connect(url) as conn:
+        conn.execute("UPDATE threads SET last_activity = last_activity - interval '40 days' WHERE thread_id = 'old'")
+
+    assert CheckpointMaintenance(url, pause=0).purge_expired_threads(ttl_days=30) == 1
+
+    assert set(row_counts(url, "old").values()) == {0}
+    assert row_counts(url, "recent")["checkpoints"] == 2
+
+
+def test_delete_thread_is_all_or_nothing(database):
+    url, saver = database
+    write_thread(saver, "private", 3)
+    before = row_counts(url, "private")
+    assert all(before[table] > 0 for table in THREAD_TABLES)
+    with psycopg.connect(url) as conn:
+        # The last table of the delete fails
+        conn.execute('''
+            CREATE FUNCTION refuse() RETURNS trigger LANGUAGE plpgsql AS $$
+            BEGIN RAISE EXCEPTION 'refused'; END $$;
+            CREATE TRIGGER refuse_delete BEFORE DELETE ON threads FOR EACH ROW EXECUTE FUNCTION refuse();
+        ''')
+    jobs = CheckpointMaintenance(url, pause=0)
+
+    with pytest.raises(psycopg.Error):
+        jobs.delete_thread("private")
+    assert row_counts(url, "private") == before
+
+    with psycopg.connect(url) as conn:
+        conn.execute("DROP TRIGGER refuse_delete ON threads")
+    assert jobs.delete_thread("private") == sum(before.values())
+    assert set(row_counts(url, "private").values()) == {0}
@@ -0,0 +1,56 @@
+from langchain_core.messages import AIMessage, HumanMessage
+
+from models.connect_database import SimplePostgresCheckpointer
+from models.message_log import MESSAGE_LOG_REF
+from tests.test_checkpointer_conformance import make_checkpoint
+
+
+def store(saver, thread_id, messages, parent=None):
+    checkpoint = make_checkpoint(0)
+    checkpoint["channel_values"] = {"messages": messages}
+    checkpoint["channel_versions"] = {"messages": len(messages)}
+    config = parent or {"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}}
+    return saver.put(config, checkpoint, {"source": "loop"}, {})
+
+
+def logged_rows(saver, thread_id):
+    with saver.pool.connection() as conn:
+        return conn.execute(
+            "SELECT seq, segment_start, message->'data'->>'content' FROM checkpoint_messages "
+            "WHERE thread_id = %s ORDER BY seq", (thread_id,)).fetchall()
+
+
+def stored_ref(saver, config):
+    with saver.pool.connection() as conn:
+        return conn.execute("SELECT messages_from FROM checkpoints WHERE thread_id = %s AND checkpoint_id = %s",
+                            (config["configurable"]["thread_id"], config["configurable"]["checkpoint_id"])).fetchone()[0]
+
+
+def test_appended_messages_extend_the_segment(postgres_url):
+    saver = SimplePostgresCheckpointer(postgres_url, min_size=1, max_size=2, cache_size=0, storage_mode="message_log")
+    try:
+        first = [HumanMessage("hi", id="h1"), AIMessage("hello", id="a1")]
+        config = store(saver, "log-append", first)
+        config = store(saver, "log-append", first + [HumanMessage("more", id="h2")], config)
+        assert logged_rows(saver, "log-append") == [(0, 0, "hi"), (1, 0, "hello"), (2, 0, "more")]
+        assert [m.content for m in saver.get_tuple(config).checkpoint["channel_values"]["messages"]] == \
+            ["hi", "hello", "more"]
+    finally:
+        saver.close()
+
+
+def test_message_replaced_by_id_starts_a_new_segment(postgres_url):
+    saver = SimplePostgresCheckpointer(postgres_url, min_size=1, max_size=2, cache_size=0, storage_mode="message_log")
+    try:
+        config = store(saver, "log-replace", [HumanMessage("hi", id="h1"), AIMessage("wrong", id="a1")])
+        # Same ids, the earlier message replaced (as add_messages does for a message with an existing id)
+        replaced = [HumanMessage("hi", id="h1"), AIMessage("corrected", id="a1"), HumanMessage("thanks", id="h2")]
+        config = store(saver, "log-replace", replaced, config)
+
+        assert logged_rows(saver, "log-replace")[2:] == [(2, 2, "hi"), (3, 2, "corrected"), (4, 2, "thanks")]
+        assert stored_ref(saver, config) == 2
+        assert [m.content for m in saver.get_tuple(config).checkpoint["channel_values"]["messages"]] == \
+            ["hi", "corrected", "thanks"]
+        assert MESSAGE_LOG_REF not in str(saver.get_tuple(config).checkpoint["channel_values"]["messages"])
+    finally:
+        saver.close()
@@ -0,0 +1,71 @@
+import psycopg
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from models.connect_database import SimplePostgresCheckpointer
+from models.inspect_conversations import ConversationInspector
+from models.message_search import build_search_query
+from tests.test_checkpointer_conformance import make_checkpoint
+
+
+@pytest.fixture
+def database(create_database):
+    url = create_database()
+    saver = SimplePostgresCheckpointer(url, min_size=1, max_size=2, cache_size=0)
+    yield url, saver
+    saver.close()
+
+
+def write_turns(saver, thread_id, turns):
+    """Store one checkpoint per turn with the whole conversation so far."""
+    config = {"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}}
+    messages = []
+    for step, (question, answer) in enumerate(turns):
+        messages = messages + [HumanMessage(question, id=f"{thread_id}-h{step}"),
+                               AIMessage(answer, id=f"{thread_id}-a{step}")]
+        checkpoint = make_checkpoint(step)
+        checkpoint["channel_values"] = {"messages": messages}
+        config = saver.put(config, checkpoint, {"source": "loop", "step": step}, {})
+    return config
+
+
+def test_build_search_query_matches_every_word_as_a_prefix():
+    assert build_search_query("Fever, headache!") == "fever:* & headache:*"
+    assert build_search_query("الحُمّى") == "حمي:*"
+    assert build_search_query("?!") is None
+
+
+def test_every_message_is_indexed_once(database):
+    url, saver = database
+    write_turns(saver, "indexed", [("I have a fever", "Rest and drink water"), ("And a headache", "")])
+
+    with psycopg.connect(url) as conn:
+        rows = conn.execute("SELECT message_id, role, language FROM message_search WHERE thread_id = 'indexed' "
+                            "ORDER BY message_id").fetchall()
+    # The empty answer has no text to index
+    assert rows == [("indexed-a0", "ai", "en"), ("indexed-h0", "human", "en"), ("indexed-h1", "human", "en")]
+
+
+def test_search_finds_threads_by_prefix_and_arabic_spelling(database):
+    url, saver = database
+    write_turns(saver, "headaches", [("Headaches every morning", "Check your sleep"),
+                                     ("Still a headache after coffee", "Try less caffeine")])
+    write_turns(saver, "fever-ar", [("عندي حمى شديدة", "اشرب الكثير من الماء")])
+    write_turns(saver, "unrelated", [("How do transformers work?", "They use attention")])
+    inspector = ConversationInspector(url)
+
+    assert inspector.search_conversations("headache") == ["headaches"]
+    assert inspector.search_conversations("الحُمّى") == ["fever-ar"]
+    assert inspector.search_conversations("headache transformers") == []
+    assert inspector.search_conversations("?!") == []
+
+
+def test_search_pages_through_matching_threads(database):
+    url, saver = database
+    for name in ("first", "second", "third"):
+        write_turns(saver, f"page-{name}", [(f"Question about insulin ({name})", "Answer")])
+    inspector = ConversationInspector(url)
+
+    pages = [inspector.search_conversations("insulin", limit=2, offset=offset) for offset in (0, 2)]
+    assert [len(page) for page in pages] == [2, 1]
+    assert sorted(pages[0] + pages[1]) == ["page-first", "page-second", "page-third"]
@@ -0,0 +1,75 @@
+import json
+
+import psycopg
+
+from models.checkpoint_sql import SELECT_LATEST_CHECKPOINT
+from models.connect_database import SimplePostgresCheckpointer
+from models.message_log import MESSAGE_LOG_REF
+from models.migrations import MIGRATIONS, run_migrations
+
+
+def migrate_to(url, version):
+    """Bring an empty database to `version`, as an older release would have left it."""
+    with psycopg.connect(url, autocommit=True) as conn:
+        conn.execute("CREATE TABLE checkpoint_migrations (v INTEGER PRIMARY KEY)")
+        for v in range(version + 1):
+            conn.execute(MIGRATIONS[v])
+            conn.execute("INSERT INTO checkpoint_migrations (v) VALUES (%s)", (v,))
+
+
+def test_upgrade_from_legacy_schema(create_database):
+    url = create_database()
+    migrate_to(url, 2)
+    checkpoint = {"v": 1, "id": "ignored", "ts": "", "channel_values": {
+        "messages": {MESSAGE_LOG_REF: {"from": 3, "to": 5}}}, "channel_versions": {}, "versions_seen": {}}
+    with psycopg.connect(url) as conn:
+        for checkpoint_id, created_at in (("-81234", "2024-01-01"), ("7001", "2024-01-02"), ("-99", "2024-01-03")):
+            conn.execute(
+                "INSERT INTO checkpoints (thread_id, checkpoint_ns, checkpoint_id, checkpoint, metadata, created_at) "
+                "VALUES ('legacy', '', %s, %s, '{}', %s)", (checkpoint_id, json.dumps(checkpoint), created_at))
+
+    run_migrations(url)
+
+    with psycopg.connect(url) as conn:
+        assert conn.execute("SELECT MAX(v) FROM checkpoint_migrations").fetchone()[0] == len(MIGRATIONS) - 1
+        # 3: legacy ids rewritten to ids sorting by creation time, before any uuid6 id
+        rows = conn.execute("SELECT checkpoint_id, created_at::date::text FROM checkpoints "
+                            "ORDER BY checkpoint_id").fetchall()
+        assert [created for _, created in rows] == ["2024-01-01", "2024-01-02", "2024-01-03"]
+        assert rows[0][0] == "00000000-0000-6000-8000-000000000001"
+        # 5-7: binary encoding columns, JSONB optional; 8: message log start filled in from the JSONB
+        columns = dict(conn.execute("SELECT column_name, is_nullable FROM information_schema.columns "
+                                    "WHERE table_name = 'checkpoints'").fetchall())
+        assert columns["checkpoint"] == "YES"
+        assert {"checkpoint_type", "checkpoint_blob", "messages_from", "parent_checkpoint_id"} <= set(columns)
+        assert conn.execute("SELECT DISTINCT messages_from FROM checkpoints").fetchall() == [(3,)]
+
+    saver = SimplePostgresCheckpointer(url, min_size=1, max_size=1, cache_size=0)
+    try:
+        latest = saver.get_tuple({"configurable": {"thread_id": "legacy", "checkpoint_ns": ""}})
+        assert latest.config["configurable"]["checkpoint_id"] == rows[-1][0]
+    finally:
+        saver.close()
+
+
+def test_migrations_are_idempotent(create_database):
+    url = create_database()
+    run_migrations(url)
+    run_migrations(url)
+    with psycopg.connect(url) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM checkpoint_migrations").fetchone()[0] == len(MIGRATIONS)
+
+
+def test_latest_checkpoint_uses_the_primary_key(create_database):
+    url = create_database()
+    migrate_to(url, 4)
+    run_migrations(url)
+    with psycopg.connect(url) as conn:
+        indexes = {row[0] for row in conn.execute(
+            "SELECT indexname FROM pg_indexes WHERE tablename = 'checkpoints'").fetchall()}
+        assert indexes == {"checkpoints_pkey"}
+        conn.execute("SET enable_seqscan = off")
+        plan = "\n".join(row[0] for row in conn.execute(
+            "EXPLAIN " + SELECT_LATEST_CHECKPOINT, ("t", "")).fetchall())
+        assert "Index Scan Backward using checkpoints_pkey" in plan
+        assert "Sort" not in plan
@@ -0,0 +1,36 @@
+import threading
+import time
+
+from models import connect_database
+from models.connect_database import SimplePostgresCheckpointer
+
+
+def test_concurrent_first_requests_share_one_pool(postgres_url, monkeypatch):
+    saver = SimplePostgresCheckpointer(postgres_url, min_size=1, max_size=2, cache_size=0)
+    saver.close()
+    created = []
+
+    class SlowPool(connect_database.ConnectionPool):
+        def __init__(self, *args, **kwargs):
+            created.append(self)
+            time.sleep(0.05)
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(connect_database, "ConnectionPool", SlowPool)
+    barrier = threading.Barrier(8)
+    pools = []
+
+    def first_request():
+        barrier.wait()
+        pools.append(saver.pool)
+
+    threads = [threading.Thread(target=first_request) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    try:
+        assert len(created) == 1
+        assert all(pool is created[0] for pool in pools)
+    finally:
+        saver.close()
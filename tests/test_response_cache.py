@@ -0,0 +1,101 @@
+import sys
+import time
+
+import pytest
+
+from AgentExpert.response_cache import ExpertResponseCache, MemoryBackend, SqliteBackend
+
+
+class Model:
+    """Stands in for the model call and counts how often it runs."""
+
+    def __init__(self, response="Rest and drink water"):
+        self.response = response
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if isinstance(self.response, Exception):
+            raise self.response
+        return self.response
+
+
+def ask(cache, query, model, system_prompt="You are a doctor. Today is 2025-06-01."):
+    return cache.get_or_compute("doctor", "gemini-2.5-flash", system_prompt, query, model)
+
+
+def test_repeated_questions_are_answered_from_cache():
+    cache = ExpertResponseCache(MemoryBackend())
+    model = Model()
+
+    assert ask(cache, "What is diabetes?", model) == "Rest and drink water"
+    assert ask(cache, "  what is   DIABETES ", model) == "Rest and drink water"
+    assert model.calls == 1
+    # Arabic spelling variants of the same question share an entry
+    ask(cache, "ما هو السكري؟", model)
+    ask(cache, "ما هو السكرى", model)
+    assert model.calls == 2
+    assert cache.stats()["hits"] == 2 and cache.stats()["misses"] == 2
+
+
+def test_a_new_prompt_version_is_not_served_old_answers():
+    cache = ExpertResponseCache(MemoryBackend())
+    model = Model()
+
+    ask(cache, "What is diabetes?", model)
+    ask(cache, "What is diabetes?", model, system_prompt="You are a doctor. Today is 2025-06-02.")
+
+    assert model.calls == 2
+
+
+def test_emergencies_and_failures_are_never_cached():
+    cache = ExpertResponseCache(MemoryBackend())
+    model = Model()
+
+    ask(cache, "I have chest pain", model)
+    ask(cache, "I have chest pain", model)
+    assert model.calls == 2 and cache.stats()["bypassed"] == 2
+
+    failing = Model(RuntimeError("quota exceeded"))
+    with pytest.raises(RuntimeError):
+        ask(cache, "What is insulin?", failing)
+    assert ask(cache, "What is insulin?", Model("A hormone")) == "A hormone"
+    assert cache.backend.size() == 1
+
+
+def test_memory_backend_is_a_bounded_lru_with_a_ttl():
+    backend = MemoryBackend(max_size=2, ttl=60)
+    backend.put("a", "answer a")
+    backend.put("b", "answer b")
+    backend.get("a")
+    backend.put("c", "answer c")
+    assert (backend.get("a"), backend.get("b"), backend.get("c")) == ("answer a", None, "answer c")
+    assert backend.evictions == 1
+
+    expiring = MemoryBackend(max_size=2, ttl=0)
+    expiring.put("a", "answer a")
+    time.sleep(0.01)
+    assert expiring.get("a") is None
+
+
+def test_sqlite_backend_is_shared_by_the_workers_of_a_host(tmp_path, monkeypatch):
+    # AgentExpert exports the cache instance under the module's name
+    monkeypatch.setattr(sys.modules["AgentExpert.response_cache"], "SQLITE_EVICT_EVERY", 1)
+    path = str(tmp_path / "cache" / "expert_cache.db")
+    worker_a = ExpertResponseCache(SqliteBackend(path, max_size=2), "sqlite")
+    worker_b = ExpertResponseCache(SqliteBackend(path, max_size=2), "sqlite")
+    model = Model()
+
+    ask(worker_a, "What is diabetes?", model)
+    assert ask(worker_b, "what is diabetes", model) == "Rest and drink water"
+    assert model.calls == 1
+
+    ask(worker_a, "What is insulin?", model)
+    ask(worker_a, "What is asthma?", model)
+    # Trimmed back to max_size after each store
+    assert worker_b.backend.size() == 2
+    assert worker_a.stats()["evictions"] == 1
+
+    expired = SqliteBackend(str(tmp_path / "expired.db"), ttl=-1)
+    expired.put("a", "answer a")
+    assert expired.get("a") is None and expired.size() == 0
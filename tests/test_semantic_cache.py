@@ -0,0 +1,35 @@
+import pytest
+
+from AgentExpert.semantic_cache import SemanticIndex
+
+
+@pytest.mark.parametrize("stored, asked", [
+    ("Can I take 20 tablets of paracetamol?", "Can I take 2 tablets of paracetamol?"),
+    ("Paracetamol dose for my 2-year-old", "Paracetamol dose for my 12-year-old"),
+    ("Is 500mg of paracetamol safe?", "Is 5000mg of paracetamol safe?"),
+    ("Is 500 mg of paracetamol safe?", "Is 500 ml of paracetamol safe?"),
+    ("Paracetamol dose for a child", "Paracetamol dose for an adult"),
+    ("Can I take ibuprofen with food?", "Can I take ibuprofen without food?"),
+    ("ما جرعة الباراسيتامول لعمر 5 سنوات", "ما جرعة الباراسيتامول لعمر 15 سنوات"),
+    ("Should I take ibuprofen before paracetamol?", "Should I take paracetamol before ibuprofen?"),
+    ("How do I switch from sertraline to fluoxetine?", "How do I switch from fluoxetine to sertraline?"),
+    ("Warfarin dose for people taking aspirin", "Aspirin dose for people taking warfarin"),
+    ("هل آخذ الإيبوبروفين قبل الباراسيتامول؟", "هل آخذ الباراسيتامول قبل الإيبوبروفين؟"),
+])
+def test_questions_differing_in_quantities_negations_or_order_never_share_an_answer(stored, asked):
+    index = SemanticIndex(max_size=4, threshold=0.5)
+    index.add("doctor", stored, "answer")
+    response, similarity = index.lookup("doctor", asked)
+    assert similarity >= 0.5
+    assert response is None
+
+
+@pytest.mark.parametrize("stored, asked", [
+    ("Is 500 mg of paracetamol safe?", "is 500mg of paracetamol safe"),
+    ("ما جرعة الباراسيتامول لعمر ٥ سنوات", "ما جرعة الباراسيتامول لعمر 5 سنوات"),
+    ("I have a headache and fever", "headache with a fever"),
+])
+def test_same_quantities_written_differently_still_match(stored, asked):
+    index = SemanticIndex(max_size=4, threshold=0.5)
+    index.add("doctor", stored, "answer")
+    assert index.lookup("doctor", asked)[0] == "answer"
@@ -0,0 +1,76 @@
+import psycopg
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from models.connect_database import SimplePostgresCheckpointer
+from models.inspect_conversations import ConversationInspector
+from models.thread_summary import summarize_messages
+from tools.registry import TOOL_MODULES
+from utils.domains import EXPERT_TOOLS
+from tests.test_checkpointer_conformance import make_checkpoint
+
+
+@pytest.fixture
+def database(create_database):
+    url = create_database()
+    saver = SimplePostgresCheckpointer(url, min_size=1, max_size=2, cache_size=0)
+    yield url, saver
+    saver.close()
+
+
+def put_messages(saver, config, messages, checkpoint=None):
+    checkpoint = checkpoint or make_checkpoint(len(messages))
+    checkpoint["channel_values"] = {"messages": messages}
+    return saver.put(config, checkpoint, {"source": "loop", "step": len(messages)}, {}), checkpoint
+
+
+def thread_row(url, thread_id):
+    with psycopg.connect(url) as conn:
+        return conn.execute("SELECT checkpoint_count, message_count, language, last_expert FROM threads "
+                            "WHERE thread_id = %s", (thread_id,)).fetchone()
+
+
+def test_expert_tools_are_registered_tools():
+    assert EXPERT_TOOLS <= set(TOOL_MODULES)
+
+
+def test_summarize_messages_takes_the_latest_language_and_expert():
+    messages = [
+        HumanMessage("What causes migraines?"),
+        ToolMessage("...", name="ConsultDoctorTool", tool_call_id="1"),
+        ToolMessage("...", name="WebSearchTool", tool_call_id="2"),
+        AIMessage("Several things"),
+        HumanMessage("ما هو الذكاء الاصطناعي؟"),
+    ]
+    assert summarize_messages(messages) == (5, "ar", "ConsultDoctorTool")
+    assert summarize_messages([HumanMessage("hello")]) == (1, "en", None)
+    assert summarize_messages(None) == (None, None, None)
+
+
+def test_threads_table_follows_checkpoint_writes(database):
+    url, saver = database
+    config = {"configurable": {"thread_id": "summary", "checkpoint_ns": ""}}
+    messages = [HumanMessage("I have a fever", id="h0")]
+    config, _ = put_messages(saver, config, messages)
+    assert thread_row(url, "summary") == (1, 1, "en", None)
+
+    messages = messages + [ToolMessage("Rest", name="ConsultDoctorTool", tool_call_id="1", id="t0"),
+                           AIMessage("Rest and drink water", id="a0")]
+    _, checkpoint = put_messages(saver, config, messages)
+    assert thread_row(url, "summary") == (2, 3, "en", "ConsultDoctorTool")
+
+    # Writing the same checkpoint again is not counted twice
+    put_messages(saver, config, messages, checkpoint)
+    assert thread_row(url, "summary") == (2, 3, "en", "ConsultDoctorTool")
+
+
+def test_threads_are_listed_by_latest_activity_one_page_at_a_time(database):
+    url, saver = database
+    for name in ("oldest", "middle", "newest"):
+        put_messages(saver, {"configurable": {"thread_id": name, "checkpoint_ns": ""}}, [HumanMessage(name)])
+    inspector = ConversationInspector(url)
+
+    first_page, next_page = inspector.list_all_threads(limit=2)
+    assert first_page == ["newest", "middle"]
+    second_page, next_page = inspector.list_all_threads(limit=2, after=next_page)
+    assert second_page == ["oldest"] and next_page is None
@@ -0,0 +1,68 @@
+"""Resuming after a tool interrupt must not run the step's other tools again."""
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.tools import tool
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import StateGraph, START, END
+from langgraph.types import Command
+
+from StateGraph import State, route_tools
+from nodes import BasicToolNode
+from models.sqlite_checkpointer import SqliteCheckpointer
+from tools.HumanAssistant import HumanAssistanceTool
+
+calls = []
+
+
+@tool
+def ExpensiveTool(query: str) -> str:
+    """Stands in for an expert consultation."""
+    calls.append(query)
+    return f"expert answer to {query}"
+
+
+def chatbot(state: State):
+    if isinstance(state["messages"][-1], HumanMessage):
+        return {"messages": [AIMessage(content="", tool_calls=[
+            {"name": "ExpensiveTool", "args": {"query": "q"}, "id": "call_expert"},
+            {"name": "HumanAssistanceTool", "args": {"query": "confirm?"}, "id": "call_human"},
+        ])]}
+    return {"messages": [AIMessage(content="done")]}
+
+
+def build_graph(checkpointer):
+    tool_node = BasicToolNode([ExpensiveTool, HumanAssistanceTool])
+    builder = StateGraph(State)
+    builder.add_node("chatbot", chatbot)
+    builder.add_node("tools", tool_node)
+    builder.add_edge(START, "chatbot")
+    builder.add_conditional_edges("chatbot", route_tools, {"tools": "tools", END: END})
+    builder.add_edge("tools", "chatbot")
+    return builder.compile(checkpointer=checkpointer)
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def checkpointer(request, tmp_path):
+    if request.param == "memory":
+        yield MemorySaver()
+        return
+    saver = SqliteCheckpointer(str(tmp_path / "checkpoints.db"))
+    yield saver
+    saver.close()
+
+
+def test_resume_does_not_rerun_finished_tools(checkpointer):
+    calls.clear()
+    graph = build_graph(checkpointer)
+    config = {"configurable": {"thread_id": "resume"}}
+
+    graph.invoke({"messages": [HumanMessage(content="hi")]}, config)
+    assert graph.get_state(config).interrupts
+    assert calls == ["q"]
+
+    result = graph.invoke(Command(resume={"data": "yes"}), config)
+    assert calls == ["q"]
+    tool_messages = {m.tool_call_id: m.content for m in result["messages"] if m.type == "tool"}
+    assert tool_messages == {"call_expert": '"expert answer to q"', "call_human": '"yes"'}
+    assert result["messages"][-1].content == "done"
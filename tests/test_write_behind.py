@@ -0,0 +1,100 @@
+import threading
+import time
+
+import pytest
+
+from models.write_behind import CheckpointWriteError, WriteBehindCheckpointer
+from tests.test_checkpointer_conformance import make_checkpoint
+
+
+class FakeStore:
+    """Records the writes in order; fails while `failures` is positive and waits while `gate` is clear."""
+
+    db_url = "postgresql://fake"
+
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.gate = threading.Event()
+        self.gate.set()
+        self.operations = []
+
+    def _write(self, operation):
+        self.gate.wait()
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("database down")
+        self.operations.append(operation)
+
+    def put_many(self, rows):
+        self._write(("checkpoints", [checkpoint["id"] for _, checkpoint, _ in rows]))
+
+    def put_writes(self, config, writes, task_id, task_path=""):
+        self._write(("writes", config["configurable"]["checkpoint_id"], task_id))
+
+    def get_tuple(self, config):
+        return None
+
+    def close(self):
+        pass
+
+
+THREAD = {"configurable": {"thread_id": "t", "checkpoint_ns": ""}}
+
+
+def test_writes_are_stored_after_their_checkpoint():
+    store = FakeStore()
+    store.gate.clear()
+    saver = WriteBehindCheckpointer(store, retry_delay=0.01)
+    first = saver.put(THREAD, make_checkpoint(1), {}, {})
+    saver.put_writes(first, [("value", 1)], "task-1")
+    second = saver.put(first, make_checkpoint(2), {}, {})
+    saver.put_writes(second, [("value", 2)], "task-2")
+    # Read your writes while nothing is stored yet
+    assert saver.get_tuple(first).pending_writes == [("task-1", "value", 1)]
+
+    store.gate.set()
+    saver.flush()
+    first_id, second_id = first["configurable"]["checkpoint_id"], second["configurable"]["checkpoint_id"]
+    assert store.operations == [("checkpoints", [first_id]), ("writes", first_id, "task-1"),
+                                ("checkpoints", [second_id]), ("writes", second_id, "task-2")]
+    assert saver.write_stats()["written_writes"] == 2
+
+    # Writes to a stored checkpoint are written through
+    saver.put_writes(second, [("value", 3)], "task-3")
+    assert store.operations[-1] == ("writes", second_id, "task-3")
+    saver.close()
+
+
+def test_failed_writes_stay_queued_until_the_database_recovers():
+    store = FakeStore(failures=4)
+    saver = WriteBehindCheckpointer(store, retries=1, retry_delay=0.05)
+    config = saver.put(THREAD, make_checkpoint(1), {}, {})
+    saver.put_writes(config, [("value", 1)], "task-1")
+    time.sleep(0.1)
+    with pytest.raises(CheckpointWriteError):
+        saver.flush()
+    assert saver.get_tuple(THREAD).config == config
+
+    deadline = time.monotonic() + 5
+    while len(store.operations) < 2 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    saver.flush()
+    assert [operation[0] for operation in store.operations] == ["checkpoints", "writes"]
+    stats = saver.write_stats()
+    assert stats["lost_checkpoints"] == stats["lost_writes"] == 0 and stats["last_error"] is None
+    saver.close()
+
+
+def test_close_reports_what_it_drops():
+    store = FakeStore(failures=10 ** 6)
+    saver = WriteBehindCheckpointer(store, retries=2, retry_delay=0.05)
+    config = saver.put(THREAD, make_checkpoint(1), {}, {})
+    saver.put_writes(config, [("value", 1)], "task-1")
+    saver.put(config, make_checkpoint(2), {}, {})
+    time.sleep(0.2)
+
+    start = time.monotonic()
+    with pytest.raises(CheckpointWriteError, match="2 checkpoints and 1 pending writes"):
+        saver.close()
+    assert time.monotonic() - start < 2
+    assert store.operations == []